@@ -1,37 +1,408 @@
-from flask import Flask, render_template, request, jsonify, send_file, send_from_directory
+from flask import Blueprint, Flask, Response, g, render_template, request, jsonify, send_file, send_from_directory, stream_with_context
+import bisect
+import importlib
 import json
+import shutil
+import sqlite3
 import io
 import os
+import queue
+import random
 import base64
+import copy
+import functools
 import uuid
+import zipfile
+import hashlib
+import tempfile
+import threading
+import time
 from datetime import datetime
-import openai
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN, MSO_AUTO_SIZE
-from pptx.enum.text import MSO_ANCHOR
-from pptx.dml.color import RGBColor
-from pptx.enum.dml import MSO_THEME_COLOR
-from pptx.enum.shapes import MSO_SHAPE
 import re
 import math
 import asyncio
 import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
 
-app = Flask(__name__)
+class _LazyGlobal:
+    """Stand-in for a module global that is expensive to create, such as a heavy import.
+    
+    The first attribute access or call loads the real object and rebinds the
+    global to it, so later lookups go straight to the object. warm_up() loads
+    them all ahead of time.
+    """
+    
+    def __init__(self, name, load, stack=None):
+        self._name = name
+        self._load = load
+        self.stack = stack  # the library warm_up() preloads it with; None is never preloaded
+    
+    def resolve(self):
+        value = self._load()
+        globals()[self._name] = value
+        return value
+    
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+    
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+def _lazy_import(name, module, attr=None, stack=None):
+    return _LazyGlobal(name, lambda: getattr(importlib.import_module(module), attr or name),
+                       stack or module.split('.')[0])
+
+# openai and python-pptx are most of the import time, so they load on first use (or in warm_up)
+openai = _LazyGlobal('openai', lambda: importlib.import_module('openai'), 'openai')
+Presentation = _lazy_import('Presentation', 'pptx')
+Inches = _lazy_import('Inches', 'pptx.util')
+Pt = _lazy_import('Pt', 'pptx.util')
+PP_ALIGN = _lazy_import('PP_ALIGN', 'pptx.enum.text')
+MSO_AUTO_SIZE = _lazy_import('MSO_AUTO_SIZE', 'pptx.enum.text')
+MSO_ANCHOR = _lazy_import('MSO_ANCHOR', 'pptx.enum.text')
+RGBColor = _lazy_import('RGBColor', 'pptx.dml.color')
+MSO_THEME_COLOR = _lazy_import('MSO_THEME_COLOR', 'pptx.enum.dml')
+MSO_SHAPE = _lazy_import('MSO_SHAPE', 'pptx.enum.shapes')
+CT = _lazy_import('CT', 'pptx.opc.constants', 'CONTENT_TYPE')
+RT = _lazy_import('RT', 'pptx.opc.constants', 'RELATIONSHIP_TYPE')
+serialize_part_xml = _lazy_import('serialize_part_xml', 'pptx.opc.oxml')
+CONTENT_TYPES_URI = _lazy_import('CONTENT_TYPES_URI', 'pptx.opc.packuri')
+PACKAGE_URI = _lazy_import('PACKAGE_URI', 'pptx.opc.packuri')
+PackURI = _lazy_import('PackURI', 'pptx.opc.packuri')
+_ContentTypesItem = _lazy_import('_ContentTypesItem', 'pptx.opc.serialized')
+qn = _lazy_import('qn', 'pptx.oxml.ns')
+OxmlElement = _lazy_import('OxmlElement', 'pptx.oxml.xmlchemy')
+PptxImage = _lazy_import('PptxImage', 'pptx.parts.image', 'Image')
+ImagePart = _lazy_import('ImagePart', 'pptx.parts.image')
+SlidePart = _lazy_import('SlidePart', 'pptx.parts.slide')
+
+# Routes register on this blueprint; create_app() builds the Flask app around it
+bp = Blueprint('main', __name__)
 
-# Initialize OpenAI client (users should set OPENAI_API_KEY environment variable)
-openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# Initialize OpenAI client (users should set OPENAI_API_KEY environment variable).
+# It is async: every request runs on the shared OpenAIEngine loop so connections are reused.
+# Created on first use, in the worker process that makes the requests. Its own retries are
+# off: OpenAIEngine.call() retries within a shared budget instead.
+openai_client = _LazyGlobal('openai_client', lambda: openai.AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0))
 
 # Create images directory if it doesn't exist
 IMAGES_DIR = os.path.join(os.path.dirname(__file__), 'static', 'generated_images')
 os.makedirs(IMAGES_DIR, exist_ok=True)
 
-@app.route('/static/generated_images/<filename>')
+# Runtime state (caches, indexes) lives in the Flask instance folder unless overridden
+DATA_DIR = os.getenv('APP_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance'))
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# Process-wide cap on concurrent OpenAI requests across all routes and users. The working limit
+# adapts between the min and max: it creeps up while calls succeed quickly and is cut sharply on
+# 429s, timeouts and calls slower than the latency target (seconds, per kind of call)
+OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', '32'))
+OPENAI_MIN_CONCURRENCY = int(os.getenv('OPENAI_MIN_CONCURRENCY', '1'))
+OPENAI_INITIAL_CONCURRENCY = int(os.getenv('OPENAI_INITIAL_CONCURRENCY', '8'))
+OPENAI_CHAT_LATENCY_TARGET = float(os.getenv('OPENAI_CHAT_LATENCY_TARGET', '30'))
+OPENAI_IMAGE_LATENCY_TARGET = float(os.getenv('OPENAI_IMAGE_LATENCY_TARGET', '90'))
+
+# Retries of 429s, timeouts, connection errors and 5xx: full-jitter exponential backoff, at most
+# OPENAI_MAX_RETRIES per call, and overall no more than OPENAI_RETRY_BUDGET retries per request
+# (plus a burst allowance) so retries cannot multiply load during an outage
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '3'))
+OPENAI_RETRY_BUDGET = float(os.getenv('OPENAI_RETRY_BUDGET', '0.2'))
+OPENAI_RETRY_BURST = float(os.getenv('OPENAI_RETRY_BURST', '20'))
+OPENAI_BACKOFF_BASE = float(os.getenv('OPENAI_BACKOFF_BASE', '0.5'))
+OPENAI_BACKOFF_MAX = float(os.getenv('OPENAI_BACKOFF_MAX', '20'))
+
+# Circuit breaker: this many consecutive 5xx, timeout or connection failures stop OpenAI requests
+# for the cooldown (seconds); then a single probe request decides whether to close it again
+OPENAI_BREAKER_THRESHOLD = int(os.getenv('OPENAI_BREAKER_THRESHOLD', '5'))
+OPENAI_BREAKER_COOLDOWN = float(os.getenv('OPENAI_BREAKER_COOLDOWN', '30'))
+
+# Chat completion cache: in-memory LRU with TTL, optionally backed by SQLite (set LLM_CACHE_DB='' to disable)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '2048'))
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+LLM_CACHE_DB = os.getenv('LLM_CACHE_DB', os.path.join(DATA_DIR, 'llm_cache.sqlite3'))
+# Rows kept in the SQLite table; the oldest are dropped past this, expired ones at any size
+LLM_CACHE_DB_MAX_ENTRIES = int(os.getenv('LLM_CACHE_DB_MAX_ENTRIES', '50000'))
+
+# Managed image store: unreferenced images are evicted once either limit is exceeded
+IMAGE_STORE_MAX_BYTES = int(os.getenv('IMAGE_STORE_MAX_BYTES', str(2 * 1024 ** 3)))
+IMAGE_STORE_MAX_FILES = int(os.getenv('IMAGE_STORE_MAX_FILES', '5000'))
+IMAGE_STORE_MIN_AGE = float(os.getenv('IMAGE_STORE_MIN_AGE', '3600'))
+IMAGE_STORE_RECENT_DECKS = int(os.getenv('IMAGE_STORE_RECENT_DECKS', '50'))
+IMAGE_STORE_CACHE_REF_TTL = float(os.getenv('IMAGE_STORE_CACHE_REF_TTL', str(24 * 3600)))
+IMAGE_STORE_SWEEP_INTERVAL = float(os.getenv('IMAGE_STORE_SWEEP_INTERVAL', '600'))
+
+# Export image derivatives: images are resampled to their placed size before embedding
+EXPORT_IMAGE_DPI = float(os.getenv('EXPORT_IMAGE_DPI', '150'))
+EXPORT_IMAGE_FORMAT = os.getenv('EXPORT_IMAGE_FORMAT', 'png')  # 'png', 'jpeg' or 'original'
+EXPORT_JPEG_QUALITY = int(os.getenv('EXPORT_JPEG_QUALITY', '85'))
+EXPORT_PROCESS_WORKERS = int(os.getenv('EXPORT_PROCESS_WORKERS', str(os.cpu_count() or 1)))
+DERIVATIVES_DIR = os.path.join(DATA_DIR, 'derivatives')
+
+# Exports are spooled in memory up to this size, then moved to a temporary file on disk
+EXPORT_SPOOL_MAX_BYTES = int(os.getenv('EXPORT_SPOOL_MAX_BYTES', str(16 * 1024 * 1024)))
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', str(256 * 1024)))
+
+# 'store-media' writes already-compressed images under ppt/media/ uncompressed and deflates
+# only the XML parts; 'deflate' deflates every part like python-pptx's own save
+EXPORT_ZIP_MODE = os.getenv('EXPORT_ZIP_MODE', 'store-media')
+EXPORT_COMPRESS_LEVEL = int(os.getenv('EXPORT_COMPRESS_LEVEL', '6'))  # zlib level 0-9 for deflated parts
+os.makedirs(DERIVATIVES_DIR, exist_ok=True)
+
+# Background jobs: persisted in SQLite so queued and interrupted work survives a restart
+JOBS_DB = os.path.join(DATA_DIR, 'jobs.sqlite3')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '1.0'))
+JOB_STALE_AFTER = float(os.getenv('JOB_STALE_AFTER', '120'))
+JOB_RETENTION = float(os.getenv('JOB_RETENTION', str(7 * 24 * 3600)))
+EXPORTS_DIR = os.path.join(DATA_DIR, 'exports')
+os.makedirs(EXPORTS_DIR, exist_ok=True)
+
+# Deck store: slides, topic and layouts kept server-side under a deck ID; untouched decks expire
+DECKS_DB = os.path.join(DATA_DIR, 'decks.sqlite3')
+DECK_RETENTION = float(os.getenv('DECK_RETENTION', str(30 * 24 * 3600)))
+
+# Slide rendering engine: 'python-pptx' builds every shape through the API,
+# 'clone' copies shape XML prerendered once per layout (same output, faster for large decks)
+RENDER_ENGINE = os.getenv('RENDER_ENGINE', 'python-pptx')
+
+# Base template exports start from: 'default' (python-pptx's built-in) or a registered name.
+# Registered templates (e.g. corporate masters) are stored as <name>.pptx in BASE_TEMPLATES_DIR
+BASE_TEMPLATE = os.getenv('BASE_TEMPLATE', 'default')
+BASE_TEMPLATES_DIR = os.path.join(DATA_DIR, 'base_templates')
+os.makedirs(BASE_TEMPLATES_DIR, exist_ok=True)
+
+# Rendered-slide cache: re-exports reuse unchanged slides and their image data (0 slides disables)
+RENDER_CACHE_MAX_SLIDES = int(os.getenv('RENDER_CACHE_MAX_SLIDES', '5000'))
+RENDER_CACHE_MAX_MEDIA_BYTES = int(os.getenv('RENDER_CACHE_MAX_MEDIA_BYTES', str(128 * 1024 * 1024)))
+
+# Text fit: 'shrink' lowers each text box's font size (never below TEXT_FIT_MIN_SIZE) until its
+# wrapped text fits the box; 'off' always uses the designer's size
+TEXT_FIT = os.getenv('TEXT_FIT', 'off')
+TEXT_FIT_MIN_SIZE = int(os.getenv('TEXT_FIT_MIN_SIZE', '10'))
+TEXT_FIT_LINE_SPACING = float(os.getenv('TEXT_FIT_LINE_SPACING', '1.2'))  # line height in ems
+TEXT_FIT_CACHE_SIZE = int(os.getenv('TEXT_FIT_CACHE_SIZE', '65536'))
+# Fonts are matched by file name (calibri.ttf, calibrib.ttf, Calibri-Bold.ttf, ...); unmatched
+# families are measured with Pillow's built-in font
+TEXT_FIT_FONT_DIRS = [d for d in os.getenv('TEXT_FIT_FONT_DIRS', os.pathsep.join(
+    [os.path.join(os.getenv('WINDIR', 'C:\\Windows'), 'Fonts')] if os.name == 'nt' else
+    ['/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts'),
+     '/Library/Fonts', '/System/Library/Fonts']
+)).split(os.pathsep) if d]
+
+# Generated images never change once written, so browsers may cache them for good
+IMAGE_CACHE_MAX_AGE = int(os.getenv('IMAGE_CACHE_MAX_AGE', str(365 * 24 * 3600)))
+# Widths offered for ?w= thumbnails; other requested widths snap up to the next one
+IMAGE_THUMBNAIL_WIDTHS = sorted(int(w) for w in os.getenv('IMAGE_THUMBNAIL_WIDTHS', '128,256,512').split(','))
+IMAGE_WEBP_QUALITY = int(os.getenv('IMAGE_WEBP_QUALITY', '80'))
+
+# Concurrency settings for per-slide content generation
+CONTENT_MAX_WORKERS = int(os.getenv('CONTENT_MAX_WORKERS', '5'))
+CONTENT_SLIDE_TIMEOUT = float(os.getenv('CONTENT_SLIDE_TIMEOUT', '60'))
+# 'per-slide' sends one chat request per slide; 'batched' asks for many slides in one JSON response
+CONTENT_MODE = os.getenv('CONTENT_MODE', 'per-slide')
+CONTENT_BATCH_SIZE = int(os.getenv('CONTENT_BATCH_SIZE', '15'))
+CONTENT_BATCH_TIMEOUT = float(os.getenv('CONTENT_BATCH_TIMEOUT', '120'))
+
+# Per-stage concurrency caps for /generate_pipeline (all stages also share the engine's global cap)
+PIPELINE_CONTENT_CONCURRENCY = int(os.getenv('PIPELINE_CONTENT_CONCURRENCY', str(CONTENT_MAX_WORKERS)))
+PIPELINE_PROMPT_CONCURRENCY = int(os.getenv('PIPELINE_PROMPT_CONCURRENCY', '5'))
+PIPELINE_IMAGE_CONCURRENCY = int(os.getenv('PIPELINE_IMAGE_CONCURRENCY', '5'))
+
+# /generate_code output: 'unrolled' spells out every statement for one slide; 'compact' emits
+# the layouts and slides as data tables driven by one shared render function
+CODE_EXPORT_MODE = os.getenv('CODE_EXPORT_MODE', 'unrolled')
+
+# Upper bounds (seconds) of the latency histogram buckets exposed on /metrics
+METRICS_BUCKETS = tuple(float(b) for b in os.getenv(
+    'METRICS_BUCKETS', '0.0005,0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60,120'
+).split(','))
+
+_METRIC_DESCRIPTIONS = {
+    'app_stage_duration_seconds': ('histogram', 'Time spent in each processing stage'),
+    'app_stage_errors_total': ('counter', 'Stages that raised an error'),
+    'app_http_request_duration_seconds': ('histogram', 'HTTP request latency by route'),
+    'app_http_requests_total': ('counter', 'HTTP requests by route and status'),
+    'app_http_request_errors_total': ('counter', 'HTTP requests by route that ended in a 5xx or an exception'),
+    'app_http_requests_in_flight': ('gauge', 'HTTP requests currently being handled, by route'),
+    'app_openai_requests_in_flight': ('gauge', 'OpenAI API calls currently holding an engine slot'),
+    'app_openai_requests_waiting': ('gauge', 'OpenAI API calls waiting for an engine slot'),
+    'app_openai_concurrency_limit': ('gauge', 'Current adaptive limit on concurrent OpenAI API calls'),
+    'app_openai_throttled_total': ('counter', 'OpenAI API calls answered with a 429'),
+    'app_openai_timeouts_total': ('counter', 'OpenAI API calls that timed out'),
+    'app_openai_retries_total': ('counter', 'OpenAI API calls retried after a transient failure'),
+    'app_openai_retries_denied_total': ('counter', 'OpenAI retries refused because the retry budget was spent'),
+    'app_openai_rejected_total': ('counter', 'OpenAI API calls rejected by the open circuit breaker'),
+    'app_openai_circuit_open': ('gauge', '1 while the OpenAI circuit breaker is open or half-open')
+}
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class _StageTimer:
+    """Context manager that records its block's wall time into a stage histogram"""
+    __slots__ = ('metrics', 'labels', 'start')
+    
+    def __init__(self, metrics, labels):
+        self.metrics = metrics
+        self.labels = labels
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe('app_stage_duration_seconds', self.labels, time.perf_counter() - self.start)
+        # Cancellation (e.g. a client disconnecting) is not counted as a failure
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.metrics.inc('app_stage_errors_total', self.labels)
+        return False
+
+class Metrics:
+    """In-process counters, gauges and latency histograms in Prometheus text format.
+    
+    Recording a value takes one lock and a bisect, so stages can be timed on
+    hot paths. Values are per process: with several server workers, each
+    worker exposes its own, and decks built in the process pool are not seen.
+    """
+    
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> [count per bucket..., +Inf count, sum]
+        self._counters = {}    # (name, labels) -> value; gauges live here too
+    
+    def stage(self, stage):
+        """Time a block as one observation of the given stage"""
+        return _StageTimer(self, (('stage', stage),))
+    
+    def observe(self, name, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = [0] * (len(self.buckets) + 2)
+            histogram[index] += 1
+            histogram[-1] += value
+    
+    def inc(self, name, labels=(), amount=1):
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + amount
+    
+    def render(self, extra_gauges=()):
+        """Render every metric, plus (name, labels, value) gauges read at scrape time"""
+        with self._lock:
+            histograms = {key: list(values) for key, values in self._histograms.items()}
+            counters = dict(self._counters)
+        counters.update(((name, labels), value) for name, labels, value in extra_gauges)
+        
+        def sample(name, labels, value):
+            text = ','.join(f'{key}="{_escape_label_value(label)}"' for key, label in labels)
+            return f"{name}{{{text}}} {value}" if text else f"{name} {value}"
+        
+        lines = []
+        described = set()
+        
+        def describe(name):
+            if name not in described and name in _METRIC_DESCRIPTIONS:
+                described.add(name)
+                metric_type, description = _METRIC_DESCRIPTIONS[name]
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {metric_type}")
+        
+        for (name, labels), value in sorted(counters.items()):
+            describe(name)
+            lines.append(sample(name, labels, value))
+        for (name, labels), values in sorted(histograms.items()):
+            describe(name)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(sample(f"{name}_bucket", labels + (('le', le),), cumulative))
+            lines.append(sample(f"{name}_sum", labels, values[-1]))
+            lines.append(sample(f"{name}_count", labels, cumulative))
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+
+@bp.before_app_request
+def _start_request_metrics():
+    g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.metrics_start = time.perf_counter()
+    metrics.inc('app_http_requests_in_flight', (('route', g.metrics_route),))
+
+@bp.after_app_request
+def _count_response_metrics(response):
+    route = g.get('metrics_route', 'unmatched')
+    metrics.inc('app_http_requests_total', (('route', route), ('status', str(response.status_code))))
+    g.metrics_counted = True
+    if response.status_code >= 500:
+        metrics.inc('app_http_request_errors_total', (('route', route),))
+    return response
+
+@bp.teardown_app_request
+def _finish_request_metrics(exc):
+    # Runs after a streamed response has been fully sent
+    if 'metrics_route' not in g:
+        return
+    labels = (('route', g.metrics_route),)
+    metrics.inc('app_http_requests_in_flight', labels, -1)
+    metrics.observe('app_http_request_duration_seconds', labels, time.perf_counter() - g.metrics_start)
+    # An exception that became a 500 response was counted with it above
+    if exc is not None and not g.get('metrics_counted'):
+        metrics.inc('app_http_request_errors_total', labels)
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    """Expose stage timings and request counters in Prometheus text format"""
+    engine = openai_engine.stats()
+    body = metrics.render([
+        ('app_openai_requests_in_flight', (), engine['in_flight']),
+        ('app_openai_requests_waiting', (), engine['waiting']),
+        ('app_openai_concurrency_limit', (), engine['limit']),
+        ('app_openai_throttled_total', (), engine['throttled']),
+        ('app_openai_timeouts_total', (), engine['timeouts']),
+        ('app_openai_retries_total', (), engine['retries']),
+        ('app_openai_retries_denied_total', (), engine['retries_denied']),
+        ('app_openai_rejected_total', (), engine['rejected']),
+        ('app_openai_circuit_open', (), int(engine['breaker']['state'] != 'closed'))
+    ])
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+@bp.route('/static/generated_images/<filename>')
 def serve_generated_image(filename):
-    """Serve generated images"""
-    return send_from_directory(IMAGES_DIR, filename)
+    """Serve generated images, or a cached thumbnail/WebP variant with ?w=<px> and ?format=webp.
+    
+    Files are immutable (every generation gets a new name), so responses carry
+    a long-lived immutable Cache-Control plus an ETag for conditional GETs.
+    """
+    width = request.args.get('w', type=int)
+    image_format = request.args.get('format', '').lower() or None
+    if image_format not in (None, 'png', 'webp'):
+        return jsonify({'error': 'format must be png or webp'}), 400
+    
+    image_store.touch([filename])
+    if width or image_format:
+        try:
+            variant_path = image_variant_path(filename, width, image_format)
+        except Exception as e:
+            print(f"Error rendering variant of {filename}: {str(e)}")
+            variant_path = None
+        if variant_path is None:
+            return jsonify({'error': 'Image not found'}), 404
+        response = send_from_directory(os.path.dirname(variant_path), os.path.basename(variant_path),
+                                       max_age=IMAGE_CACHE_MAX_AGE)
+    else:
+        response = send_from_directory(IMAGES_DIR, filename, max_age=IMAGE_CACHE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 def parse_bullet_points(content):
     """Parse content and extract bullet points - each line becomes a bullet point"""
@@ -63,16 +434,19 @@ def parse_bullet_points(content):
     return bullet_points
 
 
-@app.route('/')
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/generate_code', methods=['POST'])
+@bp.route('/generate_code', methods=['POST'])
 def generate_code():
     layout_data = request.json
     
     # Generate python-pptx code
-    code = generate_pptx_code(layout_data)
+    try:
+        code = generate_pptx_code(layout_data, layout_data.get('mode'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     # Create downloadable file
     file_content = io.StringIO(code)
@@ -83,7 +457,7 @@ def generate_code():
         'filename': f'powerpoint_layout_{datetime.now().strftime("%Y%m%d_%H%M%S")}.py'
     })
 
-@app.route('/download_code', methods=['POST'])
+@bp.route('/download_code', methods=['POST'])
 def download_code():
     code = request.json.get('code')
     filename = request.json.get('filename', 'powerpoint_layout.py')
@@ -100,8 +474,13 @@ def download_code():
         mimetype='text/plain'
     )
 
-def generate_pptx_code(layout_data):
+def generate_pptx_code(layout_data, mode=None):
     """Generate python-pptx code from layout data"""
+    mode = mode or CODE_EXPORT_MODE
+    if mode == 'compact':
+        return generate_compact_pptx_code(layout_data)
+    if mode != 'unrolled':
+        raise ValueError(f"Unknown code export mode: {mode}")
     
     code_lines = [
         "from pptx import Presentation",
@@ -184,19 +563,19 @@ def generate_textbox_code(element, index):
             f"        # Format the paragraph",
             f"        for run in p.runs:",
             f"            font = run.font",
-            f"            font.name = '{font_name}'",
+            f"            font.name = {font_name!r}",
             f"            font.size = Pt({font_size})",
         ])
     else:
         # Simple text without bullets
         lines.extend([
             f"p = text_frame_{index}.paragraphs[0]",
-            f"p.text = '{content}'",
+            f"p.text = {content!r}",
             f"",
             f"# Format text",
             f"for run in p.runs:",
             f"    font = run.font",
-            f"    font.name = '{font_name}'",
+            f"    font.name = {font_name!r}",
             f"    font.size = Pt({font_size})",
         ])
         
@@ -252,7 +631,608 @@ def generate_image_code(element, index):
     
     return lines
 
-def generate_simple_image_prompt(slide_title, slide_content=None):
+# Shared part of every compact script; the generated tables above it drive the loop in main()
+_COMPACT_SCRIPT_RENDERER = '''
+
+def add_text(slide, element, paragraphs, alignment=None, bold=False, level=None):
+    _, left, top, width, height, font_name, font_size = element
+    text_frame = slide.shapes.add_textbox(Inches(left), Inches(top), Inches(width), Inches(height)).text_frame
+    text_frame.clear()
+    text_frame.word_wrap = True
+    text_frame.auto_size = MSO_AUTO_SIZE.NONE
+    for i, text in enumerate(paragraphs):
+        p = text_frame.paragraphs[0] if i == 0 else text_frame.add_paragraph()
+        p.text = text
+        if alignment is not None:
+            p.alignment = alignment
+        for run in p.runs:
+            run.font.name = font_name
+            run.font.size = Pt(font_size)
+            if bold:
+                run.font.bold = True
+        if level is not None:
+            p.level = level
+
+
+def add_image(slide, element, filename):
+    box = [Inches(value) for value in element[1:5]]
+    path = os.path.join(IMAGE_DIR, filename) if filename else None
+    if path and os.path.exists(path):
+        slide.shapes.add_picture(path, *box)
+        return
+    # Missing images become a labelled placeholder rectangle
+    rectangle = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, *box)
+    rectangle.fill.solid()
+    rectangle.fill.fore_color.rgb = RGBColor(240, 240, 240)
+    rectangle.line.color.rgb = RGBColor(169, 169, 169)
+    rectangle.line.width = Pt(1)
+    text_frame = rectangle.text_frame
+    text_frame.clear()
+    p = text_frame.paragraphs[0]
+    p.text = '[INSERT IMAGE HERE]'
+    p.alignment = PP_ALIGN.CENTER
+    text_frame.vertical_anchor = MSO_ANCHOR.MIDDLE
+    for run in p.runs:
+        run.font.name = 'Calibri'
+        run.font.size = Pt(14)
+        run.font.color.rgb = RGBColor(128, 128, 128)
+
+
+def render_slide(pres, row):
+    layout, title, content, bullets, image = row
+    slide = pres.slides.add_slide(pres.slide_layouts[6])  # Blank layout
+    for element in LAYOUTS[layout]:
+        kind = element[0]
+        if kind == 'title':
+            add_text(slide, element, [title], PP_ALIGN.CENTER, bold=True)
+        elif kind == 'subtitle':
+            add_text(slide, element, [content or ''], PP_ALIGN.CENTER)
+        elif kind == 'bullets' and bullets:
+            add_text(slide, element, ['\u2022 ' + text for text in bullets], level=0)
+        elif kind in ('bullets', 'text'):
+            add_text(slide, element, [content or ''])
+        else:
+            add_image(slide, element, image)
+
+
+def main(path='generated_presentation.pptx'):
+    pres = Presentation()
+    pres.slide_width = Inches(13.333)
+    pres.slide_height = Inches(7.5)
+    for row in SLIDES:
+        render_slide(pres, row)
+    pres.save(path)
+    print(f'Presentation saved as {path}')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
+'''
+
+def _compact_layout_rows(layout_config, slide_type):
+    """Resolve a designer layout into (kind, left, top, width, height, font_name, font_size) rows"""
+    rows = []
+    for element in layout_config.get('elements', []):
+        if element['type'] == 'title':
+            kind, font_size = 'title', element.get('font_size', 28)
+        elif element['type'] == 'textbox':
+            if slide_type == 'title':
+                kind = 'subtitle'
+            else:
+                kind = 'bullets' if element.get('list_type', 'none') == 'bullet' else 'text'
+            font_size = element.get('font_size', 18)
+        elif element['type'] == 'image':
+            kind, font_size = 'image', None
+        else:
+            continue
+        rows.append((kind, element['left'], element['top'], element['width'], element['height'],
+                     element.get('font_name', 'Calibri') if font_size else None, font_size))
+    return rows
+
+def _compact_slide_row(slide_data, kinds):
+    """Reduce a slide to the (layout, title, content, bullets, image) row its layout needs"""
+    layout = 'title' if slide_data.get('type') == 'title' else 'content'
+    content = slide_data.get('content', '')
+    bullets = parse_bullet_points(content) if 'bullets' in kinds else None
+    if not ({'subtitle', 'text'} & kinds or ('bullets' in kinds and not bullets)):
+        content = None  # only bullets are drawn, so the raw text is not needed
+    image = None
+    if 'image' in kinds and (slide_data.get('generated_image') or '').startswith('/static/generated_images/'):
+        image = slide_data['generated_image'].replace('/static/generated_images/', '')
+    return (layout, slide_data.get('title', '') if 'title' in kinds else None, content,
+            [text.strip() for text in bullets] if bullets else None, image)
+
+def generate_compact_pptx_code(layout_data):
+    """Generate a data-driven python-pptx script for a whole deck.
+    
+    layout_data carries title_layout, content_layout and slides, as sent to
+    /create_presentation. A bare layout (slide_type and elements) produces a
+    one-slide script from its elements' sample text. Every string is written
+    with repr(), so quotes, backslashes and newlines in content survive.
+    """
+    title_layout = layout_data.get('title_layout')
+    content_layout = layout_data.get('content_layout')
+    slides = layout_data.get('slides')
+    if title_layout is None and content_layout is None:
+        slide_type = 'title' if layout_data.get('slide_type') == 'title' else 'content'
+        title_layout = layout_data if slide_type == 'title' else {}
+        content_layout = layout_data if slide_type == 'content' else {}
+        if slides is None:
+            elements = layout_data.get('elements', [])
+            sample = lambda kind: next((e.get('content', '') for e in elements if e['type'] == kind), '')
+            slides = [{'type': slide_type, 'title': sample('title'), 'content': sample('textbox')}]
+    
+    layouts = {
+        'title': _compact_layout_rows(title_layout or {}, 'title'),
+        'content': _compact_layout_rows(content_layout or {}, 'content')
+    }
+    kinds = {layout: {row[0] for row in rows} for layout, rows in layouts.items()}
+    
+    lines = [
+        f'"""Build a {len(slides or [])}-slide deck exported by PowerPoint Layout Designer."""',
+        "import os",
+        "import sys",
+        "",
+        "from pptx import Presentation",
+        "from pptx.dml.color import RGBColor",
+        "from pptx.enum.shapes import MSO_SHAPE",
+        "from pptx.enum.text import MSO_ANCHOR, MSO_AUTO_SIZE, PP_ALIGN",
+        "from pptx.util import Inches, Pt",
+        "",
+        "# Generated images are looked up here by filename; missing ones become placeholders",
+        "IMAGE_DIR = 'generated_images'",
+        "",
+        "# Element rows: (kind, left, top, width, height, font_name, font_size) in inches and points",
+        "LAYOUTS = {"
+    ]
+    for layout, rows in layouts.items():
+        lines.append(f"    {layout!r}: [")
+        lines.extend(f"        {row!r}," for row in rows)
+        lines.append("    ],")
+    lines.extend([
+        "}",
+        "",
+        "# Slide rows: (layout, title, content, bullets, image filename)",
+        "SLIDES = ["
+    ])
+    for slide_data in slides or []:
+        row = _compact_slide_row(slide_data, kinds['title' if slide_data.get('type') == 'title' else 'content'])
+        lines.append(f"    {row!r},")
+    lines.append("]")
+    
+    return "\n".join(lines) + "\n" + _COMPACT_SCRIPT_RENDERER
+
+class OpenAIUnavailableError(RuntimeError):
+    """Raised without calling the API while the OpenAI circuit breaker is open"""
+
+def _openai_error_kind(error):
+    """Classify a failed API call as 'throttled', 'timeout' or 'unavailable', or None if retrying won't help.
+    
+    Goes by class name and status code so the openai package need not be loaded to check.
+    """
+    names = {cls.__name__ for cls in type(error).__mro__}
+    status = getattr(error, 'status_code', None)
+    if isinstance(error, asyncio.TimeoutError) or 'APITimeoutError' in names or status == 408:
+        return 'timeout'
+    if status == 429:
+        # An exhausted quota does not come back by waiting
+        return None if getattr(error, 'code', None) == 'insufficient_quota' else 'throttled'
+    if 'APIConnectionError' in names or status == 409 or (status is not None and status >= 500):
+        return 'unavailable'
+    return None
+
+def _retry_after(error):
+    """Seconds a Retry-After header on the error's response asks for, if any"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    try:
+        return float(headers.get('retry-after')) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+class OpenAIEngine:
+    """Runs OpenAI work on one asyncio loop per process.
+    
+    Flask routes submit coroutine functions from their worker threads and wait
+    on the returned futures, and the single async client reuses its connection
+    pool for every call. API requests go through call(), so all routes and
+    users share one adaptive concurrency limit, retry budget and circuit breaker.
+    
+    The limit is AIMD: a fast success while the limit is in use adds 1/limit
+    (about one slot per round of requests); a 429 or timeout halves it and a
+    call slower than its latency target trims it, at most once per round so a
+    burst of errors from one round counts once.
+    """
+    
+    DECREASE_FACTOR = 0.5
+    SLOW_DECREASE_FACTOR = 0.9
+    
+    def __init__(self, max_concurrency, min_concurrency=1, initial_concurrency=None, latency_targets=None,
+                 max_retries=3, retry_budget=0.2, retry_burst=20, backoff_base=0.5, backoff_max=20,
+                 breaker_threshold=5, breaker_cooldown=30):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = max(1, min(min_concurrency, max_concurrency))
+        initial = max_concurrency if initial_concurrency is None else initial_concurrency
+        self.limit = float(max(self.min_concurrency, min(initial, max_concurrency)))
+        self.latency_targets = latency_targets or {}
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.retry_burst = retry_burst
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+        self._thread = None
+        self._condition = None
+        self._last_decrease = 0.0
+        self._retry_tokens = float(retry_burst)
+        self.breaker_state = 'closed'
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.server_errors = 0
+        self.slow = 0
+        self.retries = 0
+        self.retries_denied = 0
+        self.rejected = 0
+        self.breaker_opened = 0
+    
+    def _ensure_loop(self):
+        # The loop thread does not survive fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return self._loop
+        with self._lock:
+            if self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                self._condition = asyncio.Condition()
+                self._thread = threading.Thread(target=loop.run_forever, name='openai-engine', daemon=True)
+                self._thread.start()
+                self._loop = loop
+                self._pid = os.getpid()
+        return self._loop
+    
+    def submit(self, func, *args, limiter=None, **kwargs):
+        """Schedule func(*args, **kwargs) on the engine loop and return a concurrent.futures.Future.
+        
+        limiter is an optional asyncio.Semaphore bounding one caller's share of the engine.
+        """
+        loop = self._ensure_loop()
+        
+        async def runner():
+            if limiter is None:
+                return await func(*args, **kwargs)
+            async with limiter:
+                return await func(*args, **kwargs)
+        
+        return asyncio.run_coroutine_threadsafe(runner(), loop)
+    
+    def run(self, func, *args, **kwargs):
+        """Run a coroutine function on the engine loop and block until it finishes"""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError('OpenAIEngine.run() cannot be called from the engine loop; await instead')
+        return self.submit(func, *args, **kwargs).result()
+    
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Hold one of the request slots under the current limit for the duration of an API call"""
+        self.waiting += 1
+        try:
+            async with self._condition:
+                await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+                self.in_flight += 1
+        finally:
+            self.waiting -= 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            async with self._condition:
+                self._condition.notify_all()
+    
+    async def call(self, request, kind='chat'):
+        """Await request() (one API call) under the shared limit, retrying transient failures.
+        
+        kind picks the latency target. Raises OpenAIUnavailableError while the
+        breaker is open, and the call's own error once it is not retryable or
+        the per-call retries or the shared retry budget run out.
+        """
+        self._retry_tokens = min(self.retry_burst, self._retry_tokens + self.retry_budget)
+        attempt = 0
+        while True:
+            probe = False
+            try:
+                async with self.slot():
+                    # Checked once a slot is free, so calls queued before the breaker opened are stopped too
+                    probe = self._admit()
+                    busy = self.waiting > 0 or self.in_flight >= int(self.limit)
+                    started = time.monotonic()
+                    try:
+                        return self._succeeded(await request(), kind, started, busy, probe)
+                    except Exception as e:
+                        error = e
+                        error_kind = self._failed(error, started, probe)
+            finally:
+                if probe:
+                    self._probing = False
+            
+            if error_kind is None or attempt >= self.max_retries:
+                raise error
+            if self._retry_tokens < 1:
+                self.retries_denied += 1
+                raise error
+            self._retry_tokens -= 1
+            self.retries += 1
+            await asyncio.sleep(self._backoff(attempt, error))
+            attempt += 1
+    
+    def _admit(self):
+        """Check the breaker before a request; returns True if the request is the half-open probe"""
+        if self.breaker_state == 'open':
+            remaining = self._opened_at + self.breaker_cooldown - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise OpenAIUnavailableError(f"OpenAI API unavailable after repeated failures; retrying in {math.ceil(remaining)}s")
+            self.breaker_state = 'half-open'
+        if self.breaker_state == 'half-open':
+            if self._probing:
+                self.rejected += 1
+                raise OpenAIUnavailableError("OpenAI API unavailable; checking whether it has recovered")
+            self._probing = True
+            return True
+        return False
+    
+    def _succeeded(self, result, kind, started, busy, probe):
+        self._reachable(probe)
+        if time.monotonic() - started > self.latency_targets.get(kind, math.inf):
+            self.slow += 1
+            self._decrease(started, self.SLOW_DECREASE_FACTOR)
+        elif busy:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        return result
+    
+    def _failed(self, error, started, probe):
+        error_kind = _openai_error_kind(error)
+        if error_kind == 'throttled':
+            self.throttled += 1
+            self._decrease(started, self.DECREASE_FACTOR)
+            self._reachable(probe)
+        elif error_kind in ('timeout', 'unavailable'):
+            if error_kind == 'timeout':
+                self.timeouts += 1
+                self._decrease(started, self.DECREASE_FACTOR)
+            else:
+                self.server_errors += 1
+            self._consecutive_failures += 1
+            if probe or (self.breaker_state == 'closed' and self._consecutive_failures >= self.breaker_threshold):
+                self.breaker_state = 'open'
+                self._opened_at = time.monotonic()
+                self.breaker_opened += 1
+                print(f"OpenAI circuit breaker open for {self.breaker_cooldown:g}s: {str(error) or type(error).__name__}")
+        else:
+            # The API answered (e.g. a 400), so it is up
+            self._reachable(probe)
+        return error_kind
+    
+    def _reachable(self, probe):
+        self._consecutive_failures = 0
+        if probe:
+            self.breaker_state = 'closed'
+            print("OpenAI circuit breaker closed")
+    
+    def _decrease(self, started, factor):
+        # Requests sent before the last cut belong to the round that caused it
+        if started < self._last_decrease:
+            return
+        self.limit = max(self.min_concurrency, self.limit * factor)
+        self._last_decrease = time.monotonic()
+    
+    def _backoff(self, attempt, error):
+        """Full-jitter exponential backoff, but no sooner than a Retry-After the API sent"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+    
+    def stats(self):
+        return {
+            'limit': round(self.limit, 2),
+            'min_concurrency': self.min_concurrency,
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'completed': self.completed,
+            'throttled': self.throttled,
+            'timeouts': self.timeouts,
+            'server_errors': self.server_errors,
+            'slow': self.slow,
+            'retries': self.retries,
+            'retries_denied': self.retries_denied,
+            'retry_tokens': round(self._retry_tokens, 2),
+            'rejected': self.rejected,
+            'breaker': {
+                'state': self.breaker_state,
+                'consecutive_failures': self._consecutive_failures,
+                'opened': self.breaker_opened
+            }
+        }
+
+openai_engine = OpenAIEngine(
+    OPENAI_MAX_CONCURRENCY, OPENAI_MIN_CONCURRENCY, OPENAI_INITIAL_CONCURRENCY,
+    {'chat': OPENAI_CHAT_LATENCY_TARGET, 'image': OPENAI_IMAGE_LATENCY_TARGET},
+    OPENAI_MAX_RETRIES, OPENAI_RETRY_BUDGET, OPENAI_RETRY_BURST, OPENAI_BACKOFF_BASE, OPENAI_BACKOFF_MAX,
+    OPENAI_BREAKER_THRESHOLD, OPENAI_BREAKER_COOLDOWN
+)
+
+class ChatCache:
+    """LRU + TTL cache of chat completion results, optionally persisted to SQLite.
+    
+    Entries are keyed on the full request (model, messages and sampling
+    parameters) so any change to a prompt or setting is a miss. SQLite
+    connections must not be used across fork, so each process opens its own
+    on first use. Every PURGE_INTERVAL writes, expired rows are deleted and
+    the table is cut back to its newest db_max_entries rows.
+    """
+    
+    PURGE_INTERVAL = 100
+    
+    def __init__(self, max_entries, ttl, db_path=None, db_max_entries=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.db_max_entries = db_max_entries if db_max_entries is not None else max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._db = None
+        self._db_pid = None
+        self._puts_since_purge = 0
+        self.hits = 0
+        self.misses = 0
+        if db_path:
+            with contextlib.closing(sqlite3.connect(db_path)) as db:
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS chat_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS chat_cache_created ON chat_cache (created)")
+                self._purge(db)
+    
+    def _purge(self, db):
+        """Delete expired rows, then all but the newest db_max_entries"""
+        db.execute("DELETE FROM chat_cache WHERE created < ?", (time.time() - self.ttl,))
+        db.execute(
+            "DELETE FROM chat_cache WHERE key IN "
+            "(SELECT key FROM chat_cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.db_max_entries,)
+        )
+        db.commit()
+    
+    def _connection(self):
+        # Called with self._lock held
+        if self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            self._db_pid = os.getpid()
+        return self._db
+    
+    @staticmethod
+    def make_key(params):
+        payload = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self.db_path:
+                row = self._connection().execute(
+                    "SELECT value, created FROM chat_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (json.loads(row[0]), row[1])
+                    self._remember_locked(key, entry)
+            
+            if entry is None or now - entry[1] > self.ttl:
+                if entry is not None:
+                    self._forget_locked(key)
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key, value):
+        entry = (value, time.time())
+        with self._lock:
+            self._remember_locked(key, entry)
+            if self.db_path:
+                db = self._connection()
+                db.execute(
+                    "INSERT OR REPLACE INTO chat_cache (key, value, created) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), entry[1])
+                )
+                db.commit()
+                self._puts_since_purge += 1
+                if self._puts_since_purge >= self.PURGE_INTERVAL:
+                    self._puts_since_purge = 0
+                    self._purge(db)
+    
+    def _remember_locked(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _forget_locked(self, key):
+        self._entries.pop(key, None)
+        if self.db_path:
+            db = self._connection()
+            db.execute("DELETE FROM chat_cache WHERE key = ?", (key,))
+            db.commit()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'persistent': bool(self.db_path)
+            }
+
+chat_cache = ChatCache(LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL, LLM_CACHE_DB or None, LLM_CACHE_DB_MAX_ENTRIES)
+
+async def achat_completion(use_cache=True, timeout=None, **params):
+    """Run a chat completion through the response cache on the engine loop.
+    
+    Returns a dict with the message 'content', 'finish_reason', token 'usage'
+    and whether it was served from the cache.
+    """
+    key = ChatCache.make_key(params)
+    # Cache lookups and writes may hit SQLite; that disk I/O runs off the engine loop
+    loop = asyncio.get_running_loop()
+    if use_cache:
+        cached = await loop.run_in_executor(None, chat_cache.get, key)
+        if cached is not None:
+            return dict(cached, cached=True)
+    
+    request_options = {'timeout': timeout} if timeout is not None else {}
+    
+    async def request():
+        with metrics.stage('openai_chat'):
+            return await openai_client.chat.completions.create(**params, **request_options)
+    
+    response = await openai_engine.call(request, 'chat')
+    choice = response.choices[0]
+    usage = getattr(response, 'usage', None)
+    result = {
+        'content': choice.message.content.strip(),
+        'finish_reason': choice.finish_reason,
+        'usage': {
+            'prompt_tokens': usage.prompt_tokens,
+            'completion_tokens': usage.completion_tokens
+        } if usage else None
+    }
+    
+    # Truncated answers are not worth replaying
+    if choice.finish_reason != 'length':
+        await loop.run_in_executor(None, chat_cache.put, key, result)
+    return dict(result, cached=False)
+
+def chat_completion(**kwargs):
+    """Blocking chat_completion for request handlers; see achat_completion"""
+    return openai_engine.run(achat_completion, **kwargs)
+
+async def agenerate_simple_image_prompt(slide_title, slide_content=None):
     """Generate a simple, direct image prompt for a slide"""
     try:
         # Extract first bullet point if content exists
@@ -263,7 +1243,7 @@ def generate_simple_image_prompt(slide_title, slide_content=None):
                 first_bullet = bullet_points[0]
         
         # Simple, direct prompt generation
-        response = openai_client.chat.completions.create(
+        response = await achat_completion(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "Create a simple, direct image prompt for an educational slide. The image should clearly illustrate the main topic. Be literal and specific. No artistic interpretations."},
@@ -273,23 +1253,30 @@ def generate_simple_image_prompt(slide_title, slide_content=None):
             temperature=0.3  # Lower temperature for more consistent results
         )
         
-        return response.choices[0].message.content.strip()
-    except:
-        # Simple fallback - no additional API calls
+        return response['content']
+    except Exception as e:
+        # Simple fallback - no additional API calls (the engine has already retried what it could)
+        print(f"Image prompt for '{slide_title}' fell back to the title: {str(e) or type(e).__name__}")
         return f"An educational illustration showing {slide_title.lower()}"
 
-@app.route('/generate_draft', methods=['POST'])
+def generate_simple_image_prompt(slide_title, slide_content=None):
+    """Blocking wrapper around agenerate_simple_image_prompt"""
+    return openai_engine.run(agenerate_simple_image_prompt, slide_title, slide_content)
+
+@bp.route('/generate_draft', methods=['POST'])
 def generate_draft():
     """Generate a draft outline of slide titles based on user topic"""
     data = request.json
     topic = data.get('topic', '')
+    use_cache = not data.get('no_cache', False)
     
     if not topic:
         return jsonify({'error': 'Topic is required'}), 400
     
     try:
         # Generate slide outline using OpenAI
-        response = openai_client.chat.completions.create(
+        response = chat_completion(
+            use_cache=use_cache,
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "system", "content": "You are a presentation expert. Create a clear, logical outline for a PowerPoint presentation. The first line should be the main presentation title (what goes on the title slide). The following lines should be content slide titles. Return only slide titles, one per line, without numbering, bullet points, or prefixes like 'Title:' or 'Slide 1:'. Provide 5-9 total lines."},
@@ -299,7 +1286,7 @@ def generate_draft():
             temperature=0.7
         )
         
-        slides_text = response.choices[0].message.content.strip()
+        slides_text = response['content']
         slides = [line.strip() for line in slides_text.split('\n') if line.strip()]
         
         # Format slides with types and clean up titles
@@ -340,74 +1327,604 @@ def generate_draft():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/generate_content', methods=['POST'])
+def _new_content_usage():
+    return {'requests': 0, 'cached_requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+
+def _record_content_usage(usage, response):
+    """Add one achat_completion response to a usage tally (updated on the engine loop only)"""
+    if usage is None:
+        return
+    if response['cached']:
+        usage['cached_requests'] += 1
+        return
+    usage['requests'] += 1
+    if response['usage']:
+        usage['prompt_tokens'] += response['usage']['prompt_tokens']
+        usage['completion_tokens'] += response['usage']['completion_tokens']
+
+async def agenerate_slide_content(slide_title, topic, timeout=None, use_cache=True, usage=None):
+    """Generate bullet point content for a single slide.
+    
+    timeout bounds the whole slide, including the engine's retries, backoff
+    and waits for a request slot, not just each HTTP request.
+    """
+    request = achat_completion(
+        use_cache=use_cache,
+        timeout=timeout,
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": "You are a presentation content writer. Create bullet points for PowerPoint slides. Provide each point as a separate line with NO bullet symbols, NO dashes, NO prefixes - just plain text. Each line will automatically become a bullet point in the presentation. Be concise and impactful."},
+            {"role": "user", "content": f"Create content for this slide about '{topic}':\nSlide title: {slide_title}\n\nProvide 3-5 bullet points. Each point should be on its own line with no bullet symbols."}
+        ],
+        max_tokens=300,
+        temperature=0.7
+    )
+    try:
+        response = await asyncio.wait_for(request, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Slide content timed out after {timeout:g}s") from None
+    _record_content_usage(usage, response)
+    
+    return response['content']
+
+async def _arequest_content_batch(slide_titles, topic, use_cache=True, usage=None):
+    """Ask for several slides' bullets in one JSON response; returns {position: content} for valid slides"""
+    slide_list = json.dumps([{'id': i, 'title': title} for i, title in enumerate(slide_titles)], ensure_ascii=False)
+    response = await achat_completion(
+        use_cache=use_cache,
+        timeout=CONTENT_BATCH_TIMEOUT,
+        model="gpt-3.5-turbo",
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": "You are a presentation content writer. Create bullet points for PowerPoint slides. Write each point as plain text with NO bullet symbols, NO dashes, NO prefixes. Be concise and impactful. Respond with JSON only."},
+            {"role": "user", "content": f"Create content for each of these slides about '{topic}'. Provide 3-5 bullet points per slide.\n\nRespond with a JSON object of the form {{\"slides\": [{{\"id\": <slide id>, \"bullets\": [\"point\", ...]}}]}} that includes every slide id.\n\nSlides:\n{slide_list}"}
+        ],
+        # Same per-slide budget as the per-slide path, within the model's output limit
+        max_tokens=min(4096, 300 * len(slide_titles)),
+        temperature=0.7
+    )
+    _record_content_usage(usage, response)
+    if response['finish_reason'] == 'length':
+        raise ValueError("batched response was cut off")
+    
+    contents = {}
+    for item in json.loads(response['content']).get('slides', []):
+        position = item.get('id') if isinstance(item, dict) else None
+        bullets = item.get('bullets') if isinstance(item, dict) else None
+        if isinstance(position, int) and 0 <= position < len(slide_titles) and isinstance(bullets, list):
+            lines = [str(bullet).strip() for bullet in bullets if str(bullet).strip()]
+            if lines:
+                contents[position] = '\n'.join(lines)
+    return contents
+
+async def agenerate_content_batch(slide_titles, topic, use_cache=True, usage=None):
+    """Generate content for several slides with one chat request, returning a result per title.
+    
+    Slides missing from an unparseable, truncated or incomplete response are
+    split in half and retried; a lone slide falls back to the per-slide prompt.
+    """
+    if len(slide_titles) == 1:
+        try:
+            content = await agenerate_slide_content(slide_titles[0], topic, CONTENT_SLIDE_TIMEOUT, use_cache, usage)
+            return [{'content': content, 'success': True}]
+        except Exception as e:
+            return [{'error': str(e) or type(e).__name__, 'success': False}]
+    
+    try:
+        contents = await _arequest_content_batch(slide_titles, topic, use_cache, usage)
+    except Exception as e:
+        print(f"Batch of {len(slide_titles)} slides failed, splitting: {str(e) or type(e).__name__}")
+        contents = {}
+    
+    results = [{'content': contents[i], 'success': True} if i in contents else None
+               for i in range(len(slide_titles))]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        halves = [part for part in (missing[:len(missing) // 2], missing[len(missing) // 2:]) if part]
+        retried = await asyncio.gather(*(
+            agenerate_content_batch([slide_titles[i] for i in part], topic, use_cache, usage)
+            for part in halves
+        ))
+        for part, part_results in zip(halves, retried):
+            for i, result in zip(part, part_results):
+                results[i] = result
+    return results
+
+def iter_content_results(slides, topic, max_workers=CONTENT_MAX_WORKERS, use_cache=True, mode=None, usage=None):
+    """Generate content for slides that need it, yielding (slide_index, result) as each finishes.
+    
+    mode 'per-slide' sends one request per slide; 'batched' sends up to
+    CONTENT_BATCH_SIZE slides per request and yields a batch's slides together.
+    Token counts are added to usage if given.
+    """
+    mode = mode or CONTENT_MODE
+    if mode not in ('per-slide', 'batched'):
+        raise ValueError(f"Unknown content mode: {mode}")
+    pending = [i for i, slide in enumerate(slides)
+               if slide['type'] == 'content' and not slide.get('content_generated', False)]
+    
+    # Fan out on the engine; callers write results back by index so order is preserved
+    limiter = asyncio.Semaphore(max_workers)
+    if mode == 'batched':
+        # Spread slides over every worker: one long batch generates its tokens serially
+        batch_size = max(1, min(CONTENT_BATCH_SIZE, math.ceil(len(pending) / max_workers)))
+        batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+        future_to_indexes = {
+            openai_engine.submit(agenerate_content_batch, [slides[i]['title'] for i in batch], topic, use_cache,
+                                 usage, limiter=limiter): batch
+            for batch in batches
+        }
+    else:
+        future_to_indexes = {
+            openai_engine.submit(agenerate_slide_content, slides[i]['title'], topic, CONTENT_SLIDE_TIMEOUT,
+                                 use_cache, usage, limiter=limiter): [i]
+            for i in pending
+        }
+    try:
+        for future in concurrent.futures.as_completed(future_to_indexes):
+            indexes = future_to_indexes[future]
+            try:
+                value = future.result()
+                results = value if mode == 'batched' else [{'content': value, 'success': True}]
+            except Exception as e:
+                results = [{'error': str(e) or type(e).__name__, 'success': False}] * len(indexes)
+            for slide_index, result in zip(indexes, results):
+                if not result['success']:
+                    print(f"Slide {slide_index} content error: {result['error']}")
+                yield slide_index, result
+    finally:
+        for future in future_to_indexes:
+            future.cancel()
+
+def _merge_slide_patch(slide, patch):
+    """Apply a JSON merge patch to a slide dict: fields set to None are removed"""
+    for name, value in patch.items():
+        if value is None:
+            slide.pop(name, None)
+        else:
+            slide[name] = value
+    return slide
+
+def _content_result_patch(result):
+    """The slide fields a content result changes; a failed slide keeps its previous content"""
+    if result['success']:
+        return {'content': result['content'], 'content_generated': True, 'content_error': None}
+    return {'content_error': result['error']}
+
+def _content_concurrency(value):
+    """Clamp a client-requested fan-out (1 = one slide at a time) to the server cap"""
+    return max(1, min(int(value), CONTENT_MAX_WORKERS))
+
+@bp.route('/generate_content', methods=['POST'])
 def generate_content():
     """Generate full content for approved slide outline"""
     data = request.json
+    try:
+        deck_id = _load_deck_into(data)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     slides = data.get('slides', [])
     topic = data.get('topic', '')
     content_layout = data.get('content_layout', {})
+    use_cache = not data.get('no_cache', False)
     
     if not slides:
         return jsonify({'error': 'Slides are required'}), 400
     
+    try:
+        max_workers = _content_concurrency(data.get('max_concurrency', CONTENT_MAX_WORKERS))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_concurrency must be an integer'}), 400
+    
+    mode = data.get('mode') or CONTENT_MODE
+    if mode not in ('per-slide', 'batched'):
+        return jsonify({'error': "mode must be 'per-slide' or 'batched'"}), 400
     
     try:
-        # Generate content for each slide
-        for slide in slides:
-            if slide['type'] == 'content' and not slide.get('content_generated', False):
-                response = openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a presentation content writer. Create bullet points for PowerPoint slides. Provide each point as a separate line with NO bullet symbols, NO dashes, NO prefixes - just plain text. Each line will automatically become a bullet point in the presentation. Be concise and impactful."},
-                        {"role": "user", "content": f"Create content for this slide about '{topic}':\nSlide title: {slide['title']}\n\nProvide 3-5 bullet points. Each point should be on its own line with no bullet symbols."}
-                    ],
-                    max_tokens=300,
-                    temperature=0.7
-                )
-                
-                slide['content'] = response.choices[0].message.content.strip()
-                slide['content_generated'] = True
+        results = {}
+        patches = {}
+        usage = _new_content_usage()
+        start = time.perf_counter()
+        for slide_index, result in iter_content_results(slides, topic, max_workers, use_cache, mode, usage):
+            results[slide_index] = result
+            patches[slide_index] = _content_result_patch(result)
+            _merge_slide_patch(slides[slide_index], patches[slide_index])
         
-        return jsonify({'slides': slides})
+        return jsonify({
+            **_slides_reply(deck_id, slides, patches),
+            'generated_count': len([r for r in results.values() if r['success']]),
+            'error_count': len([r for r in results.values() if not r['success']]),
+            'usage': dict(usage, mode=mode, elapsed_seconds=round(time.perf_counter() - start, 3))
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def generate_single_image(slide_title, slide_content, custom_prompt=None):
-    """Generate a single image using gpt-image-1"""
+# Parameters sent to gpt-image-1; part of the image cache key so changing them misses the cache
+IMAGE_GENERATION_PARAMS = {
+    'model': 'gpt-image-1',
+    'size': '1024x1024',
+    'quality': 'auto',
+    'moderation': 'low'
+}
+
+class ImageCache:
+    """Content-addressed cache of generated images, indexed in SQLite.
+    
+    Keys hash the prompt together with the generation parameters. Concurrent
+    requests for the same key share a single generation call instead of
+    each paying for their own. The index is shared by every server process;
+    each process opens its own connection on first use, since SQLite
+    connections must not be used across fork.
+    """
+    
+    def __init__(self, db_path, images_dir, legacy_index_path=None):
+        self.db_path = db_path
+        self.images_dir = images_dir
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        with contextlib.closing(sqlite3.connect(db_path)) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS image_cache ("
+                "key TEXT PRIMARY KEY, filename TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS image_cache_filename ON image_cache (filename)")
+            if legacy_index_path:
+                self._import_index(db, legacy_index_path)
+            db.commit()
+    
+    @staticmethod
+    def _import_index(db, index_path):
+        """Move entries from the JSON index earlier versions kept into the table"""
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        db.executemany(
+            "INSERT OR IGNORE INTO image_cache (key, filename, created, last_used) VALUES (?, ?, ?, ?)",
+            [(key, entry['filename'], entry['created'], entry['last_used']) for key, entry in entries.items()]
+        )
+        db.commit()
+        os.remove(index_path)
+    
+    @staticmethod
+    def make_key(prompt, params):
+        payload = json.dumps({'prompt': prompt, 'params': params}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _execute(self, sql, params=(), many=False):
+        """Run one statement in its own transaction on this process's connection and return its rows"""
+        with self._db_lock:
+            if self._db_pid != os.getpid():
+                self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+                self._db_pid = os.getpid()
+            with self._db:
+                cursor = self._db.executemany(sql, params) if many else self._db.execute(sql, params)
+                return cursor.fetchall()
+    
+    def _lookup(self, key):
+        """The cached filename for a key if its file still exists, marking the entry used"""
+        rows = self._execute("SELECT filename FROM image_cache WHERE key = ?", (key,))
+        if not rows or not os.path.exists(os.path.join(self.images_dir, rows[0][0])):
+            return None
+        self._execute("UPDATE image_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        return rows[0][0]
+    
+    def _store(self, key, filename):
+        now = time.time()
+        self._execute(
+            "INSERT OR REPLACE INTO image_cache (key, filename, created, last_used) VALUES (?, ?, ?, ?)",
+            (key, filename, now, now)
+        )
+    
+    async def get_or_create(self, key, create, use_cache=True):
+        """Return (filename, source) where source is 'hit', 'shared' or 'miss'.
+        
+        create is a coroutine function, only awaited on a miss, that returns the
+        new image filename. With use_cache=False the lookup is skipped and a
+        fresh image replaces the entry. Runs on the OpenAIEngine loop; index
+        reads and writes go to the loop's executor so they don't stall it.
+        """
+        loop = asyncio.get_running_loop()
+        if use_cache:
+            filename = await loop.run_in_executor(None, self._lookup, key)
+            if filename is not None:
+                with self._lock:
+                    self.hits += 1
+                return filename, 'hit'
+        
+        with self._lock:
+            if use_cache:
+                in_flight = self._in_flight.get(key)
+                if in_flight is not None:
+                    self.shared += 1
+            else:
+                in_flight = None
+            
+            if in_flight is None:
+                self.misses += 1
+                future = loop.create_future()
+                # Mark failures as retrieved even when nobody else was waiting
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+                if use_cache:
+                    self._in_flight[key] = future
+        
+        if in_flight is not None:
+            # Another request is already generating this image; wait for its result.
+            # shield() keeps one waiter's cancellation from cancelling the shared call.
+            return await asyncio.shield(in_flight), 'shared'
+        
+        try:
+            filename = await create()
+            await loop.run_in_executor(None, self._store, key, filename)
+        except BaseException as e:
+            with self._lock:
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+            raise
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        future.set_result(filename)
+        return filename, 'miss'
+    
+    def referenced_filenames(self, since):
+        """Filenames of entries created or hit at or after the given timestamp"""
+        return {row[0] for row in self._execute("SELECT filename FROM image_cache WHERE last_used >= ?", (since,))}
+    
+    def discard_filenames(self, filenames):
+        """Drop entries whose image file has been removed"""
+        self._execute("DELETE FROM image_cache WHERE filename = ?", [(filename,) for filename in filenames], many=True)
+    
+    def stats(self):
+        entries = self._execute("SELECT COUNT(*) FROM image_cache")[0][0]
+        with self._lock:
+            lookups = self.hits + self.misses + self.shared
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'shared': self.shared,
+                'hit_rate': (self.hits + self.shared) / lookups if lookups else 0.0,
+                'entries': entries,
+                'in_flight': len(self._in_flight)
+            }
+
+image_cache = ImageCache(os.path.join(DATA_DIR, 'image_cache.sqlite3'), IMAGES_DIR,
+                         legacy_index_path=os.path.join(DATA_DIR, 'image_cache.json'))
+
+class ImageStore:
+    """Tracks generated images on disk and evicts unreferenced ones past the size/count limits.
+    
+    An image is referenced while it belongs to one of the most recent exported
+    decks, has an image cache entry used within IMAGE_STORE_CACHE_REF_TTL, is
+    named by a registered reference source (e.g. stored decks), or is younger
+    than IMAGE_STORE_MIN_AGE (still on someone's screen). Eviction runs on a
+    background thread, oldest access first. Every sweep rescans the directory,
+    so the limits hold across all worker processes sharing it.
+    """
+    
+    def __init__(self, images_dir, cache):
+        self.images_dir = images_dir
+        self.cache = cache
+        self._reference_sources = []
+        self._lock = threading.Lock()
+        self._files = None  # filename -> [size, created, last_access], scanned lazily
+        self._recent_decks = deque(maxlen=IMAGE_STORE_RECENT_DECKS)
+        self._wakeup = threading.Event()
+        self._worker_pid = None
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self.last_sweep = None
+    
+    def _scan_directory(self):
+        files = {}
+        for entry in os.scandir(self.images_dir):
+            if entry.is_file() and entry.name.endswith('.png'):
+                stat = entry.stat()
+                files[entry.name] = [stat.st_size, stat.st_mtime, stat.st_mtime]
+        return files
+    
+    def _scan_locked(self):
+        if self._files is None:
+            self._files = self._scan_directory()
+    
+    def _rescan(self):
+        """Re-read the directory, so images written or evicted by other worker processes count too"""
+        started = time.time()
+        files = self._scan_directory()
+        with self._lock:
+            known = self._files or {}
+            for filename, record in files.items():
+                if filename in known:
+                    record[2] = max(record[2], known[filename][2])
+            # Images this process added while the directory was being read
+            for filename, record in known.items():
+                if filename not in files and record[1] >= started:
+                    files[filename] = record
+            self._files = files
+    
+    def _ensure_worker(self):
+        # Threads do not survive fork, so each worker process starts its own sweeper
+        if self._worker_pid == os.getpid():
+            return
+        self._worker_pid = os.getpid()
+        threading.Thread(target=self._run, name='image-store-sweeper', daemon=True).start()
+    
+    def add(self, filename):
+        """Record a newly written image and wake the sweeper if a limit is exceeded"""
+        try:
+            size = os.path.getsize(os.path.join(self.images_dir, filename))
+        except OSError:
+            return
+        now = time.time()
+        with self._lock:
+            self._scan_locked()
+            self._files[filename] = [size, now, now]
+            over_limit = self._over_limit_locked()
+        self._ensure_worker()
+        if over_limit:
+            self._wakeup.set()
+    
+    def touch(self, filenames):
+        """Mark images as just used"""
+        self._ensure_worker()
+        now = time.time()
+        with self._lock:
+            self._scan_locked()
+            for filename in filenames:
+                record = self._files.get(filename)
+                if record:
+                    record[2] = now
+    
+    def record_deck(self, filenames):
+        """Keep the images of an exported deck referenced while it is among the recent decks"""
+        filenames = set(filenames)
+        self.touch(filenames)
+        with self._lock:
+            self._recent_decks.append(filenames)
+    
+    def add_reference_source(self, source):
+        """Register a callable returning filenames that must not be evicted; it is called on every sweep"""
+        self._reference_sources.append(source)
+    
+    def _over_limit_locked(self):
+        total_bytes = sum(record[0] for record in self._files.values())
+        return total_bytes > IMAGE_STORE_MAX_BYTES or len(self._files) > IMAGE_STORE_MAX_FILES
+    
+    def _run(self):
+        while True:
+            self._wakeup.wait(IMAGE_STORE_SWEEP_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Image store sweep error: {str(e)}")
+    
+    def sweep(self):
+        """Evict unreferenced images, least recently used first, until under both limits"""
+        now = time.time()
+        referenced = self.cache.referenced_filenames(now - IMAGE_STORE_CACHE_REF_TTL)
+        for source in self._reference_sources:
+            referenced |= set(source())
+        self._rescan()
+        with self._lock:
+            self.last_sweep = now
+            for deck in self._recent_decks:
+                referenced |= deck
+            
+            total_bytes = sum(record[0] for record in self._files.values())
+            total_files = len(self._files)
+            candidates = sorted(
+                (record[2], filename) for filename, record in self._files.items()
+                if filename not in referenced and now - record[1] >= IMAGE_STORE_MIN_AGE
+            )
+            
+            victims = []
+            for _, filename in candidates:
+                if total_bytes <= IMAGE_STORE_MAX_BYTES and total_files <= IMAGE_STORE_MAX_FILES:
+                    break
+                size = self._files.pop(filename)[0]
+                victims.append((filename, size))
+                total_bytes -= size
+                total_files -= 1
+        
+        # File deletion happens outside the lock so requests never wait on disk I/O
+        removed = set()
+        for filename, size in victims:
+            try:
+                os.remove(os.path.join(self.images_dir, filename))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Could not evict {filename}: {str(e)}")
+                continue
+            removed.add(filename)
+            self.evicted_files += 1
+            self.evicted_bytes += size
+            _remove_derivatives(filename)
+        
+        if removed:
+            self.cache.discard_filenames(removed)
+            print(f"Image store evicted {len(removed)} images")
+        return len(removed)
+    
+    def stats(self):
+        with self._lock:
+            self._scan_locked()
+            return {
+                'files': len(self._files),
+                'bytes': sum(record[0] for record in self._files.values()),
+                'max_files': IMAGE_STORE_MAX_FILES,
+                'max_bytes': IMAGE_STORE_MAX_BYTES,
+                'recent_decks': len(self._recent_decks),
+                'evicted_files': self.evicted_files,
+                'evicted_bytes': self.evicted_bytes,
+                'last_sweep': self.last_sweep
+            }
+
+image_store = ImageStore(IMAGES_DIR, image_cache)
+
+def _write_image_file(image_base64):
+    """Decode a base64 image and save it under a unique name, returning the filename"""
+    # Generate unique filename
+    image_filename = f"generated_{uuid.uuid4().hex[:8]}_{int(datetime.now().timestamp())}.png"
+    image_path = os.path.join(IMAGES_DIR, image_filename)
+    
+    # Save base64 image to file
+    with metrics.stage('b64_decode'):
+        image_bytes = base64.b64decode(image_base64)
+    with metrics.stage('image_write'), open(image_path, 'wb') as f:
+        f.write(image_bytes)
+    
+    return image_filename
+
+async def _render_image_file(image_prompt):
+    """Call gpt-image-1 for a prompt and save the result, returning the new filename"""
+    async def request():
+        with metrics.stage('openai_image'):
+            return await openai_client.images.generate(prompt=image_prompt, **IMAGE_GENERATION_PARAMS)
+    
+    response = await openai_engine.call(request, 'image')
+    
+    # gpt-image-1 returns base64 data; decoding and disk I/O stay off the event loop
+    image_base64 = response.data[0].b64_json
+    return await asyncio.get_running_loop().run_in_executor(None, _write_image_file, image_base64)
+
+async def agenerate_single_image(slide_title, slide_content, custom_prompt=None, use_cache=True):
+    """Generate a single image using gpt-image-1, reusing a cached render of the same prompt"""
     try:
         # Use custom prompt if provided, otherwise generate simple prompt
         if custom_prompt:
             image_prompt = custom_prompt
         else:
             # Use the new simple prompt generation
-            image_prompt = generate_simple_image_prompt(slide_title, slide_content)
+            image_prompt = await agenerate_simple_image_prompt(slide_title, slide_content)
         
         # Log the prompt for debugging
         print(f"Generating image for '{slide_title}' with prompt: {image_prompt}")
         
-        # Simplified parameters for gpt-image-1
-        response = openai_client.images.generate(
-            model="gpt-image-1",
-            prompt=image_prompt,
-            size="1024x1024",
-            quality="auto",  # Changed to "auto" - a supported value
-            # Removed background parameter
-            moderation="low"
+        cache_key = ImageCache.make_key(image_prompt, IMAGE_GENERATION_PARAMS)
+        image_filename, source = await image_cache.get_or_create(
+            cache_key,
+            lambda: _render_image_file(image_prompt),
+            use_cache=use_cache
         )
-        
-        # gpt-image-1 returns base64 data, save as file and return URL
-        image_base64 = response.data[0].b64_json
-        
-        # Generate unique filename
-        image_filename = f"generated_{uuid.uuid4().hex[:8]}_{int(datetime.now().timestamp())}.png"
-        image_path = os.path.join(IMAGES_DIR, image_filename)
-        
-        # Save base64 image to file
-        image_bytes = base64.b64decode(image_base64)
-        with open(image_path, 'wb') as f:
-            f.write(image_bytes)
+        if source == 'miss':
+            image_store.add(image_filename)
+        else:
+            image_store.touch([image_filename])
         
         # Return URL that can be served by Flask
         image_url = f"/static/generated_images/{image_filename}"
@@ -419,39 +1936,65 @@ def generate_single_image(slide_title, slide_content, custom_prompt=None):
             'image_url': image_url,
             'caption': caption,
             'prompt_used': image_prompt,
+            'cached': source != 'miss',
             'success': True
         }
         
     except Exception as e:
-        print(f"Image generation error: {str(e)}")
+        print(f"Image generation error: {str(e) or type(e).__name__}")
         return {
-            'error': str(e),
+            'error': str(e) or type(e).__name__,
             'success': False
         }
 
-@app.route('/generate_image', methods=['POST'])
+def generate_single_image(slide_title, slide_content, custom_prompt=None, use_cache=True):
+    """Blocking wrapper around agenerate_single_image"""
+    return openai_engine.run(agenerate_single_image, slide_title, slide_content, custom_prompt, use_cache)
+
+@bp.route('/generate_image', methods=['POST'])
 def generate_image():
-    """Generate an image for a slide using OpenAI gpt-image-1"""
+    """Generate an image for a slide using OpenAI gpt-image-1.
+    
+    With deck_id and slide_index, the slide's stored title, content and
+    prompt are used and the image is saved back onto the slide.
+    """
     data = request.json
+    deck_id = data.get('deck_id')
+    slide_index = data.get('slide_index')
+    if deck_id:
+        deck = deck_store.get(deck_id)
+        if deck is None:
+            return jsonify({'error': f"Deck not found: {deck_id}"}), 404
+        if not isinstance(slide_index, int) or not 0 <= slide_index < len(deck['slides']):
+            return jsonify({'error': 'slide_index must name a slide of the deck'}), 400
+        slide = deck['slides'][slide_index]
+        data.setdefault('title', slide.get('title', ''))
+        data.setdefault('content', slide.get('content', ''))
+        data.setdefault('custom_prompt', slide.get('suggested_image_prompt'))
     slide_title = data.get('title', '')
     slide_content = data.get('content', '')
     custom_prompt = data.get('custom_prompt', None)
+    use_cache = not data.get('no_cache', False)
     
     if not slide_title:
         return jsonify({'error': 'Slide title is required'}), 400
     
-    result = generate_single_image(slide_title, slide_content, custom_prompt)
+    result = generate_single_image(slide_title, slide_content, custom_prompt, use_cache)
     
     if result['success']:
-        return jsonify({
+        response = {
             'image_url': result['image_url'],
             'caption': result['caption'],
-            'prompt_used': result['prompt_used']
-        })
+            'prompt_used': result['prompt_used'],
+            'cached': result['cached']
+        }
+        if deck_id:
+            response.update(_slides_reply(deck_id, None, {slide_index: _image_result_patch(result)}))
+        return jsonify(response)
     else:
         return jsonify({'error': result['error']}), 500
 
-@app.route('/generate_image_prompt', methods=['POST'])
+@bp.route('/generate_image_prompt', methods=['POST'])
 def generate_image_prompt():
     """Generate a simple image prompt for a slide"""
     data = request.json
@@ -465,45 +2008,72 @@ def generate_image_prompt():
     
     return jsonify({'prompt': prompt})
 
-@app.route('/generate_images_bulk', methods=['POST'])
+def iter_bulk_image_results(slides, max_workers=None, use_cache=True):
+    """Generate images for slides without one, yielding (slide_index, result) as each finishes"""
+    # The engine's adaptive limit paces the API calls; max_workers can still cap this request's share
+    limiter = asyncio.Semaphore(max_workers) if max_workers else None
+    future_to_index = {}
+    try:
+        for i, slide in enumerate(slides):
+            if not slide.get('generated_image'):  # Only generate if no image exists
+                # Use the suggested prompt if available, otherwise generate
+                custom_prompt = slide.get('suggested_image_prompt', None)
+                future = openai_engine.submit(
+                    agenerate_single_image, slide.get('title', ''), slide.get('content', ''), custom_prompt, use_cache,
+                    limiter=limiter
+                )
+                future_to_index[future] = i
+        
+        for future in concurrent.futures.as_completed(future_to_index):
+            yield future_to_index[future], future.result()
+    finally:
+        # Stop queued work if the consumer goes away (e.g. a streaming client disconnects)
+        for future in future_to_index:
+            future.cancel()
+
+def _image_result_patch(result):
+    """The slide fields a generate_single_image result changes"""
+    if result['success']:
+        return {'generated_image': result['image_url'], 'image_caption': result['caption'], 'image_error': None}
+    return {'image_error': result['error']}
+
+@bp.route('/generate_images_bulk', methods=['POST'])
 def generate_images_bulk():
     """Generate images for multiple slides concurrently using gpt-image-1"""
     data = request.json
+    try:
+        deck_id = _load_deck_into(data)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     slides = data.get('slides', [])
     
     if not slides:
         return jsonify({'error': 'Slides are required'}), 400
     
-    try:
-        # Use ThreadPoolExecutor for concurrent image generation
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            # Submit all image generation tasks
-            future_to_index = {}
-            for i, slide in enumerate(slides):
-                if not slide.get('generated_image'):  # Only generate if no image exists
-                    # Use the suggested prompt if available, otherwise generate
-                    custom_prompt = slide.get('suggested_image_prompt', None)
-                    future = executor.submit(generate_single_image, slide.get('title', ''), slide.get('content', ''), custom_prompt)
-                    future_to_index[future] = i
-            
-            # Collect results as they complete
-            results = {}
-            for future in concurrent.futures.as_completed(future_to_index):
-                slide_index = future_to_index[future]
-                result = future.result()
-                results[slide_index] = result
+    use_cache = not data.get('no_cache', False)
+    
+    if data.get('stream'):
+        return Response(
+            stream_with_context(_stream_bulk_images(slides, use_cache, deck_id)),
+            mimetype='application/x-ndjson',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
+    try:
+        results = {}
+        for slide_index, result in iter_bulk_image_results(slides, use_cache=use_cache):
+            results[slide_index] = result
         
         # Update slides with generated images
+        patches = {}
         for slide_index, result in results.items():
-            if result['success']:
-                slides[slide_index]['generated_image'] = result['image_url']
-                slides[slide_index]['image_caption'] = result['caption']
-            else:
-                slides[slide_index]['image_error'] = result['error']
+            patches[slide_index] = _image_result_patch(result)
+            _merge_slide_patch(slides[slide_index], patches[slide_index])
+            if not result['success']:
                 print(f"Slide {slide_index} error: {result['error']}")
         
         return jsonify({
-            'slides': slides,
+            **_slides_reply(deck_id, slides, patches),
             'generated_count': len([r for r in results.values() if r['success']]),
             'error_count': len([r for r in results.values() if not r['success']])
         })
@@ -511,6 +2081,235 @@ def generate_images_bulk():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _stream_bulk_images(slides, use_cache=True, deck_id=None):
+    """Yield NDJSON events for a streaming bulk image run: start, one per finished slide, done.
+    
+    With a deck, each image is saved onto its stored slide as it arrives.
+    """
+    total = len([slide for slide in slides if not slide.get('generated_image')])
+    yield json.dumps({'event': 'start', 'total': total}) + '\n'
+    
+    generated_count = 0
+    error_count = 0
+    try:
+        for slide_index, result in iter_bulk_image_results(slides, use_cache=use_cache):
+            event = {'event': 'image', 'index': slide_index, 'success': result['success']}
+            if result['success']:
+                generated_count += 1
+                event.update({'image_url': result['image_url'], 'caption': result['caption']})
+            else:
+                error_count += 1
+                event['error'] = result['error']
+                print(f"Slide {slide_index} error: {result['error']}")
+            if deck_id:
+                event['version'] = deck_store.patch_slides(deck_id, {slide_index: _image_result_patch(result)})[0]
+            yield json.dumps(event) + '\n'
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        yield json.dumps({'event': 'error', 'error': str(e)}) + '\n'
+    
+    yield json.dumps({'event': 'done', 'generated_count': generated_count, 'error_count': error_count}) + '\n'
+
+async def arun_slide_pipeline(index, slide, topic, limiters, use_cache, emit):
+    """Take one slide through content, image prompt and image, emitting (index, stage, result) per stage.
+    
+    Each stage starts as soon as the slide's previous stage finishes and holds
+    that stage's limiter, so slow images never hold up other slides' content.
+    A slide whose content fails skips its prompt and image.
+    """
+    content = slide.get('content', '')
+    content_generated = False
+    if slide['type'] == 'content' and not slide.get('content_generated', False):
+        try:
+            async with limiters['content']:
+                content = await agenerate_slide_content(slide['title'], topic, CONTENT_SLIDE_TIMEOUT, use_cache)
+            content_generated = True
+            emit(index, 'content', {'content': content, 'success': True})
+        except Exception as e:
+            emit(index, 'content', {'error': str(e) or type(e).__name__, 'success': False})
+            return
+    
+    if slide.get('generated_image'):
+        return
+    
+    image_prompt = slide.get('suggested_image_prompt')
+    if not image_prompt or content_generated:
+        async with limiters['prompt']:
+            image_prompt = await agenerate_simple_image_prompt(slide['title'], content)
+        emit(index, 'prompt', {'prompt': image_prompt, 'success': True})
+    
+    async with limiters['image']:
+        result = await agenerate_single_image(slide['title'], content, image_prompt, use_cache)
+    emit(index, 'image', result)
+
+def iter_pipeline_results(slides, topic, concurrency=None, use_cache=True):
+    """Run every slide's pipeline on the engine, yielding (slide_index, stage, result) as stages finish"""
+    concurrency = concurrency or {}
+    limiters = {
+        'content': asyncio.Semaphore(concurrency.get('content', PIPELINE_CONTENT_CONCURRENCY)),
+        'prompt': asyncio.Semaphore(concurrency.get('prompt', PIPELINE_PROMPT_CONCURRENCY)),
+        'image': asyncio.Semaphore(concurrency.get('image', PIPELINE_IMAGE_CONCURRENCY))
+    }
+    events = queue.Queue()
+    emit = lambda index, stage, result: events.put((index, stage, result))
+    futures = []
+    try:
+        for i, slide in enumerate(slides):
+            future = openai_engine.submit(arun_slide_pipeline, i, slide, topic, limiters, use_cache, emit)
+            # A finished slide posts its future after its last stage event
+            future.add_done_callback(lambda future: events.put((None, None, future)))
+            futures.append(future)
+        
+        remaining = len(futures)
+        while remaining:
+            index, stage, result = events.get()
+            if stage is None:
+                remaining -= 1
+                result.result()  # surface unexpected errors
+            else:
+                yield index, stage, result
+    finally:
+        # Stop queued work if the consumer goes away (e.g. a streaming client disconnects)
+        for future in futures:
+            future.cancel()
+
+def _pipeline_result_patch(stage, result):
+    """The slide fields a pipeline stage result changes"""
+    if stage == 'content':
+        return _content_result_patch(result)
+    if stage == 'prompt':
+        return {'suggested_image_prompt': result['prompt']}
+    return _image_result_patch(result)
+
+def _pipeline_concurrency(value):
+    """Clamp client-requested per-stage limits to the server caps"""
+    caps = {'content': PIPELINE_CONTENT_CONCURRENCY, 'prompt': PIPELINE_PROMPT_CONCURRENCY,
+            'image': PIPELINE_IMAGE_CONCURRENCY}
+    value = value or {}
+    return {stage: max(1, min(int(value.get(stage, cap)), cap)) for stage, cap in caps.items()}
+
+@bp.route('/generate_pipeline', methods=['POST'])
+def generate_pipeline():
+    """Generate content, image prompts and images in one streamed run.
+    
+    Each slide moves to its next stage as soon as its previous one finishes,
+    so the run takes about as long as the slowest slide instead of the sum of
+    three whole-deck stages. Streams NDJSON: start, one content/prompt/image
+    event per finished stage, done. With a deck_id, every stage's result is
+    saved onto the stored slide as it arrives.
+    """
+    data = request.json
+    try:
+        deck_id = _load_deck_into(data)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    slides = data.get('slides', [])
+    topic = data.get('topic', '')
+    use_cache = not data.get('no_cache', False)
+    
+    if not slides:
+        return jsonify({'error': 'Slides are required'}), 400
+    
+    try:
+        concurrency = _pipeline_concurrency(data.get('concurrency'))
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({'error': 'concurrency must map content/prompt/image to integers'}), 400
+    
+    def generate():
+        start = time.perf_counter()
+        counts = {'content': 0, 'prompt': 0, 'image': 0, 'error': 0}
+        yield json.dumps({'event': 'start', 'total': len(slides), 'concurrency': concurrency}) + '\n'
+        try:
+            for slide_index, stage, result in iter_pipeline_results(slides, topic, concurrency, use_cache):
+                event = {'event': stage, 'index': slide_index, 'success': result['success']}
+                if result['success']:
+                    counts[stage] += 1
+                    if stage == 'content':
+                        event['content'] = result['content']
+                    elif stage == 'prompt':
+                        event['prompt'] = result['prompt']
+                    else:
+                        event.update({'image_url': result['image_url'], 'caption': result['caption']})
+                else:
+                    counts['error'] += 1
+                    event['error'] = result['error']
+                    print(f"Slide {slide_index} {stage} error: {result['error']}")
+                if deck_id:
+                    patch = _pipeline_result_patch(stage, result)
+                    event['version'] = deck_store.patch_slides(deck_id, {slide_index: patch})[0]
+                yield json.dumps(event) + '\n'
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            yield json.dumps({'event': 'error', 'error': str(e)}) + '\n'
+        
+        yield json.dumps({
+            'event': 'done',
+            'content_count': counts['content'],
+            'prompt_count': counts['prompt'],
+            'image_count': counts['image'],
+            'error_count': counts['error'],
+            'elapsed_seconds': round(time.perf_counter() - start, 3)
+        }) + '\n'
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@bp.route('/image_cache/stats')
+def image_cache_stats():
+    """Report generated-image cache hit and miss counts"""
+    return jsonify(image_cache.stats())
+
+@bp.route('/image_store/stats')
+def image_store_stats():
+    """Report generated-image disk usage and eviction counts"""
+    return jsonify(image_store.stats())
+
+@bp.route('/openai_engine/stats')
+def openai_engine_stats():
+    """Report the shared OpenAI engine's adaptive limit, retries, rejections and breaker state"""
+    return jsonify(openai_engine.stats())
+
+@bp.route('/base_templates', methods=['GET'])
+def list_base_templates():
+    """List base templates exports can start from, with parse-cache counts"""
+    return jsonify(base_templates.stats())
+
+@bp.route('/base_templates/<name>', methods=['PUT'])
+def register_base_template(name):
+    """Register a .pptx (multipart 'file' or the raw request body) as a named base template"""
+    upload = request.files.get('file')
+    data = upload.read() if upload else request.get_data()
+    if not data:
+        return jsonify({'error': 'A .pptx file is required'}), 400
+    try:
+        return jsonify(base_templates.register(name, data))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/base_templates/<name>', methods=['DELETE'])
+def delete_base_template(name):
+    """Delete a registered base template"""
+    try:
+        deleted = base_templates.delete(name)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not deleted:
+        return jsonify({'error': 'Base template not found'}), 404
+    return '', 204
+
+@bp.route('/render_cache/stats')
+def render_cache_stats():
+    """Report rendered-slide cache hit and miss counts"""
+    return jsonify(slide_render_cache.stats())
+
+@bp.route('/llm_cache/stats')
+def llm_cache_stats():
+    """Report chat completion cache hit and miss counts"""
+    return jsonify(chat_cache.stats())
+
 def _add_image_placeholder(slide, element):
     """Helper function to add image placeholder rectangle"""
     rectangle = slide.shapes.add_shape(
@@ -547,10 +2346,1106 @@ def _add_image_placeholder(slide, element):
                 font.size = Pt(14)
                 font.color.rgb = RGBColor(128, 128, 128)  # Gray text
 
-@app.route('/create_presentation', methods=['POST'])
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def get_process_pool():
+    """Return the shared process pool for CPU-bound export work, creating it on first use"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn keeps workers independent of the server's threads and open sockets
+            _process_pool = ProcessPoolExecutor(
+                max_workers=EXPORT_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=warm_up,
+                initargs=(('pptx',),)  # export workers never call OpenAI
+            )
+        return _process_pool
+
+def _replace_process_pool(broken):
+    """Drop a broken pool so the next get_process_pool() builds a fresh one, unless another thread already did"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not broken:
+            return
+        _process_pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def submit_to_process_pool(fn, *args):
+    """Submit fn(*args) to the shared process pool, replacing the pool once if a dead worker has broken it"""
+    pool = get_process_pool()
+    try:
+        return pool.submit(fn, *args)
+    except BrokenProcessPool:
+        print("Process pool is broken; starting a new one")
+        _replace_process_pool(pool)
+        return get_process_pool().submit(fn, *args)
+
+def iter_process_pool_results(futures, jobs):
+    """Yield (key, future) as each of futures ({future: key}) finishes; jobs[key] is (fn, *args).
+    
+    A job whose pool broke under it runs once more on a fresh pool. Retries are
+    added to futures, so a caller cancelling futures cancels them too.
+    """
+    retries = {}
+    for future in concurrent.futures.as_completed(list(futures)):
+        key = futures[future]
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            try:
+                retry = submit_to_process_pool(*jobs[key])
+            except Exception as e:
+                print(f"Error resubmitting process pool job: {str(e)}")
+            else:
+                retries[retry] = futures[retry] = key
+                continue
+        yield key, future
+    for future in concurrent.futures.as_completed(retries):
+        yield retries[future], future
+
+def render_image_derivative(source_path, target_path, width_px, height_px, image_format, jpeg_quality=EXPORT_JPEG_QUALITY):
+    """Resample an image to width_px x height_px and encode it as PNG, JPEG or WebP"""
+    from PIL import Image
+    
+    with Image.open(source_path) as image:
+        if (width_px, height_px) != image.size:
+            image = image.resize((width_px, height_px), Image.LANCZOS)
+        # Unique per thread too: the image route renders variants in request threads
+        tmp_path = f"{target_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if image_format == 'jpeg':
+            if image.mode in ('RGBA', 'LA', 'P'):
+                # JPEG has no alpha channel; flatten onto white like the slide background
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            image.convert('RGB').save(tmp_path, 'JPEG', quality=jpeg_quality, optimize=True, progressive=True)
+        elif image_format == 'webp':
+            image.save(tmp_path, 'WEBP', quality=IMAGE_WEBP_QUALITY, method=4)
+        else:
+            image.save(tmp_path, 'PNG', optimize=True)
+    os.replace(tmp_path, target_path)
+    return target_path
+
+def image_variant_path(filename, width=None, image_format=None):
+    """Return the path of a resized and/or re-encoded copy of a generated image.
+    
+    Variants are rendered on first request and cached in DERIVATIVES_DIR next
+    to the export derivatives, so they are removed when the image is evicted.
+    Widths snap up to IMAGE_THUMBNAIL_WIDTHS (wider requests get the full
+    size) and never upscale. Returns None if the source image doesn't exist.
+    """
+    source_path = safe_join(IMAGES_DIR, filename)
+    if source_path is None or not os.path.isfile(source_path):
+        return None
+    
+    from PIL import Image
+    with Image.open(source_path) as image:
+        source_width, source_height = image.size  # reads the header only
+    
+    if width:
+        width = next((w for w in IMAGE_THUMBNAIL_WIDTHS if w >= width), source_width)
+    width = min(width or source_width, source_width)
+    image_format = image_format or 'png'
+    if width == source_width and image_format == 'png':
+        return source_path
+    
+    height = max(1, round(source_height * width / source_width))
+    stem = os.path.splitext(filename)[0]
+    target_path = os.path.join(DERIVATIVES_DIR, f"{stem}_w{width}.{image_format}")
+    if not os.path.exists(target_path):
+        with metrics.stage('image_variant'):
+            render_image_derivative(source_path, target_path, width, height, image_format)
+    return target_path
+
+def _remove_derivatives(image_filename):
+    """Delete cached export derivatives of an image"""
+    prefix = f"{os.path.splitext(image_filename)[0]}_"
+    for entry in os.scandir(DERIVATIVES_DIR):
+        if entry.name.startswith(prefix):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+def prepare_export_images(slides_data, title_layout, content_layout, image_dpi=None, image_format=None):
+    """Produce size-matched derivatives for every placed image.
+    
+    Returns a dict mapping (image_filename, element width, element height) to
+    the file to embed. Derivatives are cached in DERIVATIVES_DIR so repeat
+    exports reuse them, and missing ones are rendered in the process pool.
+    """
+    image_dpi = float(image_dpi or EXPORT_IMAGE_DPI)
+    image_format = (image_format or EXPORT_IMAGE_FORMAT).lower()
+    if image_format == 'jpg':
+        image_format = 'jpeg'
+    if image_format not in ('png', 'jpeg'):
+        return {}
+    
+    from PIL import Image
+    
+    derived = {}
+    jobs = {}
+    source_sizes = {}
+    for slide_data in slides_data:
+        generated_image_url = slide_data.get('generated_image', '')
+        if not generated_image_url or not generated_image_url.startswith('/static/generated_images/'):
+            continue
+        image_filename = generated_image_url.replace('/static/generated_images/', '')
+        source_path = os.path.join(IMAGES_DIR, image_filename)
+        
+        layout_config = title_layout if slide_data.get('type') == 'title' else content_layout
+        for element in layout_config.get('elements', []):
+            if element['type'] != 'image':
+                continue
+            key = (image_filename, element['width'], element['height'])
+            if key in derived or key in jobs:
+                continue
+            
+            if image_filename not in source_sizes:
+                try:
+                    with Image.open(source_path) as image:
+                        source_sizes[image_filename] = image.size  # reads the header only
+                except (OSError, ValueError):
+                    source_sizes[image_filename] = None
+            source_size = source_sizes[image_filename]
+            if source_size is None:
+                continue
+            
+            # Never upsample; PowerPoint stretches the picture to the element box either way
+            width_px = max(1, min(source_size[0], round(element['width'] * image_dpi)))
+            height_px = max(1, min(source_size[1], round(element['height'] * image_dpi)))
+            if (width_px, height_px) == tuple(source_size) and image_format == 'png':
+                continue
+            
+            extension = 'jpg' if image_format == 'jpeg' else 'png'
+            stem = os.path.splitext(image_filename)[0]
+            quality_tag = f"_q{EXPORT_JPEG_QUALITY}" if image_format == 'jpeg' else ''
+            target_path = os.path.join(DERIVATIVES_DIR, f"{stem}_{width_px}x{height_px}{quality_tag}.{extension}")
+            
+            if os.path.exists(target_path):
+                derived[key] = target_path
+            else:
+                jobs[key] = (source_path, target_path, width_px, height_px, image_format)
+    
+    if not jobs:
+        return derived
+    
+    # A single resize is cheaper inline than a round trip through the pool
+    if len(jobs) == 1:
+        for key, job in jobs.items():
+            try:
+                derived[key] = render_image_derivative(*job)
+            except Exception as e:
+                print(f"Error resizing {job[0]}: {str(e)}")
+        return derived
+    
+    pool_jobs = {key: (render_image_derivative, *job) for key, job in jobs.items()}
+    futures = {submit_to_process_pool(*job): key for key, job in pool_jobs.items()}
+    for key, future in iter_process_pool_results(futures, pool_jobs):
+        try:
+            derived[key] = future.result()
+        except Exception as e:
+            # Fall back to embedding the original image
+            print(f"Error resizing {jobs[key][0]}: {str(e)}")
+    return derived
+
+# Glyph widths are measured once at this size and scaled linearly to any other
+_GLYPH_REFERENCE_SIZE = 1000
+# Widening applied to a regular face when no bold file of the family is installed
+_SYNTHETIC_BOLD_FACTOR = 1.07
+# python-pptx textboxes keep PowerPoint's default insets: 0.1" left/right, 0.05" top/bottom (in EMU)
+_TEXT_INSET_X = 91440
+_TEXT_INSET_Y = 45720
+
+@functools.lru_cache(maxsize=None)
+def _font_files():
+    """Index installed .ttf/.otf files by lower-cased alphanumeric file stem"""
+    files = {}
+    for font_dir in TEXT_FIT_FONT_DIRS:
+        for root, _, names in os.walk(font_dir):
+            for name in names:
+                stem, ext = os.path.splitext(name)
+                if ext.lower() in ('.ttf', '.otf'):
+                    files.setdefault(re.sub(r'[^a-z0-9]', '', stem.lower()), os.path.join(root, name))
+    return files
+
+class _GlyphTable:
+    """Advance widths of one font face at the reference size, each character measured once"""
+    
+    def __init__(self, font, factor=1.0):
+        self._font = font
+        self._factor = factor
+        self._widths = {}
+        self._lock = threading.Lock()
+    
+    def width(self, text):
+        widths = self._widths
+        total = 0.0
+        for char in text:
+            char_width = widths.get(char)
+            if char_width is None:
+                with self._lock:
+                    char_width = widths[char] = self._font.getlength(char) * self._factor
+            total += char_width
+        return total
+
+@functools.lru_cache(maxsize=None)
+def _glyph_table(font_name, bold):
+    """Return the cached glyph width table for a font family and weight"""
+    from PIL import ImageFont
+    family = re.sub(r'[^a-z0-9]', '', (font_name or '').lower())
+    files = _font_files()
+    stems = [family + suffix for suffix in ('bold', 'bd', 'b')] if bold else []
+    stems += [family, family + 'regular']
+    for stem in stems:
+        if stem in files:
+            factor = _SYNTHETIC_BOLD_FACTOR if bold and not stem.endswith(('bold', 'bd', 'b')) else 1.0
+            return _GlyphTable(ImageFont.truetype(files[stem], _GLYPH_REFERENCE_SIZE), factor)
+    return _GlyphTable(ImageFont.load_default(size=_GLYPH_REFERENCE_SIZE), _SYNTHETIC_BOLD_FACTOR if bold else 1.0)
+
+@functools.lru_cache(maxsize=TEXT_FIT_CACHE_SIZE)
+def _wrapped_line_count(font_name, bold, line, max_width):
+    """Count the lines a word-wrapped line of text takes in a box max_width reference units wide"""
+    if max_width <= 0:
+        return math.inf
+    table = _glyph_table(font_name, bold)
+    space = table.width(' ')
+    lines = 1
+    current = None  # width of the line being filled; None until a word is placed
+    for word in line.split(' '):
+        width = table.width(word)
+        if current is not None and current + space + width <= max_width:
+            current += space + width
+            continue
+        if current is not None:
+            lines += 1
+        # A word wider than the box is broken across lines
+        extra = max(0, math.ceil(width / max_width) - 1)
+        lines += extra
+        current = width - extra * max_width
+    return lines
+
+def fit_font_size(paragraphs, spec):
+    """Return the largest whole point size, up to the element's own, at which paragraphs fit its box.
+    
+    Text is measured with cached glyph widths and greedy word wrapping, and
+    the size is found by binary search; a box that overflows even at
+    TEXT_FIT_MIN_SIZE gets that size.
+    """
+    max_size = int(spec['font_size'].pt)
+    min_size = min(TEXT_FIT_MIN_SIZE, max_size)
+    width = (spec['width'] - 2 * _TEXT_INSET_X) / Pt(1)
+    height = (spec['height'] - 2 * _TEXT_INSET_Y) / Pt(1)
+    lines = [line for paragraph in paragraphs for line in re.split("\n|\v", paragraph)]
+    font_name, bold = spec['font_name'], spec['bold']
+    
+    def fits(size):
+        max_width = int(width * _GLYPH_REFERENCE_SIZE / size)
+        line_count = sum(_wrapped_line_count(font_name, bold, line, max_width) for line in lines)
+        return line_count * size * TEXT_FIT_LINE_SPACING <= height
+    
+    if fits(max_size):
+        return spec['font_size']
+    low, high = min_size, max_size - 1
+    while low < high:
+        mid = (low + high + 1) // 2
+        if fits(mid):
+            low = mid
+        else:
+            high = mid - 1
+    return Pt(low)
+
+def _font_size_for(spec, paragraphs):
+    """The element's font size, shrunk to fit when the layout was compiled with text fit"""
+    return fit_font_size(paragraphs, spec) if spec.get('fit') else spec['font_size']
+
+def _add_text_frame(slide, spec):
+    """Add a word-wrapped, fixed-size textbox at a compiled element's geometry"""
+    textbox = slide.shapes.add_textbox(spec['left'], spec['top'], spec['width'], spec['height'])
+    text_frame = textbox.text_frame
+    text_frame.clear()  # Clear default content
+    
+    # Configure text frame properties
+    text_frame.word_wrap = True
+    # Don't use auto-sizing to preserve exact font sizes
+    text_frame.auto_size = MSO_AUTO_SIZE.NONE
+    return text_frame
+
+def _write_paragraph(p, text, spec, font_size=None):
+    """Set a paragraph's text and apply the element's font to every run"""
+    p.text = text
+    if spec['alignment'] is not None:
+        p.alignment = spec['alignment']
+    for run in p.runs:
+        font = run.font
+        font.name = spec['font_name']
+        font.size = font_size or spec['font_size']
+        if spec['bold']:
+            font.bold = True
+
+def _render_title(slide, spec, slide_data, export_images):
+    # For title elements, always use the slide title
+    text_frame = _add_text_frame(slide, spec)
+    _write_paragraph(text_frame.paragraphs[0], slide_data['title'], spec,
+                     _font_size_for(spec, [slide_data['title']]))
+
+def _render_subtitle(slide, spec, slide_data, export_images):
+    # For title slides, textbox shows subtitle/description
+    text = slide_data.get('content', '') or ""
+    text_frame = _add_text_frame(slide, spec)
+    _write_paragraph(text_frame.paragraphs[0], text, spec, _font_size_for(spec, [text]))
+
+def _render_text(slide, spec, slide_data, export_images):
+    # Plain text without bullets
+    text = slide_data.get('content', '')
+    text_frame = _add_text_frame(slide, spec)
+    _write_paragraph(text_frame.paragraphs[0], text, spec, _font_size_for(spec, [text]))
+
+def _render_bullets(slide, spec, slide_data, export_images):
+    content_text = slide_data.get('content', '')
+    bullet_points = parse_bullet_points(content_text)
+    text_frame = _add_text_frame(slide, spec)
+    
+    if not bullet_points:
+        # No bullet points, just add the text
+        _write_paragraph(text_frame.paragraphs[0], content_text, spec, _font_size_for(spec, [content_text]))
+        return
+    
+    # Add bullet character manually for blank layouts
+    paragraphs = [f"• {bullet_text.strip()}" for bullet_text in bullet_points]
+    font_size = _font_size_for(spec, paragraphs)
+    
+    # Add bullet points - each line becomes a bullet
+    for i, text in enumerate(paragraphs):
+        p = text_frame.paragraphs[0] if i == 0 else text_frame.add_paragraph()
+        _write_paragraph(p, text, spec, font_size)
+        p.level = 0  # First level bullet
+
+def _image_source(spec, slide_data, export_images):
+    """Return (filename, path) of the image a slide places in an image element, or None"""
+    # Check if the slide has a generated image
+    generated_image_url = slide_data.get('generated_image', '')
+    if not generated_image_url or not generated_image_url.startswith('/static/generated_images/'):
+        return None
+    
+    # Extract filename from URL; prefer the downsampled derivative sized for this element
+    image_filename = generated_image_url.replace('/static/generated_images/', '')
+    return image_filename, export_images.get(
+        (image_filename,) + spec['size_key'],
+        os.path.join(IMAGES_DIR, image_filename)
+    )
+
+def _resolve_image_path(spec, slide_data, export_images):
+    """Return (filename, path) of the image to embed for a slide, or None to use a placeholder"""
+    source = _image_source(spec, slide_data, export_images)
+    if source is None:
+        return None
+    image_filename, image_path = source
+    
+    if not os.path.exists(image_path):
+        print(f"Image file not found: {image_path}")
+        return None
+    return image_filename, image_path
+
+def _render_image(slide, spec, slide_data, export_images):
+    resolved = _resolve_image_path(spec, slide_data, export_images)
+    if resolved is None:
+        # Add placeholder if there is no generated image or its file is missing
+        _add_image_placeholder(slide, spec['element'])
+        return
+    image_filename, image_path = resolved
+    
+    try:
+        # Add the actual generated image
+        slide.shapes.add_picture(image_path, spec['left'], spec['top'], spec['width'], spec['height'])
+    except Exception as e:
+        print(f"Error adding image {image_filename}: {str(e)}")
+        # Fall back to placeholder if image loading fails
+        _add_image_placeholder(slide, spec['element'])
+
+def compile_layout(layout_config, slide_type, text_fit=False):
+    """Compile a designer layout into a render plan for slides of the given type.
+    
+    Each step is a (handler, spec) pair with EMU geometry, font settings and
+    the element-type/list-type branch resolved once, so building a slide only
+    replays the plan. With text_fit, text steps shrink their font to fit.
+    """
+    plan = []
+    for element in layout_config.get('elements', []):
+        spec = {
+            'left': Inches(element['left']),
+            'top': Inches(element['top']),
+            'width': Inches(element['width']),
+            'height': Inches(element['height']),
+            'font_name': element.get('font_name', 'Calibri'),
+            'alignment': None,
+            'bold': False,
+            'fit': text_fit
+        }
+        
+        if element['type'] == 'title':
+            handler = _render_title
+            spec.update(font_size=Pt(element.get('font_size', 28)), alignment=PP_ALIGN.CENTER, bold=True)
+        elif element['type'] == 'textbox':
+            spec['font_size'] = Pt(element.get('font_size', 18))
+            if slide_type == 'title':
+                handler = _render_subtitle
+                spec['alignment'] = PP_ALIGN.CENTER
+            elif element.get('list_type', 'none') == 'bullet':
+                handler = _render_bullets
+            else:
+                handler = _render_text
+        elif element['type'] == 'image':
+            handler = _render_image
+            spec.update(element=element, size_key=(element['width'], element['height']))
+        else:
+            continue
+        
+        plan.append((handler, spec))
+    return plan
+
+# Sample data used to prerender each handler's shape for the clone engine
+_PROTOTYPE_SLIDE = {'title': 'X', 'content': 'X', 'type': 'content'}
+_TEXT_SOURCES = {
+    _render_title: lambda slide_data: slide_data['title'],
+    _render_subtitle: lambda slide_data: slide_data.get('content', '') or "",
+    _render_text: lambda slide_data: slide_data.get('content', '')
+}
+_CONTROL_CHARS = re.compile(r"([\x00-\x08\x0B-\x1F])")
+
+def _prerender_shape(scratch, render, shape_index):
+    """Run a render callable on a new slide of a scratch base and return the shape element it adds.
+    
+    scratch is a (Presentation, blank layout) copy of the export's base
+    template, so the slide starts with the same cloned placeholders as the
+    export's slides. The shape's id and name are renumbered for its position
+    in the plan, matching what python-pptx assigns when shapes are added in
+    order after those placeholders.
+    """
+    pres, blank_layout = scratch
+    slide = pres.slides.add_slide(blank_layout)
+    first_id = slide.shapes._next_shape_id
+    render(slide)
+    shape = copy.deepcopy(list(slide.shapes._spTree.iter_shape_elms())[-1])
+    c_nv_pr = shape.xpath('./*[1]/p:cNvPr')[0]
+    c_nv_pr.set('id', str(first_id + shape_index))
+    c_nv_pr.set('name', f"{c_nv_pr.get('name').rsplit(' ', 1)[0]} {first_id + shape_index - 1}")
+    return shape
+
+def _paragraph_template(paragraph):
+    """Split a prerendered paragraph into an empty copy and its first run"""
+    paragraph = copy.deepcopy(paragraph)
+    runs = paragraph.findall(qn('a:r'))
+    for child in runs + paragraph.findall(qn('a:br')):
+        paragraph.remove(child)
+    return paragraph, runs[0]
+
+def _fill_paragraph(template, text):
+    """Copy a paragraph template and add runs/line breaks the way python-pptx's p.text setter does"""
+    paragraph_template, run_template = template
+    paragraph = copy.deepcopy(paragraph_template)
+    end = paragraph.find(qn('a:endParaRPr'))
+    for i, segment in enumerate(re.split("\n|\v", text)):
+        pieces = [OxmlElement('a:br')] if i > 0 else []
+        if segment:
+            run = copy.deepcopy(run_template)
+            run.find(qn('a:t')).text = _CONTROL_CHARS.sub(lambda m: "_x%04X_" % ord(m.group(1)), segment)
+            pieces.append(run)
+        for piece in pieces:
+            if end is None:
+                paragraph.append(piece)
+            else:
+                end.addprevious(piece)
+    return paragraph
+
+def compile_clone_plan(plan, base_template=None):
+    """Prerender a compiled layout plan into XML templates for the clone engine, on the given base template"""
+    scratch = base_templates.new(base_template)
+    clone_plan = []
+    for shape_index, (handler, spec) in enumerate(plan):
+        def render_step(slide_data, handler=handler, spec=spec):
+            return lambda slide: handler(slide, spec, slide_data, {})
+        
+        if handler is _render_image:
+            # A 1x1 PNG stands in for the image; each slide swaps in its own image part
+            from PIL import Image
+            pixel = io.BytesIO()
+            Image.new('RGB', (1, 1)).save(pixel, format='PNG')
+            clone_plan.append(('image', spec, {
+                'placeholder': _prerender_shape(scratch, render_step(_PROTOTYPE_SLIDE), shape_index),
+                'picture': _prerender_shape(
+                    scratch,
+                    lambda slide: slide.shapes.add_picture(
+                        pixel, spec['left'], spec['top'], spec['width'], spec['height']
+                    ),
+                    shape_index
+                )
+            }))
+        elif handler is _render_bullets:
+            shape = _prerender_shape(scratch, render_step(dict(_PROTOTYPE_SLIDE, content='X\nX')), shape_index)
+            # Content with no bullet lines falls back to a single plain paragraph
+            plain = _prerender_shape(scratch, render_step(dict(_PROTOTYPE_SLIDE, content='Slide X')), shape_index)
+            paragraphs = shape.findall(f"./{qn('p:txBody')}/{qn('a:p')}")
+            for paragraph in paragraphs:
+                paragraph.getparent().remove(paragraph)
+            clone_plan.append(('bullets', spec, {
+                'shape': shape,
+                'first': _paragraph_template(paragraphs[0]),
+                'rest': _paragraph_template(paragraphs[1]),
+                'plain': _paragraph_template(plain.find(f"./{qn('p:txBody')}/{qn('a:p')}"))
+            }))
+        else:
+            shape = _prerender_shape(scratch, render_step(_PROTOTYPE_SLIDE), shape_index)
+            paragraph = shape.find(f"./{qn('p:txBody')}/{qn('a:p')}")
+            template = _paragraph_template(paragraph)
+            paragraph.getparent().remove(paragraph)
+            clone_plan.append(('text', spec, {
+                'shape': shape,
+                'paragraph': template,
+                'source': _TEXT_SOURCES[handler]
+            }))
+    return clone_plan
+
+def _add_blank_slide(pres, layout, next_slide_id):
+    """Append a slide without python-pptx's per-slide scans of existing relationships and ids"""
+    pres_part = pres.part
+    partname = PackURI('/ppt/slides/slide%d.xml' % (len(pres.slides._sldIdLst) + 1))
+    slide_part = SlidePart.new(partname, pres_part.package, layout.part)
+    rId = pres_part.rels._add_relationship(RT.SLIDE, slide_part)
+    pres.slides._sldIdLst._add_sldId(id=next_slide_id, rId=rId)
+    slide = slide_part.slide
+    slide.shapes.clone_layout_placeholders(layout)
+    return slide
+
+def _fit_runs(paragraphs, spec):
+    """Apply a text-fit font size to filled clone paragraphs, as font.size does for each run"""
+    font_size = _font_size_for(spec, [text for _, text in paragraphs])
+    if font_size != spec['font_size']:
+        for paragraph, _ in paragraphs:
+            for r_pr in paragraph.iter(qn('a:rPr')):
+                r_pr.set('sz', str(font_size.centipoints))
+    return [paragraph for paragraph, _ in paragraphs]
+
+def _clone_slide_shapes(slide, clone_plan, slide_data, export_images, deck_media):
+    """Fill a blank slide by copying a clone plan's prerendered shapes"""
+    sp_tree = slide.shapes._spTree
+    for kind, spec, parts in clone_plan:
+        if kind == 'text':
+            shape = copy.deepcopy(parts['shape'])
+            text = parts['source'](slide_data)
+            shape.find(qn('p:txBody')).extend(_fit_runs([(_fill_paragraph(parts['paragraph'], text), text)], spec))
+        elif kind == 'bullets':
+            shape = copy.deepcopy(parts['shape'])
+            content_text = slide_data.get('content', '')
+            bullet_points = parse_bullet_points(content_text)
+            if not bullet_points:
+                paragraphs = [(_fill_paragraph(parts['plain'], content_text), content_text)]
+            else:
+                texts = [f"• {bullet_text.strip()}" for bullet_text in bullet_points]
+                paragraphs = [
+                    (_fill_paragraph(parts['first'] if i == 0 else parts['rest'], text), text)
+                    for i, text in enumerate(texts)
+                ]
+            shape.find(qn('p:txBody')).extend(_fit_runs(paragraphs, spec))
+        else:
+            shape = copy.deepcopy(parts['placeholder'])
+            resolved = _resolve_image_path(spec, slide_data, export_images)
+            if resolved is not None:
+                image_filename, image_path = resolved
+                try:
+                    image_part = deck_media.part_for(image_path)
+                    rId = slide.part.relate_to(image_part, RT.IMAGE)
+                    shape = copy.deepcopy(parts['picture'])
+                    shape.xpath('./p:nvPicPr/p:cNvPr')[0].set('descr', image_part.desc)
+                    shape.xpath('./p:blipFill/a:blip')[0].set(qn('r:embed'), rId)
+                except Exception as e:
+                    print(f"Error adding image {image_filename}: {str(e)}")
+        sp_tree.append(shape)
+
+class SlideRenderCache:
+    """LRU cache of rendered slides and the image data they embed.
+    
+    A slide entry holds the slide's serialized XML and its relationships,
+    keyed on everything that affects the output: the slide's type, title and
+    content, its layout, and the image files it embeds (by path, size and
+    mtime). A hit is loaded straight into a new slide part instead of being
+    rendered again, so re-exporting after an edit only renders edited slides.
+    """
+    
+    def __init__(self, max_slides, max_media_bytes):
+        self.max_slides = max_slides
+        self.max_media_bytes = max_media_bytes
+        self._lock = threading.Lock()
+        self._slides = OrderedDict()
+        self._media = OrderedDict()
+        self._media_bytes = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def layout_key(layout_config, slide_type, render_engine, text_fit, base_key=None):
+        """base_key identifies the base template (BaseTemplates.identity), whose blank layout slides build on"""
+        payload = json.dumps([layout_config, slide_type, render_engine, text_fit, base_key],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def slide_key(layout_key, slide_data, image_paths):
+        images = []
+        for path in image_paths:
+            try:
+                stat = os.stat(path)
+                images.append([path, stat.st_size, stat.st_mtime_ns])
+            except (OSError, TypeError):
+                images.append([path, None, None])
+        fields = [slide_data.get('type'), slide_data.get('title'), slide_data.get('content')]
+        payload = json.dumps([layout_key, fields, images], default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._slides.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._slides.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def put(self, key, entry):
+        with self._lock:
+            self._slides[key] = entry
+            self._slides.move_to_end(key)
+            while len(self._slides) > self.max_slides:
+                self._slides.popitem(last=False)
+    
+    def image(self, path):
+        """Return a python-pptx Image for path, reading and hashing the file only on first use"""
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            image = self._media.get(key)
+            if image is not None:
+                self._media.move_to_end(key)
+                return image
+        
+        image = PptxImage.from_file(path)
+        image.sha1  # computed once here rather than on every deck that embeds it
+        if stat.st_size <= self.max_media_bytes:
+            with self._lock:
+                if key not in self._media:
+                    self._media[key] = image
+                    self._media_bytes += len(image.blob)
+                while self._media_bytes > self.max_media_bytes:
+                    _, evicted = self._media.popitem(last=False)
+                    self._media_bytes -= len(evicted.blob)
+        return image
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'slides': len(self._slides),
+                'media_files': len(self._media),
+                'media_bytes': self._media_bytes
+            }
+
+slide_render_cache = SlideRenderCache(RENDER_CACHE_MAX_SLIDES, RENDER_CACHE_MAX_MEDIA_BYTES)
+
+class _DeckMedia:
+    """Image parts of one deck being rendered, deduplicated by SHA1.
+    
+    Stands in for python-pptx's get_or_add_image_part, which scans every part
+    in the package for each image added.
+    """
+    
+    def __init__(self, package, cache):
+        self._package = package
+        self._cache = cache
+        self._parts = {}
+        self._next_idx = 1 + max([0] + [
+            part.partname.idx for part in package.iter_parts()
+            if part.partname.startswith('/ppt/media/image') and part.partname.idx is not None
+        ])
+    
+    def part_for(self, path):
+        image = self._cache.image(path)
+        part = self._parts.get(image.sha1)
+        if part is None:
+            partname = PackURI('/ppt/media/image%d.%s' % (self._next_idx, image.ext))
+            part = ImagePart(partname, image.content_type, self._package, image.blob, image.filename)
+            # Seed the part's lazy SHA1 so python-pptx's own image lookups don't rehash the blob
+            part.__dict__['sha1'] = image.sha1
+            self._parts[image.sha1] = part
+            self._next_idx += 1
+        return part
+    
+    def register(self, slide_part):
+        """Track the image parts a slide added through python-pptx so cached slides can share them"""
+        for rel in slide_part.rels.values():
+            if rel.reltype == RT.IMAGE and not rel.is_external:
+                part = rel.target_part
+                self._parts.setdefault(part.sha1, part)
+                self._next_idx = max(self._next_idx, part.partname.idx + 1)
+
+def _capture_slide(slide_part, layout_part, image_paths, cache):
+    """Return a render cache entry for a freshly rendered slide, or None if it cannot be replayed"""
+    paths_by_sha1 = {cache.image(path).sha1: path for path in image_paths if path and os.path.exists(path)}
+    rels = []
+    rel_ids = sorted(slide_part.rels, key=lambda rId: int(rId[3:]))
+    for n, rId in enumerate(rel_ids, 1):
+        rel = slide_part.rels[rId]
+        if rId != f"rId{n}" or rel.is_external:
+            return None
+        if rel.reltype == RT.SLIDE_LAYOUT and rel.target_part is layout_part:
+            rels.append((rel.reltype, None))
+        elif rel.reltype == RT.IMAGE and rel.target_part.sha1 in paths_by_sha1:
+            rels.append((rel.reltype, paths_by_sha1[rel.target_part.sha1]))
+        else:
+            return None
+    return serialize_part_xml(slide_part._element), tuple(rels)
+
+def _add_cached_slide(pres, layout, next_slide_id, entry, deck_media):
+    """Append a slide loaded from a render cache entry, relating it to this deck's layout and image parts"""
+    slide_xml, rels = entry
+    pres_part = pres.part
+    partname = PackURI('/ppt/slides/slide%d.xml' % (len(pres.slides._sldIdLst) + 1))
+    slide_part = SlidePart.load(partname, CT.PML_SLIDE, pres_part.package, slide_xml)
+    # Relating in order reproduces the cached rIds (rId1, rId2, ...)
+    for reltype, path in rels:
+        slide_part.relate_to(layout.part if path is None else deck_media.part_for(path), reltype)
+    rId = pres_part.rels._add_relationship(RT.SLIDE, slide_part)
+    pres.slides._sldIdLst._add_sldId(id=next_slide_id, rId=rId)
+
+def _template_plan(pres):
+    """Everything needed to copy a parsed Presentation, gathered once: its parts, relationships and blank layout"""
+    from pptx.opc.package import XmlPart
+    
+    package = pres.part.package
+    source_parts = list(package.iter_parts())
+    parts = [
+        (type(part), part.partname, part.content_type,
+         part._element if isinstance(part, XmlPart) else None,
+         None if isinstance(part, XmlPart) else part.blob)
+        for part in source_parts
+    ]
+    rels = [(None, package._rels)] + [(part.partname, part._rels) for part in source_parts]
+    rels = [
+        (owner, [(rId, rel.reltype, rel._target_mode, rel.is_external,
+                  rel.target_ref if rel.is_external else rel.target_part.partname)
+                 for rId, rel in source_rels.items()])
+        for owner, source_rels in rels
+    ]
+    return {'parts': parts, 'rels': rels, 'blank_layout': list(pres.slide_layouts).index(_blank_layout(pres))}
+
+def _copy_template(plan):
+    """Build a new Presentation from a template plan, without unzipping or parsing anything.
+    
+    XML parts get a deep copy of their parsed element; binary parts (media,
+    thumbnails) share their immutable blob. Relationships are rebuilt
+    against the copied parts, so the copy can be changed and saved on its own.
+    Returns the Presentation and its blank layout.
+    """
+    from pptx.opc.package import _Relationship
+    from pptx.package import Package
+    
+    package = Package(None)
+    parts = {}
+    for part_cls, partname, content_type, element, blob in plan['parts']:
+        if element is not None:
+            parts[partname] = part_cls(partname, content_type, package, copy.deepcopy(element))
+        else:
+            parts[partname] = part_cls(partname, content_type, package, blob)
+    for owner, rel_specs in plan['rels']:
+        rels = package._rels if owner is None else parts[owner]._rels
+        for rId, reltype, target_mode, is_external, target in rel_specs:
+            rels._rels[rId] = _Relationship(rels._base_uri, rId, reltype, target_mode,
+                                            target if is_external else parts[target])
+    pres = package.main_document_part.presentation
+    return pres, pres.slide_layouts[plan['blank_layout']]
+
+def _blank_layout(pres):
+    """The layout slides are added on: the one with the fewest title/body placeholders to clone (Blank)"""
+    return min(pres.slide_layouts, key=lambda layout: len(list(layout.iter_cloneable_placeholders())))
+
+class BaseTemplates:
+    """Prepared base Presentations that exports start from, parsed once per process.
+    
+    'default' is python-pptx's built-in template; other names are .pptx
+    files registered into BASE_TEMPLATES_DIR, so pool workers and other
+    server processes can load them too. Each template is opened, cleared of
+    slides and set to 16:9 once. new() returns a copy of that part tree,
+    which costs a fraction of unzipping and parsing the file again. A file
+    replaced on disk is re-read on its next use.
+    """
+    
+    NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+    
+    def __init__(self, templates_dir):
+        self.templates_dir = templates_dir
+        self._lock = threading.Lock()
+        self._prepared = {}  # name -> (file mtime_ns, or None for default; _template_plan of the prepared Presentation)
+        self.hits = 0
+        self.loads = 0
+    
+    def path_for(self, name):
+        if name == 'default':
+            return None
+        if not self.NAME_PATTERN.match(name or ''):
+            raise ValueError("Base template names are 1-64 letters, digits, '-' or '_'")
+        return os.path.join(self.templates_dir, f"{name}.pptx")
+    
+    def names(self):
+        return ['default'] + sorted(
+            entry[:-len('.pptx')] for entry in os.listdir(self.templates_dir) if entry.endswith('.pptx')
+        )
+    
+    @staticmethod
+    def _prepare(pptx_file):
+        pres = Presentation(pptx_file)
+        # Exports add their own slides, so a template's sample slides are dropped
+        sld_id_lst = pres.part._element.sldIdLst
+        if sld_id_lst is not None:
+            for sld_id in list(sld_id_lst):
+                pres.part.drop_rel(sld_id.rId)
+                sld_id_lst.remove(sld_id)
+        # Set slide size to 16:9 widescreen format, which the designer's layouts are drawn in
+        pres.slide_width = Inches(13.333)
+        pres.slide_height = Inches(7.5)
+        return pres
+    
+    def identity(self, name=None):
+        """The resolved name and file mtime_ns (None for default) of a base template"""
+        name = name or BASE_TEMPLATE
+        path = self.path_for(name)
+        if path is None:
+            return name, None
+        try:
+            return name, os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            raise ValueError(f"Unknown base template: {name}")
+    
+    def new(self, name=None):
+        """Return a fresh copy of a prepared base template and the layout to add slides on"""
+        name, stamp = self.identity(name)
+        path = self.path_for(name)
+        
+        with self._lock:
+            cached = self._prepared.get(name)
+            if cached is not None and cached[0] == stamp:
+                self.hits += 1
+                return _copy_template(cached[1])
+        
+        plan = _template_plan(self._prepare(path))
+        with self._lock:
+            self._prepared[name] = (stamp, plan)
+            self.loads += 1
+        return _copy_template(plan)
+    
+    def register(self, name, data):
+        """Store .pptx bytes as a named base template, replacing any previous one"""
+        path = self.path_for(name)
+        if path is None:
+            raise ValueError("The default base template cannot be replaced")
+        try:
+            source = self._prepare(io.BytesIO(data))
+        except Exception as e:
+            raise ValueError(f"Not a usable .pptx file: {str(e)}")
+        
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._prepared[name] = (os.stat(path).st_mtime_ns, _template_plan(source))
+        return {'name': name, 'layouts': [layout.name for layout in source.slide_layouts]}
+    
+    def delete(self, name):
+        path = self.path_for(name)
+        if path is None:
+            raise ValueError("The default base template cannot be deleted")
+        with self._lock:
+            self._prepared.pop(name, None)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'templates': self.names(),
+                'default': BASE_TEMPLATE,
+                'parsed': sorted(self._prepared),
+                'hits': self.hits,
+                'loads': self.loads
+            }
+
+base_templates = BaseTemplates(BASE_TEMPLATES_DIR)
+
+def render_presentation(slides_data, title_layout, content_layout, export_images, render_engine=None,
+                        render_cache=True, text_fit=None, base_template=None):
+    """Render slides into a copy of a 16:9 base template, embedding images from export_images.
+    
+    render_engine 'python-pptx' adds every shape through the python-pptx API;
+    'clone' prerenders each layout once and copies the shape XML into every
+    slide, producing the same slides with far less per-slide work. text_fit
+    'shrink' fits each text box's font size to its text. With render_cache,
+    slides rendered by an earlier export with the same data, layout and
+    images are reused from slide_render_cache. base_template names a
+    registered base (BASE_TEMPLATE by default). This has no side effects on
+    the image store, so it is safe to run in pool workers.
+    """
+    render_engine = render_engine or RENDER_ENGINE
+    if render_engine not in ('python-pptx', 'clone'):
+        raise ValueError(f"Unknown render engine: {render_engine}")
+    text_fit = text_fit or TEXT_FIT
+    if text_fit not in ('off', 'shrink'):
+        raise ValueError(f"Unknown text fit mode: {text_fit}")
+    
+    # Each layout is compiled once per deck rather than re-read for every slide and element
+    title_plan = compile_layout(title_layout, 'title', text_fit == 'shrink')
+    content_plan = compile_layout(content_layout, 'content', text_fit == 'shrink')
+    
+    # Start from a copy of the prepared 16:9 base rather than parsing a template per export
+    base_key = base_templates.identity(base_template)
+    pres, blank_layout = base_templates.new(base_template)
+    if render_engine == 'clone':
+        title_clone_plan = compile_clone_plan(title_plan, base_template)
+        content_clone_plan = compile_clone_plan(content_plan, base_template)
+    
+    render_cache = render_cache and slide_render_cache.max_slides > 0
+    title_key = SlideRenderCache.layout_key(title_layout, 'title', render_engine, text_fit, base_key)
+    content_key = SlideRenderCache.layout_key(content_layout, 'content', render_engine, text_fit, base_key)
+    deck_media = _DeckMedia(pres.part.package, slide_render_cache)
+    next_slide_id = max([256] + [int(sld_id.id) + 1 for sld_id in pres.slides._sldIdLst])
+    for slide_data in slides_data:
+        with metrics.stage('slide_build'):
+            is_title = slide_data['type'] == 'title'
+            plan = title_plan if is_title else content_plan
+            
+            key = None
+            if render_cache:
+                image_paths = [
+                    (_image_source(spec, slide_data, export_images) or (None, None))[1]
+                    for render, spec in plan if render is _render_image
+                ]
+                key = SlideRenderCache.slide_key(title_key if is_title else content_key, slide_data, image_paths)
+                entry = slide_render_cache.get(key)
+                if entry is not None:
+                    _add_cached_slide(pres, blank_layout, next_slide_id, entry, deck_media)
+                    next_slide_id += 1
+                    continue
+            
+            if render_engine == 'clone':
+                slide = _add_blank_slide(pres, blank_layout, next_slide_id)
+                _clone_slide_shapes(slide, title_clone_plan if is_title else content_clone_plan,
+                                    slide_data, export_images, deck_media)
+            else:
+                slide = pres.slides.add_slide(blank_layout)
+                for render, spec in plan:
+                    render(slide, spec, slide_data, export_images)
+                deck_media.register(slide.part)
+            next_slide_id += 1
+            
+            if key is not None:
+                entry = _capture_slide(slide.part, blank_layout.part, image_paths, slide_render_cache)
+                if entry is not None:
+                    slide_render_cache.put(key, entry)
+    
+    return pres
+
+def _deck_image_filenames(slides_data):
+    return (
+        slide_data['generated_image'].replace('/static/generated_images/', '')
+        for slide_data in slides_data
+        if slide_data.get('generated_image', '').startswith('/static/generated_images/')
+    )
+
+def build_presentation(slides_data, title_layout, content_layout, image_dpi=None, image_format=None,
+                       render_engine=None, render_cache=True, text_fit=None, base_template=None):
+    """Build a Presentation from slide data and the designer's title/content layouts"""
+    # Resample images to their placed size up front so the slide loop only embeds files
+    export_images = prepare_export_images(slides_data, title_layout, content_layout, image_dpi, image_format)
+    
+    pres = render_presentation(slides_data, title_layout, content_layout, export_images, render_engine,
+                               render_cache, text_fit, base_template)
+    
+    # Keep this deck's images out of the image store's eviction candidates
+    image_store.record_deck(_deck_image_filenames(slides_data))
+    
+    return pres
+
+PPTX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+
+# Media formats that are already compressed and gain almost nothing from deflate
+_PRECOMPRESSED_MEDIA_EXTS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+
+def save_presentation(pres, pkg_file, zip_mode=None, compress_level=None):
+    """Save a presentation with per-part zip compression.
+    
+    Writes the same parts as python-pptx's PackageWriter. In 'store-media'
+    mode, already-compressed images under /ppt/media/ are written with
+    ZIP_STORED so saving doesn't spend CPU re-deflating them.
+    """
+    zip_mode = zip_mode or EXPORT_ZIP_MODE
+    if zip_mode not in ('store-media', 'deflate'):
+        raise ValueError(f"Unknown zip mode: {zip_mode}")
+    compress_level = EXPORT_COMPRESS_LEVEL if compress_level is None else int(compress_level)
+    
+    package = pres.part.package
+    parts = tuple(package.iter_parts())
+    with metrics.stage('pres_save'), zipfile.ZipFile(
+        pkg_file, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=compress_level, strict_timestamps=False
+    ) as zipf:
+        zipf.writestr(CONTENT_TYPES_URI.membername, serialize_part_xml(_ContentTypesItem.xml_for(parts)))
+        zipf.writestr(PACKAGE_URI.rels_uri.membername, package._rels.xml)
+        for part in parts:
+            stored = (
+                zip_mode == 'store-media'
+                and part.partname.startswith('/ppt/media/')
+                and part.partname.ext.lower() in _PRECOMPRESSED_MEDIA_EXTS
+            )
+            zipf.writestr(part.partname.membername, part.blob,
+                          compress_type=zipfile.ZIP_STORED if stored else None)
+            if part._rels:
+                zipf.writestr(part.partname.rels_uri.membername, part.rels.xml)
+
+def send_export_file(export_file, download_name):
+    """Stream a seekable export file in chunks with Content-Length and Range support.
+    
+    The file is closed (and a spooled temporary file deleted) when the
+    response finishes. GET/HEAD Range requests get 206 Partial Content so
+    large downloads can resume; a POST always streams the whole file.
+    """
+    size = export_file.seek(0, os.SEEK_END)
+    export_file.seek(0)
+    response = Response(
+        wrap_file(request.environ, export_file, buffer_size=EXPORT_CHUNK_SIZE),
+        mimetype=PPTX_MIMETYPE,
+        direct_passthrough=True
+    )
+    response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    response.content_length = size
+    try:
+        return response.make_conditional(request, accept_ranges=True, complete_length=size)
+    except Exception:
+        export_file.close()  # e.g. 416 for an unsatisfiable range
+        raise
+
+@bp.route('/create_presentation', methods=['POST'])
 def create_presentation():
     """Create final PPTX file with generated content and custom layouts"""
     data = request.json
+    try:
+        _load_deck_into(data)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     slides_data = data.get('slides', [])
     title_layout = data.get('title_layout', {})
     content_layout = data.get('content_layout', {})
@@ -563,197 +3458,766 @@ def create_presentation():
     print("Content layout received:", content_layout)
     
     try:
-        # Create presentation with 16:9 aspect ratio
-        pres = Presentation()
-        
-        # Set slide size to 16:9 widescreen format
-        pres.slide_width = Inches(13.333)  # 16:9 ratio width
-        pres.slide_height = Inches(7.5)    # 16:9 ratio height
-        
-        for slide_data in slides_data:
-            slide_type = slide_data['type']
-            
-            # Use the appropriate layout based on slide type
-            if slide_type == 'title':
-                layout_config = title_layout
-            else:
-                layout_config = content_layout
-            
-            print(f"Using layout for {slide_type} slide:", layout_config)
-            
-            # Add blank slide
-            slide_layout = pres.slide_layouts[6]  # Blank layout
-            slide = pres.slides.add_slide(slide_layout)
-            
-            # Add elements based on layout configuration
-            elements = layout_config.get('elements', [])
-            print(f"Processing {len(elements)} elements for slide: {slide_data['title']}")
-            
-            for element in elements:
-                print(f"Processing element: {element}")
-                
-                if element['type'] in ['textbox', 'title']:
-                    # Add text box with EXACT positioning from the designer
-                    textbox = slide.shapes.add_textbox(
-                        Inches(element['left']), 
-                        Inches(element['top']), 
-                        Inches(element['width']), 
-                        Inches(element['height'])
-                    )
-                    text_frame = textbox.text_frame
-                    text_frame.clear()  # Clear default content
-                    
-                    # Configure text frame properties
-                    text_frame.word_wrap = True
-                    # Don't use auto-sizing to preserve exact font sizes
-                    text_frame.auto_size = MSO_AUTO_SIZE.NONE
-                    
-                    # Determine what content to use
-                    if element['type'] == 'title':
-                        # For title elements, always use the slide title
-                        content_text = slide_data['title']
-                        p = text_frame.paragraphs[0]
-                        p.text = content_text
-                        p.alignment = PP_ALIGN.CENTER
-                        
-                        # Apply title formatting from the designer - force run creation
-                        if not p.runs:
-                            text_content = p.text
-                            p.text = text_content
-                            
-                        for run in p.runs:
-                            font = run.font
-                            font.name = element.get('font_name', 'Calibri')
-                            font.size = Pt(element.get('font_size', 28))
-                            font.bold = True
-                    else:
-                        # For textbox elements, use slide content
-                        content_text = slide_data.get('content', '')
-                        
-                        if slide_type == 'title':
-                            # For title slides, textbox shows subtitle/description
-                            p = text_frame.paragraphs[0]
-                            p.text = content_text if content_text else ""
-                            p.alignment = PP_ALIGN.CENTER
-                            
-                            # Force run creation and apply formatting
-                            if not p.runs:
-                                text_content = p.text
-                                p.text = text_content
-                                
-                            for run in p.runs:
-                                font = run.font
-                                font.name = element.get('font_name', 'Calibri')
-                                font.size = Pt(element.get('font_size', 18))
-                        else:
-                            # For content slides, parse and add bullet points if list_type is bullet
-                            if element.get('list_type', 'none') == 'bullet':
-                                bullet_points = parse_bullet_points(content_text)
-                                print(f"Parsed bullet points: {bullet_points}")
-                                
-                                if bullet_points:
-                                    # Add bullet points - each line becomes a bullet
-                                    for i, bullet_text in enumerate(bullet_points):
-                                        if i == 0:
-                                            p = text_frame.paragraphs[0]
-                                        else:
-                                            p = text_frame.add_paragraph()
-                                        
-                                        # Add bullet character manually for blank layouts
-                                        p.text = f"• {bullet_text.strip()}"
-                                        p.level = 0  # First level bullet
-                                        
-                                        # Apply formatting from the designer - force run creation
-                                        if not p.runs:
-                                            # Force run creation by setting text again
-                                            text_content = p.text
-                                            p.text = text_content
-                                        
-                                        # Apply to all runs
-                                        for run in p.runs:
-                                            run_font = run.font
-                                            run_font.name = element.get('font_name', 'Calibri')
-                                            run_font.size = Pt(element.get('font_size', 18))
-                                else:
-                                    # No bullet points, just add the text
-                                    p = text_frame.paragraphs[0]
-                                    p.text = content_text
-                                    
-                                    # Force run creation and apply formatting
-                                    if not p.runs:
-                                        text_content = p.text
-                                        p.text = text_content
-                                    
-                                    for run in p.runs:
-                                        font = run.font
-                                        font.name = element.get('font_name', 'Calibri')
-                                        font.size = Pt(element.get('font_size', 18))
-                            else:
-                                # Plain text without bullets
-                                p = text_frame.paragraphs[0]
-                                p.text = content_text
-                                
-                                # Force run creation and apply formatting
-                                if not p.runs:
-                                    text_content = p.text
-                                    p.text = text_content
-                                
-                                for run in p.runs:
-                                    font = run.font
-                                    font.name = element.get('font_name', 'Calibri')
-                                    font.size = Pt(element.get('font_size', 18))
-                                        
-                elif element['type'] == 'image':
-                    # Check if the slide has a generated image
-                    generated_image_url = slide_data.get('generated_image', '')
-                    
-                    if generated_image_url and generated_image_url.startswith('/static/generated_images/'):
-                        # Extract filename from URL and construct full path
-                        image_filename = generated_image_url.replace('/static/generated_images/', '')
-                        image_path = os.path.join(IMAGES_DIR, image_filename)
-                        
-                        # Check if the image file exists
-                        if os.path.exists(image_path):
-                            try:
-                                # Add the actual generated image
-                                picture = slide.shapes.add_picture(
-                                    image_path,
-                                    Inches(element['left']), 
-                                    Inches(element['top']), 
-                                    Inches(element['width']), 
-                                    Inches(element['height'])
-                                )
-                                print(f"Successfully added image: {image_filename}")
-                            except Exception as e:
-                                print(f"Error adding image {image_filename}: {str(e)}")
-                                # Fall back to placeholder if image loading fails
-                                _add_image_placeholder(slide, element)
-                        else:
-                            print(f"Image file not found: {image_path}")
-                            # Fall back to placeholder if file doesn't exist
-                            _add_image_placeholder(slide, element)
-                    else:
-                        print(f"No generated image found for slide: {slide_data['title']}")
-                        # Add placeholder if no generated image
-                        _add_image_placeholder(slide, element)
+        pres = build_presentation(
+            slides_data,
+            title_layout,
+            content_layout,
+            image_dpi=data.get('image_dpi'),
+            image_format=data.get('image_format'),
+            render_engine=data.get('render_engine'),
+            render_cache=not data.get('no_render_cache', False),
+            text_fit=data.get('text_fit'),
+            base_template=data.get('base_template')
+        )
         
-        # Save presentation to memory
-        file_buffer = io.BytesIO()
-        pres.save(file_buffer)
-        file_buffer.seek(0)
+        # Save to a spooled file so large decks go to disk instead of being
+        # held in memory a second time next to python-pptx's package
+        export_file = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES)
+        try:
+            save_presentation(pres, export_file, data.get('zip_mode'), data.get('compress_level'))
+        except Exception:
+            export_file.close()
+            raise
+        del pres
         
         filename = f"presentation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pptx"
         
-        return send_file(
-            file_buffer,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation'
-        )
-        
     except Exception as e:
         print("Error creating presentation:", str(e))
         return jsonify({'error': str(e)}), 500
+    
+    return send_export_file(export_file, filename)
+
+def export_deck_file(slides_data, title_layout, content_layout, export_images, target_path,
+                     render_engine=None, zip_mode=None, compress_level=None, text_fit=None, base_template=None):
+    """Render and save one deck to target_path; runs in the process pool for batch exports"""
+    pres = render_presentation(slides_data, title_layout, content_layout, export_images, render_engine,
+                               text_fit=text_fit, base_template=base_template)
+    save_presentation(pres, target_path, zip_mode, compress_level)
+    return target_path
+
+class _ChunkSink:
+    """Write-only stream that collects what a ZipFile writes so it can be yielded"""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+def _batch_deck_filename(deck, index, used):
+    """Safe, unique .pptx filename for a batch deck"""
+    stem = re.sub(r'[^A-Za-z0-9._ -]+', '_', str(deck.get('name') or '')).strip(' ._') or f"deck_{index + 1}"
+    filename = f"{stem}.pptx"
+    suffix = 2
+    while filename in used:
+        filename = f"{stem}_{suffix}.pptx"
+        suffix += 1
+    used.add(filename)
+    return filename
+
+@bp.route('/create_presentations_batch', methods=['POST'])
+def create_presentations_batch():
+    """Build several decks from one layout pair in the process pool and stream back a zip"""
+    data = request.json
+    decks = data.get('decks', [])
+    title_layout = data.get('title_layout', {})
+    content_layout = data.get('content_layout', {})
+    
+    # A {"name", "deck_id"} entry exports a stored deck's slides with the batch's layouts
+    try:
+        for deck in decks:
+            if isinstance(deck, dict) and deck.get('deck_id') and not deck.get('slides'):
+                stored = deck_store.get(deck['deck_id'])
+                if stored is None:
+                    raise LookupError(f"Deck not found: {deck['deck_id']}")
+                deck['slides'] = stored['slides']
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    if not decks or not all(isinstance(deck, dict) and deck.get('slides') for deck in decks):
+        return jsonify({'error': 'decks must be a non-empty list of {"name", "slides"} objects'}), 400
+    
+    used_filenames = set()
+    filenames = [_batch_deck_filename(deck, i, used_filenames) for i, deck in enumerate(decks)]
+    
+    try:
+        # Resize every deck's images once, up front, so workers only embed files
+        export_images = prepare_export_images(
+            [slide_data for deck in decks for slide_data in deck['slides']],
+            title_layout, content_layout, data.get('image_dpi'), data.get('image_format')
+        )
+        work_dir = tempfile.mkdtemp(prefix='batch-', dir=EXPORTS_DIR)
+        jobs = {
+            i: (export_deck_file, deck['slides'], title_layout, content_layout, export_images,
+                os.path.join(work_dir, f"{i}.pptx"), data.get('render_engine'),
+                data.get('zip_mode'), data.get('compress_level'), data.get('text_fit'),
+                data.get('base_template'))
+            for i, deck in enumerate(decks)
+        }
+        futures = {submit_to_process_pool(*job): i for i, job in jobs.items()}
+    except Exception as e:
+        print("Error starting batch export:", str(e))
+        return jsonify({'error': str(e)}), 500
+    
+    for deck in decks:
+        image_store.record_deck(_deck_image_filenames(deck['slides']))
+    
+    def generate():
+        sink = _ChunkSink()
+        manifest = [None] * len(decks)
+        try:
+            # Decks are already zip files, so they are stored rather than deflated again
+            with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+                for i, future in iter_process_pool_results(futures, jobs):
+                    entry = {'name': decks[i].get('name'), 'slides': len(decks[i]['slides'])}
+                    try:
+                        path = future.result()
+                    except Exception as e:
+                        print(f"Error building batch deck {i}: {str(e)}")
+                        manifest[i] = dict(entry, success=False, error=str(e))
+                        continue
+                    with open(path, 'rb') as deck_file, archive.open(filenames[i], 'w') as member:
+                        for chunk in iter(lambda: deck_file.read(EXPORT_CHUNK_SIZE), b''):
+                            member.write(chunk)
+                            yield from sink.drain()
+                    os.remove(path)
+                    manifest[i] = dict(entry, success=True, filename=filenames[i])
+                    yield from sink.drain()
+                archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+            yield from sink.drain()
+        finally:
+            for future in futures:
+                future.cancel()
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    filename = f"presentations_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    response = Response(stream_with_context(generate()), mimetype='application/zip')
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    return response
+
+class JobCancelled(Exception):
+    """Raised inside a job handler when cancellation has been requested"""
+
+class JobContext:
+    """Handle passed to job handlers for reporting partial results and checking cancellation"""
+    
+    def __init__(self, queue, job_id, payload):
+        self.queue = queue
+        self.job_id = job_id
+        self.payload = payload
+        self.progress = {}
+        self._last_check = 0.0
+        self._cancelled = False
+    
+    def report(self, key, value):
+        """Record one partial result (e.g. a finished slide) so status polls can see it"""
+        self.progress[str(key)] = value
+        self.queue._update(self.job_id, progress=json.dumps(self.progress))
+    
+    def cancelled(self):
+        # Polling SQLite on every check would be wasteful for tight loops
+        now = time.time()
+        if not self._cancelled and now - self._last_check >= 0.5:
+            self._last_check = now
+            self._cancelled = self.queue._cancel_requested(self.job_id)
+        return self._cancelled
+    
+    def check_cancelled(self):
+        if self.cancelled():
+            raise JobCancelled()
+
+class JobQueue:
+    """SQLite-backed job queue processed by a local pool of worker threads.
+    
+    Any process sharing JOBS_DB can claim queued jobs, and jobs whose worker
+    stopped heartbeating (e.g. after a restart) are put back in the queue.
+    """
+    
+    def __init__(self, db_path, workers):
+        self.db_path = db_path
+        self.workers = workers
+        self.handlers = {}
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._worker_pid = None
+        self._last_purge = 0.0
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+                "payload TEXT NOT NULL, progress TEXT, result TEXT, error TEXT, "
+                "cancel_requested INTEGER NOT NULL DEFAULT 0, "
+                "created REAL NOT NULL, updated REAL NOT NULL, heartbeat REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+    
+    @contextlib.contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30)
+        db.row_factory = sqlite3.Row
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+    
+    def handler(self, kind):
+        """Decorator registering the function that runs jobs of the given kind"""
+        def register(func):
+            self.handlers[kind] = func
+            return func
+        return register
+    
+    def submit(self, kind, payload):
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job type: {kind}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created, updated) VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), now, now)
+            )
+        self.start()
+        self._wakeup.set()
+        return job_id
+    
+    def get(self, job_id):
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'job_id': row['id'],
+            'type': row['kind'],
+            'status': row['status'],
+            'progress': json.loads(row['progress']) if row['progress'] else {},
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'cancel_requested': bool(row['cancel_requested']),
+            'created': row['created'],
+            'updated': row['updated']
+        }
+    
+    def cancel(self, job_id):
+        """Cancel a queued job immediately, or ask a running one to stop"""
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'cancelled', updated = ? WHERE id = ? AND status = 'queued'",
+                (now, job_id)
+            )
+            db.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated = ? WHERE id = ? AND status = 'running'",
+                (now, job_id)
+            )
+        return self.get(job_id)
+    
+    def _update(self, job_id, **fields):
+        fields['updated'] = fields['heartbeat'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._connect() as db:
+            db.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+    
+    def _cancel_requested(self, job_id):
+        with self._connect() as db:
+            row = db.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+    
+    def start(self):
+        """Start this process's worker threads, if they are not running yet"""
+        # Worker threads do not survive fork, so each process starts its own pool
+        if self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker_pid == os.getpid():
+                return
+            self._worker_pid = os.getpid()
+            for i in range(self.workers):
+                threading.Thread(target=self._run_worker, name=f'job-worker-{i}', daemon=True).start()
+    
+    def _claim(self):
+        """Atomically move the oldest queued job to running and return (id, kind, payload)"""
+        now = time.time()
+        with self._connect() as db:
+            # Requeue jobs abandoned by a worker that died or a server that restarted
+            db.execute(
+                "UPDATE jobs SET status = 'queued' WHERE status = 'running' AND heartbeat < ?",
+                (now - JOB_STALE_AFTER,)
+            )
+            row = db.execute(
+                "SELECT id, kind, payload FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            claimed = db.execute(
+                "UPDATE jobs SET status = 'running', updated = ?, heartbeat = ? WHERE id = ? AND status = 'queued'",
+                (now, now, row['id'])
+            ).rowcount
+        return (row['id'], row['kind'], json.loads(row['payload'])) if claimed else None
+    
+    def _run_worker(self):
+        while True:
+            try:
+                claimed = self._claim()
+            except sqlite3.Error as e:
+                print(f"Job queue error: {str(e)}")
+                claimed = None
+            if claimed is None:
+                self._purge_expired()
+                self._wakeup.wait(JOB_POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+            
+            job_id, kind, payload = claimed
+            context = JobContext(self, job_id, payload)
+            finished = threading.Event()
+            threading.Thread(target=self._heartbeat, args=(job_id, finished), daemon=True).start()
+            try:
+                result = self.handlers[kind](context)
+            except JobCancelled:
+                self._update(job_id, status='cancelled')
+            except Exception as e:
+                print(f"Job {job_id} ({kind}) failed: {str(e)}")
+                self._update(job_id, status='failed', error=str(e))
+            else:
+                status = 'cancelled' if context.cancelled() else 'completed'
+                self._update(job_id, status=status, result=json.dumps(result))
+            finally:
+                finished.set()
+    
+    def _heartbeat(self, job_id, finished):
+        # Long steps such as a large export report no progress, so keep the claim fresh separately
+        while not finished.wait(JOB_STALE_AFTER / 4):
+            try:
+                self._update(job_id)
+            except sqlite3.Error as e:
+                print(f"Job heartbeat error: {str(e)}")
+    
+    def _purge_expired(self):
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        cutoff = now - JOB_RETENTION
+        with self._connect() as db:
+            expired = [row['id'] for row in db.execute(
+                "SELECT id FROM jobs WHERE updated < ? AND status IN ('completed', 'failed', 'cancelled')", (cutoff,)
+            )]
+            db.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in expired])
+        for job_id in expired:
+            try:
+                os.remove(os.path.join(EXPORTS_DIR, f"{job_id}.pptx"))
+            except FileNotFoundError:
+                pass
+
+job_queue = JobQueue(JOBS_DB, JOB_WORKERS)
+
+def _job_slide_results(job, deck_id, slides, results, result_patch):
+    """Apply each finished slide's result, saving it to the deck as it arrives; returns the slide fields of the job result"""
+    patches = {}
+    version = None
+    try:
+        for slide_index, result in results:
+            patches[slide_index] = result_patch(result)
+            _merge_slide_patch(slides[slide_index], patches[slide_index])
+            if deck_id:
+                version = deck_store.patch_slides(deck_id, {slide_index: patches[slide_index]})[0]
+            job.report(slide_index, result)
+            job.check_cancelled()
+    finally:
+        results.close()  # cancels slides that have not started
+    return _deck_updates(deck_id, version, patches) if deck_id else {'slides': slides}
+
+@job_queue.handler('generate_content')
+def _content_job(job):
+    deck_id = _load_deck_into(job.payload)
+    slides = job.payload.get('slides', [])
+    max_workers = _content_concurrency(job.payload.get('max_concurrency', CONTENT_MAX_WORKERS))
+    use_cache = not job.payload.get('no_cache', False)
+    mode = job.payload.get('mode') or CONTENT_MODE
+    usage = _new_content_usage()
+    start = time.perf_counter()
+    
+    results = iter_content_results(slides, job.payload.get('topic', ''), max_workers, use_cache, mode, usage)
+    return {
+        **_job_slide_results(job, deck_id, slides, results, _content_result_patch),
+        'generated_count': len([r for r in job.progress.values() if r['success']]),
+        'error_count': len([r for r in job.progress.values() if not r['success']]),
+        'usage': dict(usage, mode=mode, elapsed_seconds=round(time.perf_counter() - start, 3))
+    }
+
+@job_queue.handler('generate_images_bulk')
+def _images_job(job):
+    deck_id = _load_deck_into(job.payload)
+    slides = job.payload.get('slides', [])
+    use_cache = not job.payload.get('no_cache', False)
+    
+    results = iter_bulk_image_results(slides, use_cache=use_cache)
+    return {
+        **_job_slide_results(job, deck_id, slides, results, _image_result_patch),
+        'generated_count': len([r for r in job.progress.values() if r['success']]),
+        'error_count': len([r for r in job.progress.values() if not r['success']])
+    }
+
+@job_queue.handler('create_presentation')
+def _presentation_job(job):
+    _load_deck_into(job.payload)
+    pres = build_presentation(
+        job.payload.get('slides', []),
+        job.payload.get('title_layout', {}),
+        job.payload.get('content_layout', {}),
+        image_dpi=job.payload.get('image_dpi'),
+        image_format=job.payload.get('image_format'),
+        render_engine=job.payload.get('render_engine'),
+        render_cache=not job.payload.get('no_render_cache', False),
+        text_fit=job.payload.get('text_fit'),
+        base_template=job.payload.get('base_template')
+    )
+    job.check_cancelled()
+    
+    export_path = os.path.join(EXPORTS_DIR, f"{job.job_id}.pptx")
+    save_presentation(pres, f"{export_path}.tmp", job.payload.get('zip_mode'), job.payload.get('compress_level'))
+    os.replace(f"{export_path}.tmp", export_path)
+    return {
+        'filename': f"presentation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pptx",
+        'download_url': f"/jobs/{job.job_id}/download"
+    }
+
+@bp.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue generation or export work and return its job ID immediately"""
+    data = request.json or {}
+    kind = data.get('type')
+    
+    if kind not in job_queue.handlers:
+        return jsonify({'error': f"type must be one of: {', '.join(sorted(job_queue.handlers))}"}), 400
+    if data.get('deck_id'):
+        # Only the ID is queued; the handler reads the deck when the job starts
+        if deck_store.get(data['deck_id']) is None:
+            return jsonify({'error': f"Deck not found: {data['deck_id']}"}), 404
+    elif not data.get('slides'):
+        return jsonify({'error': 'Slides are required'}), 400
+    
+    job_id = job_queue.submit(kind, data)
+    return jsonify({'job_id': job_id, 'status_url': f"/jobs/{job_id}"}), 202
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Return a job's status, partial results and final result"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@bp.route('/jobs/<job_id>/download', methods=['GET'])
+def download_job_result(job_id):
+    """Download the PPTX produced by a completed create_presentation job"""
+    job = job_queue.get(job_id)
+    if job is None or job['type'] != 'create_presentation':
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] != 'completed':
+        return jsonify({'error': f"Job is {job['status']}"}), 409
+    
+    return send_from_directory(
+        EXPORTS_DIR,
+        f"{job_id}.pptx",
+        as_attachment=True,
+        download_name=job['result']['filename'],
+        mimetype=PPTX_MIMETYPE
+    )
+
+class DeckStore:
+    """SQLite-backed decks: slides, topic, audience and layouts under a deck ID.
+    
+    Each slide is its own row, so patching one slide rewrites only that row
+    instead of the whole deck. Every change bumps the deck's version.
+    """
+    
+    FIELDS = ('topic', 'audience', 'title_layout', 'content_layout')
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._last_purge = 0.0
+        # The journal mode cannot change inside the transaction _connect() opens
+        db = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+        finally:
+            db.close()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS decks ("
+                "id TEXT PRIMARY KEY, fields TEXT NOT NULL, version INTEGER NOT NULL, "
+                "created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS deck_slides ("
+                "deck_id TEXT NOT NULL, position INTEGER NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (deck_id, position))"
+            )
+    
+    @contextlib.contextmanager
+    def _connect(self, write=True):
+        # Writes take the lock up front so read-modify-write merges cannot interleave;
+        # reads use a deferred transaction, which under WAL never waits for a writer
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute("BEGIN IMMEDIATE" if write else "BEGIN DEFERRED")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+    
+    def create(self, fields, slides):
+        self._purge_expired()
+        deck_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO decks (id, fields, version, created, updated) VALUES (?, ?, 1, ?, ?)",
+                (deck_id, json.dumps({name: fields.get(name) for name in self.FIELDS}), now, now)
+            )
+            self._write_slides(db, deck_id, slides)
+        return deck_id, 1
+    
+    def get(self, deck_id):
+        with self._connect(write=False) as db:
+            row = db.execute("SELECT * FROM decks WHERE id = ?", (deck_id,)).fetchone()
+            if row is None:
+                return None
+            slides = [json.loads(slide['data']) for slide in db.execute(
+                "SELECT data FROM deck_slides WHERE deck_id = ? ORDER BY position", (deck_id,)
+            )]
+        return dict(json.loads(row['fields']), deck_id=row['id'], version=row['version'], slides=slides,
+                    created=row['created'], updated=row['updated'])
+    
+    def update(self, deck_id, fields):
+        """Change deck fields; a 'slides' list replaces every slide (for adds, deletes and reordering)"""
+        with self._connect() as db:
+            row = db.execute("SELECT fields FROM decks WHERE id = ?", (deck_id,)).fetchone()
+            if row is None:
+                return None
+            stored = json.loads(row['fields'])
+            stored.update({name: fields[name] for name in self.FIELDS if name in fields})
+            db.execute("UPDATE decks SET fields = ? WHERE id = ?", (json.dumps(stored), deck_id))
+            if 'slides' in fields:
+                db.execute("DELETE FROM deck_slides WHERE deck_id = ?", (deck_id,))
+                self._write_slides(db, deck_id, fields['slides'])
+            self._bump(db, deck_id)
+        return self.get(deck_id)
+    
+    def patch_slides(self, deck_id, patches):
+        """Merge {index: patch} into stored slides; returns (version, {index: slide}) or None if no such deck"""
+        with self._connect() as db:
+            if db.execute("SELECT 1 FROM decks WHERE id = ?", (deck_id,)).fetchone() is None:
+                return None
+            slides = {}
+            for index, patch in patches.items():
+                row = db.execute(
+                    "SELECT data FROM deck_slides WHERE deck_id = ? AND position = ?", (deck_id, index)
+                ).fetchone()
+                if row is None:
+                    raise IndexError(f"Slide {index} does not exist")
+                slides[index] = _merge_slide_patch(json.loads(row['data']), patch)
+                db.execute(
+                    "UPDATE deck_slides SET data = ? WHERE deck_id = ? AND position = ?",
+                    (json.dumps(slides[index]), deck_id, index)
+                )
+            version = self._bump(db, deck_id)
+        return version, slides
+    
+    def delete(self, deck_id):
+        with self._connect() as db:
+            db.execute("DELETE FROM deck_slides WHERE deck_id = ?", (deck_id,))
+            return db.execute("DELETE FROM decks WHERE id = ?", (deck_id,)).rowcount > 0
+    
+    def image_filenames(self):
+        """Generated images used by any stored deck, so the image store keeps them"""
+        with self._connect(write=False) as db:
+            rows = db.execute(
+                "SELECT json_extract(data, '$.generated_image') AS image FROM deck_slides WHERE deck_id IN "
+                "(SELECT id FROM decks WHERE updated >= ?) AND image IS NOT NULL",
+                (time.time() - DECK_RETENTION,)
+            ).fetchall()
+        return set(_deck_image_filenames({'generated_image': row['image']} for row in rows))
+    
+    @staticmethod
+    def _write_slides(db, deck_id, slides):
+        db.executemany(
+            "INSERT INTO deck_slides (deck_id, position, data) VALUES (?, ?, ?)",
+            [(deck_id, i, json.dumps(slide)) for i, slide in enumerate(slides)]
+        )
+    
+    @staticmethod
+    def _bump(db, deck_id):
+        db.execute("UPDATE decks SET version = version + 1, updated = ? WHERE id = ?", (time.time(), deck_id))
+        return db.execute("SELECT version FROM decks WHERE id = ?", (deck_id,)).fetchone()['version']
+    
+    def _purge_expired(self):
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        with self._connect() as db:
+            db.execute(
+                "DELETE FROM deck_slides WHERE deck_id IN (SELECT id FROM decks WHERE updated < ?)",
+                (now - DECK_RETENTION,)
+            )
+            db.execute("DELETE FROM decks WHERE updated < ?", (now - DECK_RETENTION,))
+
+deck_store = DeckStore(DECKS_DB)
+# Stored decks can be reopened for DECK_RETENTION, so their images must outlive the recent-export window
+image_store.add_reference_source(deck_store.image_filenames)
+
+def _load_deck_into(data):
+    """Fill a request's slides, topic, audience and layouts from its deck_id, if it names one.
+    
+    Values sent with the request win over stored ones. Returns the deck ID or
+    None, and raises LookupError for an unknown deck.
+    """
+    deck_id = data.get('deck_id')
+    if not deck_id:
+        return None
+    deck = deck_store.get(deck_id)
+    if deck is None:
+        raise LookupError(f"Deck not found: {deck_id}")
+    for name in ('slides',) + DeckStore.FIELDS:
+        if data.get(name) is None:
+            data[name] = deck[name]
+    image_store.touch(_deck_image_filenames(deck['slides']))
+    return deck_id
+
+def _slides_reply(deck_id, slides, patches):
+    """Response fields for a route that changed slides.
+    
+    Without a deck the full slides go back as before. With one, the patches
+    are saved to the deck and only they are returned, keyed by slide index.
+    """
+    if not deck_id:
+        return {'slides': slides}
+    version = deck_store.patch_slides(deck_id, patches)[0] if patches else None
+    return _deck_updates(deck_id, version, patches)
+
+def _deck_updates(deck_id, version, patches):
+    if version is None:
+        version = deck_store.get(deck_id)['version']
+    return {
+        'deck_id': deck_id,
+        'version': version,
+        'updates': [{'index': index, 'changes': patch} for index, patch in sorted(patches.items())]
+    }
+
+@bp.route('/decks', methods=['POST'])
+def create_deck():
+    """Store a deck (slides plus topic, audience and layouts) and return its deck ID"""
+    data = request.json or {}
+    slides = data.get('slides', [])
+    if not isinstance(slides, list) or not all(isinstance(slide, dict) for slide in slides):
+        return jsonify({'error': 'slides must be a list of objects'}), 400
+    deck_id, version = deck_store.create(data, slides)
+    return jsonify({'deck_id': deck_id, 'version': version}), 201
+
+@bp.route('/decks/<deck_id>', methods=['GET'])
+def get_deck(deck_id):
+    """Return a stored deck"""
+    deck = deck_store.get(deck_id)
+    if deck is None:
+        return jsonify({'error': 'Deck not found'}), 404
+    image_store.touch(_deck_image_filenames(deck['slides']))
+    return jsonify(deck)
+
+@bp.route('/decks/<deck_id>', methods=['PATCH'])
+def update_deck(deck_id):
+    """Change a deck's topic, audience or layouts; 'slides' replaces the whole slide list"""
+    data = request.json or {}
+    if 'slides' in data and not (
+        isinstance(data['slides'], list) and all(isinstance(slide, dict) for slide in data['slides'])
+    ):
+        return jsonify({'error': 'slides must be a list of objects'}), 400
+    deck = deck_store.update(deck_id, data)
+    if deck is None:
+        return jsonify({'error': 'Deck not found'}), 404
+    return jsonify(deck)
+
+@bp.route('/decks/<deck_id>/slides/<int:index>', methods=['PATCH'])
+def patch_deck_slide(deck_id, index):
+    """Merge fields into one slide (JSON merge patch: null removes a field)"""
+    patch = request.json
+    if not isinstance(patch, dict):
+        return jsonify({'error': 'Body must be an object of slide fields'}), 400
+    try:
+        result = deck_store.patch_slides(deck_id, {index: patch})
+    except IndexError as e:
+        return jsonify({'error': str(e)}), 404
+    if result is None:
+        return jsonify({'error': 'Deck not found'}), 404
+    version, slides = result
+    return jsonify({'deck_id': deck_id, 'version': version, 'index': index, 'slide': slides[index]})
+
+@bp.route('/decks/<deck_id>', methods=['DELETE'])
+def delete_deck(deck_id):
+    """Delete a stored deck"""
+    if not deck_store.delete(deck_id):
+        return jsonify({'error': 'Deck not found'}), 404
+    return '', 204
+
+def warm_up(stacks=('openai', 'pptx')):
+    """Load the lazily imported libraries now instead of on first use.
+    
+    A preforking server calls this in its master (see gunicorn.conf.py), so
+    workers fork with openai and python-pptx already imported and share
+    those pages instead of each importing them on its first request.
+    """
+    start = time.perf_counter()
+    for value in list(globals().values()):
+        if isinstance(value, _LazyGlobal) and value.stack in stacks:
+            value.resolve()
+    if 'pptx' in stacks:
+        base_templates.new()  # parse the base template exports start from
+    print(f"Warm-up loaded {', '.join(stacks)} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+def create_app(config=None):
+    """Build the Flask app: gunicorn 'app:create_app()', or flask --app app run.
+    
+    Creating the app imports nothing heavy; call warm_up() to preload openai
+    and python-pptx. Job workers are not started here, since export pool
+    processes import the app too: the server process calls job_queue.start()
+    (gunicorn's post_fork, or python app.py).
+    """
+    flask_app = Flask(__name__)
+    flask_app.config.update(config or {})
+    flask_app.register_blueprint(bp)
+    return flask_app
+
+# Default app for python app.py, gunicorn app:app and the benchmarks
+app = create_app()
 
 if __name__ == '__main__':
+    # Resume queued and interrupted jobs right away; with the reloader only the serving child runs them
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        job_queue.start()
     app.run(debug=True)
@@ -0,0 +1,106 @@
+"""Time starting an export from a fresh parse of the base template vs. a copy of the parsed one.
+
+Runs offline. The parse line is what every export used to do:
+Presentation() (unzip and parse python-pptx's default template) and set
+the slide size to 16:9. The copy line is base_templates.new(). The
+small-deck lines time a whole /create_presentation build, where the base
+template was a large share of the cost. --verify checks both starting
+points save to the same parts, for the default and for a registered
+custom template that carries a sample slide.
+
+    python benchmarks/bench_base_template.py [--repeat 200] [--slides 5] [--verify]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+os.environ.setdefault('APP_DATA_DIR', tempfile.mkdtemp(prefix='pptx-bench-'))
+
+import app  # noqa: E402
+from bench_build import TITLE_LAYOUT, CONTENT_LAYOUT, synthetic_slides  # noqa: E402
+
+
+def parsed_base():
+    pres = app.Presentation()
+    pres.slide_width = app.Inches(13.333)
+    pres.slide_height = app.Inches(7.5)
+    return pres
+
+
+def parsed_base_and_layout(name=None):
+    """Stands in for base_templates.new() in the timed builds that parse every time"""
+    pres = parsed_base()
+    return pres, pres.slide_layouts[6]
+
+
+def unpacked(pres):
+    buffer = io.BytesIO()
+    pres.save(buffer)
+    with zipfile.ZipFile(buffer) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def per_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def sample_template():
+    """A custom template: the default with one sample slide, as a designer would hand it over"""
+    pres = app.Presentation()
+    slide = pres.slides.add_slide(pres.slide_layouts[0])
+    slide.shapes.title.text = 'Sample slide'
+    buffer = io.BytesIO()
+    pres.save(buffer)
+    return buffer.getvalue()
+
+
+def verify():
+    same = unpacked(parsed_base()) == unpacked(app.base_templates.new('default')[0])
+    print(f"default base: {'identical' if same else 'PARTS DIFFER'}")
+
+    app.base_templates.register('bench_custom', sample_template())
+    slides = synthetic_slides(3)
+    pres = app.build_presentation(slides, TITLE_LAYOUT, CONTENT_LAYOUT, base_template='bench_custom')
+    parts = unpacked(pres)
+    ok = len(pres.slides) == len(slides) and sum(name.startswith('ppt/slides/slide') for name in parts) == len(slides)
+    print(f"custom base: {len(pres.slides)} slides for {len(slides)} requested {'ok' if ok else 'WRONG'}")
+    return same and ok
+
+
+def main(repeat, slides):
+    app.base_templates.new('default')  # parse once outside the timing
+    parse = per_call(parsed_base, repeat)
+    copied = per_call(lambda: app.base_templates.new('default'), repeat)
+    print(f"{'parse template':>16}: {parse * 1000:7.2f} ms")
+    print(f"{'copy parsed':>16}: {copied * 1000:7.2f} ms  ({parse / copied:.1f}x)")
+
+    deck = synthetic_slides(slides)
+    build = lambda: app.build_presentation(deck, TITLE_LAYOUT, CONTENT_LAYOUT, render_cache=False)
+    copied_build = per_call(build, max(repeat // 10, 1))
+    original_new = app.base_templates.new
+    app.base_templates.new = parsed_base_and_layout
+    try:
+        parsed_build = per_call(build, max(repeat // 10, 1))
+    finally:
+        app.base_templates.new = original_new
+    print(f"{slides}-slide build: {parsed_build * 1000:7.2f} ms from a parse, {copied_build * 1000:7.2f} ms from a copy")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--slides', type=int, default=5)
+    parser.add_argument('--verify', action='store_true')
+    args = parser.parse_args()
+    if args.verify:
+        sys.exit(0 if verify() else 1)
+    main(args.repeat, args.slides)
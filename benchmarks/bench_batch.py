@@ -0,0 +1,77 @@
+"""Measure /create_presentations_batch throughput for different process pool sizes.
+
+Runs offline. Each worker count runs in its own process with
+EXPORT_PROCESS_WORKERS set, so the pool is sized from scratch; throughput
+should grow with workers up to the number of cores. The sequential line is
+the previous approach: one /create_presentation call per deck.
+
+    python benchmarks/bench_batch.py [--decks 8] [--slides 200] [--workers 1 2 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+os.environ.setdefault('APP_DATA_DIR', tempfile.mkdtemp(prefix='pptx-bench-'))
+
+# Imported at module level so spawned pool workers load the app while warming up
+import app  # noqa: E402
+from bench_build import TITLE_LAYOUT, CONTENT_LAYOUT, synthetic_slides  # noqa: E402
+
+
+def run_batch(decks, slides, sequential=False):
+    payload = {
+        'decks': [{'name': f'module_{i}', 'slides': synthetic_slides(slides)} for i in range(decks)],
+        'title_layout': TITLE_LAYOUT,
+        'content_layout': CONTENT_LAYOUT
+    }
+    with app.app.test_client() as client:
+        if sequential:
+            start = time.perf_counter()
+            total = 0
+            for deck in payload['decks']:
+                response = client.post('/create_presentation', json=dict(payload, slides=deck['slides']))
+                total += len(response.data)
+            return {'seconds': round(time.perf_counter() - start, 3), 'zip_bytes': total}
+        
+        # Spawn every pool worker outside the timing
+        list(app.get_process_pool().map(time.sleep, [0.5] * app.EXPORT_PROCESS_WORKERS))
+        start = time.perf_counter()
+        response = client.post('/create_presentations_batch', json=payload, buffered=False)
+        total = sum(len(chunk) for chunk in response.response)
+        response.close()
+        elapsed = time.perf_counter() - start
+    return {'seconds': round(elapsed, 3), 'zip_bytes': total}
+
+
+def main(decks, slides, worker_counts):
+    print(f"{decks} decks x {slides} slides, {os.cpu_count()} CPUs")
+    for workers in [0] + worker_counts:
+        command = [sys.executable, __file__, '--run', '--decks', str(decks), '--slides', str(slides)]
+        output = subprocess.run(
+            command + (['--sequential'] if workers == 0 else []),
+            check=True, capture_output=True, text=True,
+            env=dict(os.environ, EXPORT_PROCESS_WORKERS=str(max(workers, 1)))
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        label = 'sequential' if workers == 0 else f"{workers} workers"
+        print(f"{label:>11}: {result['seconds']:8.3f}s  {decks / result['seconds']:6.2f} decks/s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--decks', type=int, default=8)
+    parser.add_argument('--slides', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--sequential', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        print(json.dumps(run_batch(args.decks, args.slides, args.sequential)))
+    else:
+        main(args.decks, args.slides, args.workers)
@@ -0,0 +1,39 @@
+"""Time build_presentation() for synthetic decks of 100 and 1,000 slides.
+
+Runs offline: no OpenAI requests are made and no images are embedded.
+Timed builds bypass the render cache. The layouts and synthetic decks
+come from tests/decks.py, which the other benchmarks import through here.
+
+    python benchmarks/bench_build.py [--engine python-pptx|clone|all] [slide counts...]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'tests')]
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+os.environ.setdefault('APP_DATA_DIR', tempfile.mkdtemp(prefix='pptx-bench-'))
+
+import app  # noqa: E402
+from decks import TITLE_LAYOUT, CONTENT_LAYOUT, synthetic_slides  # noqa: E402
+
+
+def main(counts, engines):
+    for engine in engines:
+        for count in counts:
+            slides = synthetic_slides(count)
+            start = time.perf_counter()
+            app.build_presentation(slides, TITLE_LAYOUT, CONTENT_LAYOUT, render_engine=engine, render_cache=False)
+            elapsed = time.perf_counter() - start
+            print(f"{engine:>11} {count:>6} slides: {elapsed:8.3f}s  ({elapsed / count * 1000:.2f} ms/slide)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('counts', nargs='*', type=int, default=[100, 1000])
+    parser.add_argument('--engine', choices=['python-pptx', 'clone', 'all'], default='all')
+    args = parser.parse_args()
+    main(args.counts, ['python-pptx', 'clone'] if args.engine == 'all' else [args.engine])
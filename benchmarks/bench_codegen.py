@@ -0,0 +1,95 @@
+"""Measure compact generate_pptx_code scripts: size, generation, compile and run time.
+
+Runs offline. The unrolled line is the existing mode, which only covers
+one slide, so its size is shown per slide for comparison.
+
+    python benchmarks/bench_codegen.py [slide counts...]
+    python benchmarks/bench_codegen.py --verify
+
+--verify runs a compact script for the edge-case deck and checks that it
+writes the same package as build_presentation().
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'tests')]
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+os.environ.setdefault('APP_DATA_DIR', tempfile.mkdtemp(prefix='pptx-bench-'))
+
+import app  # noqa: E402
+from decks import (TITLE_LAYOUT, CONTENT_LAYOUT, PLAIN_CONTENT_LAYOUT,  # noqa: E402
+                   edge_case_slides, saved_parts, synthetic_slides)
+
+
+def run_script(code, path, image_dir=None):
+    """Execute a generated script's main() and return the seconds spent compiling and running it"""
+    start = time.perf_counter()
+    compiled = compile(code, 'generated_presentation.py', 'exec')
+    compiled_at = time.perf_counter()
+    namespace = {'__name__': 'generated'}
+    exec(compiled, namespace)
+    if image_dir:
+        namespace['IMAGE_DIR'] = image_dir
+    with contextlib.redirect_stdout(io.StringIO()):
+        namespace['main'](path)
+    return compiled_at - start, time.perf_counter() - compiled_at
+
+
+def verify():
+    """Check that a compact script builds the same package as the export route"""
+    from PIL import Image
+    filename = f"bench_{os.getpid()}.png"
+    os.makedirs(app.IMAGES_DIR, exist_ok=True)
+    Image.new('RGB', (64, 48), (200, 30, 30)).save(os.path.join(app.IMAGES_DIR, filename))
+    output = os.path.join(tempfile.mkdtemp(prefix='pptx-bench-'), 'generated.pptx')
+    try:
+        slides = edge_case_slides(f"/static/generated_images/{filename}")
+        identical = True
+        for content_layout in (CONTENT_LAYOUT, PLAIN_CONTENT_LAYOUT):
+            with contextlib.redirect_stdout(io.StringIO()):
+                reference = saved_parts(app.build_presentation(
+                    slides, TITLE_LAYOUT, content_layout, image_format='original', render_cache=False))
+            code = app.generate_pptx_code(
+                {'title_layout': TITLE_LAYOUT, 'content_layout': content_layout, 'slides': slides}, 'compact')
+            run_script(code, output, app.IMAGES_DIR)
+            with zipfile.ZipFile(output) as archive:
+                generated = {name: archive.read(name) for name in archive.namelist()}
+            for name in sorted(set(reference) | set(generated)):
+                if reference.get(name) != generated.get(name):
+                    identical = False
+                    print(f"differs: {name}")
+        print("script output identical" if identical else "script output differs")
+        return identical
+    finally:
+        os.remove(os.path.join(app.IMAGES_DIR, filename))
+
+
+def main(counts):
+    unrolled = app.generate_pptx_code(CONTENT_LAYOUT, 'unrolled')
+    print(f"unrolled: {len(unrolled.encode()):,} bytes for one slide")
+    output = os.path.join(tempfile.mkdtemp(prefix='pptx-bench-'), 'generated.pptx')
+    for count in counts:
+        payload = {'title_layout': TITLE_LAYOUT, 'content_layout': CONTENT_LAYOUT, 'slides': synthetic_slides(count)}
+        start = time.perf_counter()
+        code = app.generate_pptx_code(payload, 'compact')
+        generated = time.perf_counter() - start
+        compiled, ran = run_script(code, output)
+        print(f"compact {count:>6} slides: {len(code.encode()):>10,} bytes ({len(code.encode()) / count:,.0f}/slide)  "
+              f"generate {generated:.3f}s  compile {compiled:.3f}s  run {ran:.3f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('counts', nargs='*', type=int, default=[10, 100, 1000])
+    parser.add_argument('--verify', action='store_true')
+    args = parser.parse_args()
+    if args.verify:
+        sys.exit(0 if verify() else 1)
+    main(args.counts)
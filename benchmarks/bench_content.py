@@ -0,0 +1,57 @@
+"""Compare per-slide and batched /generate_content: latency, requests and tokens.
+
+Runs offline against the suite's stub client, which estimates tokens at ~4
+characters each and simulates API latency, so the savings shown come from
+request count and repeated prompt text rather than from a real model.
+
+    python benchmarks/bench_content.py [--slides 30] [--latency 0.8] [--token-latency 0.01] [--batch-size 6]
+    python benchmarks/bench_content.py --truncate-above 8    # force split-and-retry
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_build import synthetic_slides  # noqa: E402
+from suite import _load_app  # noqa: E402
+
+
+def main(slides, latency, token_latency, truncate_above, batch_size):
+    app = _load_app(latency=latency, token_latency=token_latency, truncate_above=truncate_above)
+    if batch_size:
+        app.CONTENT_BATCH_SIZE = batch_size
+    client = app.app.test_client()
+    deck = synthetic_slides(slides + 1)
+    for slide in deck:
+        slide['content'] = ''
+
+    results = {}
+    for mode in ('per-slide', 'batched'):
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = client.post('/generate_content', json={
+                'slides': [dict(slide) for slide in deck], 'topic': 'Benchmarking', 'mode': mode, 'no_cache': True
+            }).get_json()
+        usage = results[mode] = response['usage']
+        print(f"{mode:>9}: {usage['elapsed_seconds']:7.2f}s  {usage['requests']:4} requests  "
+              f"{usage['prompt_tokens']:7,} prompt + {usage['completion_tokens']:6,} completion tokens  "
+              f"({response['generated_count']} generated, {response['error_count']} errors)")
+
+    before, after = results['per-slide'], results['batched']
+    total = lambda usage: usage['prompt_tokens'] + usage['completion_tokens']
+    print(f"  savings: {1 - after['elapsed_seconds'] / before['elapsed_seconds']:.0%} latency, "
+          f"{before['requests'] - after['requests']} fewer requests, "
+          f"{1 - total(after) / total(before):.0%} fewer tokens")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, default=30, help='content slides (a title slide is added)')
+    parser.add_argument('--latency', type=float, default=0.8, help='simulated seconds per API round trip')
+    parser.add_argument('--token-latency', type=float, default=0.01, help='simulated seconds per completion token')
+    parser.add_argument('--truncate-above', type=int, help='cut off batched responses larger than this')
+    parser.add_argument('--batch-size', type=int, help='cap on slides per batched request (default CONTENT_BATCH_SIZE)')
+    args = parser.parse_args()
+    main(args.slides, args.latency, args.token_latency, args.truncate_above, args.batch_size)
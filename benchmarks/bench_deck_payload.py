@@ -0,0 +1,82 @@
+"""Compare request and response bytes of the full-slides flow with the deck store flow.
+
+Runs offline against the suite's stub client. Both flows make the same calls
+the page does after a draft: /generate_content, one prompt edit, a streamed
+/generate_images_bulk and /create_presentation. The full-slides flow sends
+the whole slides array every time; the deck flow creates a deck once and
+sends only its ID and single-slide patches.
+
+    python benchmarks/bench_deck_payload.py [--slides 20 100 500]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_build import TITLE_LAYOUT, CONTENT_LAYOUT, synthetic_slides  # noqa: E402
+from suite import _load_app  # noqa: E402
+
+
+def draft_slides(count):
+    slides = synthetic_slides(count)
+    for slide in slides[1:]:
+        slide['content'] = ''
+        slide.pop('content_generated', None)
+    return slides
+
+
+class Meter:
+    """Wraps a test client, counting JSON request bytes and response bytes (the export file excluded)"""
+
+    def __init__(self, client):
+        self.client = client
+        self.sent = 0
+        self.received = 0
+
+    def call(self, method, path, body, export=False):
+        data = json.dumps(body)
+        self.sent += len(data)
+        response = getattr(self.client, method)(path, data=data, content_type='application/json')
+        if not export:
+            self.received += len(response.data)
+        return response
+
+
+def run_full(client, count):
+    meter = Meter(client)
+    slides = meter.call('post', '/generate_content', {'slides': draft_slides(count), 'topic': 'Topic'}).get_json()['slides']
+    slides[1]['suggested_image_prompt'] = 'A new prompt'
+    meter.call('post', '/generate_images_bulk', {'slides': slides, 'stream': True})
+    meter.call('post', '/create_presentation', dict(
+        slides=slides, title_layout=TITLE_LAYOUT, content_layout=CONTENT_LAYOUT), export=True)
+    return meter
+
+
+def run_deck(client, count):
+    meter = Meter(client)
+    deck_id = meter.call('post', '/decks', {'slides': draft_slides(count), 'topic': 'Topic'}).get_json()['deck_id']
+    meter.call('post', '/generate_content', {'deck_id': deck_id})
+    meter.call('patch', f'/decks/{deck_id}/slides/1', {'suggested_image_prompt': 'A new prompt'})
+    meter.call('post', '/generate_images_bulk', {'deck_id': deck_id, 'stream': True})
+    meter.call('post', '/create_presentation', dict(
+        deck_id=deck_id, title_layout=TITLE_LAYOUT, content_layout=CONTENT_LAYOUT), export=True)
+    return meter
+
+
+def main(sizes):
+    app = _load_app(latency=0.0, image_latency=0.0)
+    with app.app.test_client() as client:
+        for count in sizes:
+            full = run_full(client, count)
+            deck = run_deck(client, count)
+            print(f"{count:>5} slides: full slides sent {full.sent / 1024:8.1f} KiB  received {full.received / 1024:8.1f} KiB"
+                  f" | deck sent {deck.sent / 1024:6.1f} KiB  received {deck.received / 1024:8.1f} KiB")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, nargs='+', default=[20, 100, 500])
+    args = parser.parse_args()
+    main(args.slides)
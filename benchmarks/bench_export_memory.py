@@ -0,0 +1,105 @@
+"""Measure peak memory of exporting an image-heavy deck through /create_presentation.
+
+Runs offline: images are random-noise PNGs written to a temporary directory,
+so they are as large as real photos once embedded. Each mode runs in its own
+process so peak RSS is comparable.
+
+    python benchmarks/bench_export_memory.py [--images 200] [--size 512]
+
+Modes:
+    bytesio  - the previous export path: save the deck into io.BytesIO, then send it
+    spooled  - the current route: spooled temporary file streamed back in chunks
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+os.environ.setdefault('APP_DATA_DIR', tempfile.mkdtemp(prefix='pptx-bench-'))
+
+from bench_build import TITLE_LAYOUT, CONTENT_LAYOUT, synthetic_slides  # noqa: E402
+
+
+def write_images(directory, count, size):
+    """Write count random-noise PNGs of size x size pixels and return their filenames"""
+    from PIL import Image
+    filenames = []
+    for i in range(count):
+        filename = f"bench_{i}.png"
+        Image.frombytes('RGB', (size, size), os.urandom(size * size * 3)).save(os.path.join(directory, filename))
+        filenames.append(filename)
+    return filenames
+
+
+def run_mode(mode, images, size):
+    import app
+    app.IMAGES_DIR = tempfile.mkdtemp(prefix='pptx-bench-images-')
+    filenames = write_images(app.IMAGES_DIR, images, size)
+    slides = synthetic_slides(images + 1)
+    for slide, filename in zip(slides[1:], filenames):
+        slide['generated_image'] = f"/static/generated_images/{filename}"
+    payload = {
+        'slides': slides,
+        'title_layout': TITLE_LAYOUT,
+        'content_layout': CONTENT_LAYOUT,
+        'image_format': 'original'  # embed the files as-is; resampling is not what is measured
+    }
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == 'bytesio':
+        pres = app.build_presentation(slides, TITLE_LAYOUT, CONTENT_LAYOUT, image_format='original')
+        file_buffer = io.BytesIO()
+        pres.save(file_buffer)
+        file_buffer.seek(0)
+        total = len(file_buffer.getvalue())
+    else:
+        with app.app.test_client() as client:
+            response = client.post('/create_presentation', json=payload, buffered=False)
+            total = sum(len(chunk) for chunk in response.response)
+            response.close()
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'mode': mode,
+        'images': images,
+        'deck_bytes': total,
+        'seconds': round(elapsed, 3),
+        'python_peak_bytes': traced_peak,
+        'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    }
+
+
+def main(images, size):
+    for mode in ('bytesio', 'spooled'):
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--images', str(images), '--size', str(size)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>8}: deck {result['deck_bytes'] / 2**20:7.1f} MiB  "
+              f"python peak {result['python_peak_bytes'] / 2**20:7.1f} MiB  "
+              f"max RSS {result['max_rss_bytes'] / 2**20:7.1f} MiB  "
+              f"{result['seconds']:.2f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=200)
+    parser.add_argument('--size', type=int, default=512, help='image width and height in pixels')
+    parser.add_argument('--mode', choices=['bytesio', 'spooled'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.images, args.size)))
+    else:
+        main(args.images, args.size)
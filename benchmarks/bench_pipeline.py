@@ -0,0 +1,93 @@
+"""Compare the browser-chained content -> image prompt -> image flow with /generate_pipeline.
+
+Runs offline against the suite's stub client with simulated API latency.
+The chained run makes the same calls the page used to: /generate_content,
+then /generate_image_prompt once per content slide in sequence, then
+/generate_images_bulk. The pipeline should finish in roughly the time of
+the slowest single slide rather than the sum of the three stages.
+
+    python benchmarks/bench_pipeline.py [--slides 20] [--latency 0.5] [--image-latency 3] [--image-concurrency 25]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_build import synthetic_slides  # noqa: E402
+from suite import _load_app  # noqa: E402
+
+
+def run_chained(client, slides, topic):
+    timings = {}
+    start = time.perf_counter()
+    slides = client.post('/generate_content', json={'slides': slides, 'topic': topic, 'no_cache': True}).get_json()['slides']
+    timings['content'] = time.perf_counter() - start
+    
+    stage_start = time.perf_counter()
+    for slide in slides:
+        if slide['type'] == 'content':
+            response = client.post('/generate_image_prompt', json={'title': slide['title'], 'content': slide['content']})
+            slide['suggested_image_prompt'] = response.get_json()['prompt']
+    timings['prompts'] = time.perf_counter() - stage_start
+    
+    stage_start = time.perf_counter()
+    result = client.post('/generate_images_bulk', json={'slides': slides, 'no_cache': True}).get_json()
+    timings['images'] = time.perf_counter() - stage_start
+    timings['total'] = time.perf_counter() - start
+    return timings, result['generated_count']
+
+
+def run_pipeline(client, slides, topic):
+    start = time.perf_counter()
+    response = client.post('/generate_pipeline', json={'slides': slides, 'topic': topic, 'no_cache': True},
+                           buffered=False)
+    first_image = None
+    summary = None
+    buffered = b''
+    for chunk in response.response:
+        buffered += chunk
+        *lines, buffered = buffered.split(b'\n')
+        for line in lines:
+            event = json.loads(line)
+            if event['event'] == 'image' and first_image is None:
+                first_image = time.perf_counter() - start
+            elif event['event'] == 'done':
+                summary = event
+    response.close()
+    return {'first_image': first_image, 'total': time.perf_counter() - start}, summary['image_count']
+
+
+def main(slides, latency, image_latency, image_concurrency):
+    app = _load_app(latency=latency, image_latency=image_latency)
+    if image_concurrency:
+        app.PIPELINE_IMAGE_CONCURRENCY = image_concurrency
+    client = app.app.test_client()
+    deck = synthetic_slides(slides + 1)
+    for slide in deck:
+        slide['content'] = ''
+    
+    print(f"{slides} content slides + title, {latency}s per chat call, {image_latency}s per image, "
+          f"pipeline image concurrency {app.PIPELINE_IMAGE_CONCURRENCY}")
+    with contextlib.redirect_stdout(io.StringIO()):
+        chained, chained_images = run_chained(client, [dict(slide) for slide in deck], 'Benchmarking Chained')
+        pipeline, pipeline_images = run_pipeline(client, [dict(slide) for slide in deck], 'Benchmarking Pipeline')
+    print(f" chained: {chained['total']:7.2f}s  (content {chained['content']:.2f}s + prompts {chained['prompts']:.2f}s "
+          f"+ images {chained['images']:.2f}s)  {chained_images} images")
+    print(f"pipeline: {pipeline['total']:7.2f}s  (first image after {pipeline['first_image']:.2f}s)  "
+          f"{pipeline_images} images")
+    print(f"slowest single slide: {2 * latency + image_latency:.2f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, default=20, help='content slides (a title slide is added)')
+    parser.add_argument('--latency', type=float, default=0.5, help='simulated seconds per chat call')
+    parser.add_argument('--image-latency', type=float, default=3.0, help='simulated seconds per image')
+    parser.add_argument('--image-concurrency', type=int, help='pipeline image stage cap (default PIPELINE_IMAGE_CONCURRENCY)')
+    args = parser.parse_args()
+    main(args.slides, args.latency, args.image_latency, args.image_concurrency)
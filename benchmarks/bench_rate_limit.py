@@ -0,0 +1,99 @@
+"""Generate images against a stub that rate-limits or goes down, with a fixed and an adaptive engine.
+
+Runs offline against the suite's stub client, wrapped so that more than
+--quota concurrent image calls get a 429, or (outage case) every call fails
+with a connection error. The fixed line is the old engine: a fixed limit and
+no retries, so every 429 fails its slide. The adaptive line is the default
+engine: AIMD limit, jittered retries within the retry budget and the circuit
+breaker. Backoff and cooldown are scaled down so the run takes seconds.
+
+    python benchmarks/bench_rate_limit.py [--slides 40] [--quota 3] [--latency 0.2]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from suite import StubOpenAI, _load_app  # noqa: E402
+
+
+class RateLimitError(Exception):
+    """Looks like openai.RateLimitError to the engine"""
+    status_code = 429
+    response = SimpleNamespace(headers={})
+
+
+class APIConnectionError(Exception):
+    """Looks like openai.APIConnectionError to the engine"""
+
+
+class QuotaStub(StubOpenAI):
+    """The suite's stub with a concurrency quota on image calls, or no service at all when down"""
+
+    def __init__(self, quota, down=False, **options):
+        super().__init__(**options)
+        self.quota = quota
+        self.down = down
+        self.active = 0
+        self.calls = 0
+        self.images.generate = self._limited_image
+
+    async def _limited_image(self, prompt, **params):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.down:
+            raise APIConnectionError('Connection error.')
+        if self.active >= self.quota:
+            raise RateLimitError('Rate limit reached for images per minute')
+        self.active += 1
+        try:
+            return await self._image(prompt, **params)
+        finally:
+            self.active -= 1
+
+
+def engines(app):
+    fast = dict(backoff_base=0.05, backoff_max=1.0, breaker_cooldown=60)
+    return [
+        ('fixed 8, no retries', lambda: app.OpenAIEngine(8, 8, 8, max_retries=0, breaker_threshold=10 ** 9)),
+        ('adaptive', lambda: app.OpenAIEngine(
+            app.OPENAI_MAX_CONCURRENCY, app.OPENAI_MIN_CONCURRENCY, app.OPENAI_INITIAL_CONCURRENCY,
+            {'image': app.OPENAI_IMAGE_LATENCY_TARGET}, app.OPENAI_MAX_RETRIES, app.OPENAI_RETRY_BUDGET,
+            app.OPENAI_RETRY_BURST, breaker_threshold=app.OPENAI_BREAKER_THRESHOLD, **fast))
+    ]
+
+
+def run(app, make_engine, client, count):
+    app.openai_engine = make_engine()
+    app.openai_client = client
+    slides = [{'title': f'Slide {i}', 'content': '', 'suggested_image_prompt': f'Prompt {i} {time.time()}'}
+              for i in range(count)]
+    start = time.perf_counter()
+    results = [result for _, result in app.iter_bulk_image_results(slides, use_cache=False)]
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(result['success'] for result in results), app.openai_engine.stats()
+
+
+def main(count, quota, latency):
+    app = _load_app()
+    cases = [(f'quota {quota}', False), ('outage', True)]
+    for case, down in cases:
+        for name, make_engine in engines(app):
+            client = QuotaStub(quota, down=down, image_latency=latency)
+            elapsed, ok, stats = run(app, make_engine, client, count)
+            print(f"{case:>8} | {name:<20}: {ok:3}/{count} images in {elapsed:5.2f}s, {client.calls:3} API calls, "
+                  f"429s {stats['throttled']:3}, retries {stats['retries']:3} (denied {stats['retries_denied']}), "
+                  f"rejected {stats['rejected']:3}, limit {stats['limit']:.2f}, breaker {stats['breaker']['state']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, default=40)
+    parser.add_argument('--quota', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.2)
+    args = parser.parse_args()
+    main(args.slides, args.quota, args.latency)
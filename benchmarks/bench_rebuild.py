@@ -0,0 +1,67 @@
+"""Time re-exporting a deck after a one-slide edit, with and without the render cache.
+
+Runs offline with random-noise PNGs. Each export goes through
+/create_presentation, so times include image preparation and saving.
+
+    python benchmarks/bench_rebuild.py [--slides 100] [--images 100] [--size 512] [--engine clone]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+os.environ.setdefault('APP_DATA_DIR', tempfile.mkdtemp(prefix='pptx-bench-'))
+
+import app  # noqa: E402
+from bench_build import TITLE_LAYOUT, CONTENT_LAYOUT, synthetic_slides  # noqa: E402
+from bench_export_memory import write_images  # noqa: E402
+
+
+def export(client, slides, engine, render_cache=True):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = client.post('/create_presentation', json={
+            'slides': slides,
+            'title_layout': TITLE_LAYOUT,
+            'content_layout': CONTENT_LAYOUT,
+            'render_engine': engine,
+            'no_render_cache': not render_cache
+        })
+    assert response.status_code == 200, response.get_json()
+    return time.perf_counter() - start
+
+
+def main(slides, images, size, engine):
+    app.IMAGES_DIR = tempfile.mkdtemp(prefix='pptx-bench-images-')
+    deck = synthetic_slides(slides)
+    for slide, filename in zip(deck[1:], write_images(app.IMAGES_DIR, images, size)):
+        slide['generated_image'] = f"/static/generated_images/{filename}"
+    client = app.app.test_client()
+    
+    # Image derivatives are cached on disk after the first export, as they are in production
+    export(client, deck, engine, render_cache=False)
+    uncached = export(client, deck, engine, render_cache=False)
+    cold = export(client, deck, engine)
+    deck[len(deck) // 2]['content'] += '\n- A corrected bullet'
+    edited = export(client, deck, engine)
+    
+    print(f"{slides} slides, {images} images of {size}px, {engine} engine")
+    print(f"   full rebuild (no cache): {uncached:7.3f}s")
+    print(f"  first export (cold cache): {cold:7.3f}s")
+    print(f"  after a one-slide edit:    {edited:7.3f}s  ({edited / uncached:.0%} of a full rebuild)")
+    print(f"  cache: {app.slide_render_cache.stats()}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slides', type=int, default=100)
+    parser.add_argument('--images', type=int, default=100, help='slides given a generated image')
+    parser.add_argument('--size', type=int, default=512, help='image width and height in pixels')
+    parser.add_argument('--engine', choices=['python-pptx', 'clone'], default='python-pptx')
+    args = parser.parse_args()
+    main(args.slides, args.images, args.size, args.engine)
@@ -0,0 +1,62 @@
+"""Compare PPTX save time against file size for image-heavy decks.
+
+Runs offline with random-noise PNGs, which, like generated images, are
+already compressed. Every zip mode/compression level is saved from the same
+built Presentation and checked to contain the same parts as pres.save().
+
+    python benchmarks/bench_save.py [--images 50] [--size 512] [--levels 1 6 9]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+os.environ.setdefault('APP_DATA_DIR', tempfile.mkdtemp(prefix='pptx-bench-'))
+
+import app  # noqa: E402
+from bench_build import TITLE_LAYOUT, CONTENT_LAYOUT, synthetic_slides  # noqa: E402
+from bench_export_memory import write_images  # noqa: E402
+
+
+def unpacked(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def timed_save(save):
+    buffer = io.BytesIO()
+    start = time.perf_counter()
+    save(buffer)
+    return time.perf_counter() - start, buffer.getvalue()
+
+
+def main(images, size, levels):
+    app.IMAGES_DIR = tempfile.mkdtemp(prefix='pptx-bench-images-')
+    slides = synthetic_slides(images + 1)
+    for slide, filename in zip(slides[1:], write_images(app.IMAGES_DIR, images, size)):
+        slide['generated_image'] = f"/static/generated_images/{filename}"
+    pres = app.build_presentation(slides, TITLE_LAYOUT, CONTENT_LAYOUT, image_format='original')
+
+    elapsed, reference = timed_save(pres.save)
+    expected = unpacked(reference)
+    print(f"{'pres.save()':>22}: {elapsed:7.3f}s  {len(reference) / 2**20:8.2f} MiB")
+    for zip_mode in ('deflate', 'store-media'):
+        for level in levels:
+            elapsed, data = timed_save(lambda buffer: app.save_presentation(pres, buffer, zip_mode, level))
+            same = unpacked(data) == expected
+            print(f"{zip_mode:>14} level {level}: {elapsed:7.3f}s  {len(data) / 2**20:8.2f} MiB"
+                  f"{'' if same else '  PARTS DIFFER'}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=50)
+    parser.add_argument('--size', type=int, default=512, help='image width and height in pixels')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 6, 9])
+    args = parser.parse_args()
+    main(args.images, args.size, args.levels)
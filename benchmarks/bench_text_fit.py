@@ -0,0 +1,97 @@
+"""Time fit_font_size() across thousands of text boxes, cold and with warm caches.
+
+Runs offline. The naive line is what the cached engine replaces: measure
+every candidate line with Pillow (fonts loaded once per size) at every size
+from the designer's size down until the text fits.
+
+    python benchmarks/bench_text_fit.py [--boxes 5000] [--font Calibri]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+os.environ.setdefault('APP_DATA_DIR', tempfile.mkdtemp(prefix='pptx-bench-'))
+
+import app  # noqa: E402
+
+WORDS = ('market growth strategy customer revenue platform analysis quarterly performance team '
+         'delivery roadmap risk budget forecast onboarding retention pipeline metrics').split()
+
+
+def synthetic_boxes(count, font_name):
+    """Text boxes of varied size holding 3-10 generated bullets each, as the export would fit them"""
+    rng = random.Random(42)
+    boxes = []
+    for _ in range(count):
+        element = {'type': 'textbox', 'left': 0, 'top': 1, 'width': rng.choice([4.0, 6.0, 7.3, 12.0]),
+                   'height': rng.choice([2.0, 4.0, 6.7]), 'font_size': rng.choice([18, 24, 28]),
+                   'font_name': font_name, 'list_type': 'bullet'}
+        spec = app.compile_layout({'elements': [element]}, 'content', text_fit=True)[0][1]
+        bullets = [' '.join(rng.choices(WORDS, k=rng.randint(4, 16))) for _ in range(rng.randint(3, 10))]
+        boxes.append((spec, [f"• {bullet}" for bullet in bullets]))
+    return boxes
+
+
+_NAIVE_FONTS = {}
+
+
+def naive_fit(paragraphs, spec):
+    """Linear scan over sizes, measuring every line with Pillow each time"""
+    from PIL import ImageFont
+    width = (spec['width'] - 2 * app._TEXT_INSET_X) / app.Pt(1)
+    height = (spec['height'] - 2 * app._TEXT_INSET_Y) / app.Pt(1)
+    for size in range(int(spec['font_size'].pt), app.TEXT_FIT_MIN_SIZE, -1):
+        if size not in _NAIVE_FONTS:
+            _NAIVE_FONTS[size] = ImageFont.load_default(size=size)
+        font = _NAIVE_FONTS[size]
+        lines = 0
+        for paragraph in paragraphs:
+            line = ''
+            lines += 1
+            for word in paragraph.split(' '):
+                candidate = f"{line} {word}" if line else word
+                if line and font.getlength(candidate) > width:
+                    lines += 1
+                    line = word
+                else:
+                    line = candidate
+        if lines * size * app.TEXT_FIT_LINE_SPACING <= height:
+            return size
+    return app.TEXT_FIT_MIN_SIZE
+
+
+def main(count, font_name):
+    boxes = synthetic_boxes(count, font_name)
+    
+    start = time.perf_counter()
+    naive = [naive_fit(paragraphs, spec) for spec, paragraphs in boxes[:max(1, count // 10)]]
+    naive_per_box = (time.perf_counter() - start) / len(naive)
+    
+    app._glyph_table.cache_clear()
+    app._wrapped_line_count.cache_clear()
+    start = time.perf_counter()
+    sizes = [app.fit_font_size(paragraphs, spec) for spec, paragraphs in boxes]
+    cold = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    [app.fit_font_size(paragraphs, spec) for spec, paragraphs in boxes]
+    warm = time.perf_counter() - start
+    
+    shrunk = sum(1 for size, (spec, _) in zip(sizes, boxes) if size != spec['font_size'])
+    print(f"{count} boxes ({font_name}), {shrunk} shrunk to fit")
+    print(f"  naive scan: {naive_per_box * 1e6:9.1f} us/box  (sampled on {len(naive)} boxes)")
+    print(f"  cold cache: {cold / count * 1e6:9.1f} us/box")
+    print(f"  warm cache: {warm / count * 1e6:9.1f} us/box  {app._wrapped_line_count.cache_info()}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--boxes', type=int, default=5000)
+    parser.add_argument('--font', default='Calibri')
+    args = parser.parse_args()
+    main(args.boxes, args.font)
@@ -0,0 +1,400 @@
+"""Offline benchmark suite for the deck-building and code-generation paths.
+
+Every case runs in a fresh process with a stubbed openai_client (canned chat
+replies, small distinct PNGs), its own data directory and its own images
+directory, so nothing touches the network or the repo's generated images.
+
+For each case the suite records wall time (best of --repeat runs), peak
+memory (growth of the process's max RSS during the case, plus the peak of
+Python-level allocations traced in one extra run) and output size. Results
+are written as JSON; --compare flags cases that got slower or bigger than a
+previous results file by more than --threshold.
+
+    python benchmarks/suite.py                              # full run
+    python benchmarks/suite.py --sizes 10 100 --repeat 1    # quick run
+    python benchmarks/suite.py --compare benchmarks/results/baseline.json
+
+Cases:
+    parse_bullet_points     parse every slide's content of an N-slide deck
+    generate_pptx_code      generate code for a layout with N elements
+    _add_image_placeholder  add N placeholders to one slide
+    generate_images_bulk    generate images for N slides through the stub
+    create_presentation     POST an N-slide deck, with and without images
+    startup                 import app and create_app() in a fresh interpreter, then
+                            also warm_up(); records per-package import time as well
+"""
+import argparse
+import asyncio
+import base64
+import contextlib
+import hashlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+DEFAULT_SIZES = [10, 100, 1000]
+
+# Run by each startup measurement in a fresh interpreter; argv[1] is 'warm' to include warm_up()
+STARTUP_SCRIPT = """
+import contextlib, io, json, resource, sys, time
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+    app.create_app()
+    if sys.argv[1] == 'warm':
+        app.warm_up()
+print(json.dumps({'seconds': time.perf_counter() - start,
+                  'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+class StubOpenAI:
+    """Stands in for openai.AsyncOpenAI: canned chat replies and small, distinct PNGs.
+    
+    Token usage is estimated at ~4 characters per token. latency adds a fixed
+    round-trip delay per call and token_latency a delay per completion token;
+    image_latency is the delay per generated image.
+    Batched (JSON mode) content requests larger than truncate_above slides
+    come back cut off, to exercise split-and-retry.
+    """
+
+    def __init__(self, image_size=128, latency=0.0, token_latency=0.0, truncate_above=None, image_latency=0.0):
+        self.image_size = image_size
+        self.latency = latency
+        self.image_latency = image_latency
+        self.token_latency = token_latency
+        self.truncate_above = truncate_above
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+        self.images = SimpleNamespace(generate=self._image)
+
+    async def _chat(self, messages, response_format=None, **params):
+        finish_reason = 'stop'
+        if response_format:
+            prompt = messages[-1]['content']
+            slides = json.loads(prompt[prompt.rindex('Slides:\n') + len('Slides:\n'):])
+            content = json.dumps({'slides': [
+                {'id': slide['id'], 'bullets': [f"Point {j} for this slide" for j in range(1, 5)]}
+                for slide in slides
+            ]})
+            if self.truncate_above and len(slides) > self.truncate_above:
+                content, finish_reason = content[:len(content) // 2], 'length'
+        elif 'bullet points' in messages[-1]['content']:
+            content = '\n'.join(f"Point {j} for this slide" for j in range(1, 5))
+        else:
+            # Replies differ per request so image prompts (and cached images) stay distinct
+            digest = hashlib.sha1(json.dumps(messages).encode()).hexdigest()[:12]
+            content = f"Simple flat illustration, variant {digest}"
+        prompt_tokens = len(json.dumps(messages)) // 4
+        completion_tokens = len(content) // 4
+        await asyncio.sleep(self.latency + self.token_latency * completion_tokens)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        )
+
+    async def _image(self, prompt, **params):
+        from PIL import Image
+        await asyncio.sleep(self.image_latency)
+        # Noise compresses like a real render does (i.e. not at all), and keeps images distinct
+        size = self.image_size
+        buffer = io.BytesIO()
+        Image.frombytes('RGB', (size, size), os.urandom(size * size * 3)).save(buffer, 'PNG')
+        return SimpleNamespace(data=[SimpleNamespace(b64_json=base64.b64encode(buffer.getvalue()).decode())])
+
+
+def _load_app(**stub_options):
+    """Import the app against temporary directories with the stub client installed"""
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+    os.environ['APP_DATA_DIR'] = tempfile.mkdtemp(prefix='pptx-suite-')
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    app.IMAGES_DIR = app.image_store.images_dir = tempfile.mkdtemp(prefix='pptx-suite-images-')
+    app.openai_client = StubOpenAI(**stub_options)
+    return app
+
+
+def _layout_with_elements(count):
+    """A content layout of count elements cycling through title, bullet textbox and image"""
+    kinds = [('title', 'none'), ('textbox', 'bullet'), ('image', 'none'), ('textbox', 'none')]
+    elements = []
+    for i in range(count):
+        kind, list_type = kinds[i % len(kinds)]
+        elements.append({'type': kind, 'left': (i % 10) * 1.2, 'top': (i // 10 % 6) * 1.1,
+                         'width': 1.1, 'height': 1.0, 'font_size': 18 + i % 20,
+                         'font_name': 'Calibri', 'list_type': list_type})
+    return {'slide_type': 'content', 'elements': elements}
+
+
+def _generate_images(app, client, slides):
+    response = client.post('/generate_images_bulk', json={'slides': slides})
+    return response.get_json()['slides']
+
+
+def prepare_case(app, case, size, images):
+    """Build the inputs for a case and return a zero-argument callable returning the output size"""
+    from bench_build import TITLE_LAYOUT, CONTENT_LAYOUT, synthetic_slides
+    from pptx import Presentation
+    client = app.app.test_client()
+    slides = synthetic_slides(size)
+
+    if case == 'parse_bullet_points':
+        contents = [slide['content'] for slide in slides]
+        return lambda: sum(len(app.parse_bullet_points(content)) for content in contents)
+
+    if case == 'generate_pptx_code':
+        layout = _layout_with_elements(size)
+        return lambda: len(app.generate_pptx_code(layout).encode())
+
+    if case == '_add_image_placeholder':
+        element = {'left': 1.0, 'top': 1.0, 'width': 4.0, 'height': 3.0}
+
+        def run():
+            pres = Presentation()
+            slide = pres.slides.add_slide(pres.slide_layouts[6])
+            for _ in range(size):
+                app._add_image_placeholder(slide, element)
+            return len(slide.part.blob)
+        return run
+
+    if case == 'generate_images_bulk':
+        def run():
+            # Fresh prompts each run so the image cache never short-circuits the pipeline
+            run.count += 1
+            batch = [dict(slide, title=f"{slide['title']} #{run.count}") for slide in slides]
+            generated = _generate_images(app, client, batch)
+            return sum(os.path.getsize(os.path.join(app.IMAGES_DIR, slide['generated_image'].rsplit('/', 1)[1]))
+                       for slide in generated if slide.get('generated_image'))
+        run.count = 0
+        return run
+
+    if case == 'create_presentation':
+        if images:
+            slides = _generate_images(app, client, slides)
+        # Repeats measure full builds; bench_rebuild.py covers the render cache
+        payload = {'slides': slides, 'title_layout': TITLE_LAYOUT, 'content_layout': CONTENT_LAYOUT,
+                   'no_render_cache': True}
+
+        def run():
+            response = client.post('/create_presentation', json=payload)
+            if response.status_code != 200:
+                raise RuntimeError(response.get_data(as_text=True))
+            return len(response.data)
+        return run
+
+    raise ValueError(f"Unknown case: {case}")
+
+
+def import_breakdown(importtime_log, top=12):
+    """Seconds spent importing each package app.py pulls in, from python -X importtime output.
+    
+    Counts app's direct imports plus top-level imports made after it (the
+    lazy ones warm_up() loads), grouped by top-level package.
+    """
+    breakdown = {}
+    pending = []
+    after_app = False
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        package = name.strip().split('.')[0]
+        if depth == 1 and not after_app:
+            pending.append((package, int(cumulative)))
+        elif depth == 0:
+            if package == 'app':
+                after_app = True
+                entries = pending
+            elif after_app:
+                entries = [(package, int(cumulative))]
+            else:
+                pending, entries = [], []
+            for package, microseconds in entries:
+                breakdown[package] = breakdown.get(package, 0) + microseconds
+    ranked = sorted(breakdown.items(), key=lambda item: -item[1])
+    return {package: round(microseconds / 1e6, 4) for package, microseconds in ranked[:top]}
+
+
+def run_startup_case(warm, repeat):
+    """Time app startup in fresh interpreters, plus one -X importtime run for the per-package breakdown"""
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get('OPENAI_API_KEY', 'benchmark'),
+               APP_DATA_DIR=tempfile.mkdtemp(prefix='pptx-suite-'))
+    command = [sys.executable, '-c', STARTUP_SCRIPT, 'warm' if warm else 'cold']
+    cwd = os.path.dirname(BENCHMARKS_DIR)
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    traced = subprocess.run([sys.executable, '-X', 'importtime'] + command[1:], cwd=cwd, env=env,
+                            capture_output=True, text=True, check=True)
+
+    rss_unit = 1 if sys.platform == 'darwin' else 1024
+    timings = [run['seconds'] for run in runs]
+    return {
+        'seconds': round(min(timings), 6),
+        'runs': [round(t, 6) for t in timings],
+        'peak_memory_bytes': max(run['max_rss'] for run in runs) * rss_unit,
+        'peak_traced_bytes': 0,
+        'output_bytes': 0,
+        'imports': import_breakdown(traced.stderr)
+    }
+
+
+def run_case(case, size, images, repeat):
+    """Measure one case in this process and return its result dict"""
+    if case in ('startup', 'startup_warm_up'):
+        return run_startup_case(case == 'startup_warm_up', repeat)
+    app = _load_app()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run = prepare_case(app, case, size, images)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output_bytes = run()
+            timings.append(time.perf_counter() - start)
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        tracemalloc.start()
+        run()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss_unit = 1 if sys.platform == 'darwin' else 1024
+    return {
+        'seconds': round(min(timings), 6),
+        'runs': [round(t, 6) for t in timings],
+        'peak_memory_bytes': max(0, rss_after - rss_before) * rss_unit,
+        'peak_traced_bytes': traced_peak,
+        'output_bytes': output_bytes
+    }
+
+
+def case_matrix(sizes):
+    """(name, case, size, images) for every benchmark in the suite"""
+    matrix = []
+    for case in ('parse_bullet_points', 'generate_pptx_code', '_add_image_placeholder', 'generate_images_bulk'):
+        matrix.extend((f"{case}[n={size}]", case, size, False) for size in sizes)
+    for images in (False, True):
+        matrix.extend(
+            (f"create_presentation[slides={size},images={'yes' if images else 'no'}]", 'create_presentation', size, images)
+            for size in sizes
+        )
+    matrix.append(('startup[create_app]', 'startup', 0, False))
+    matrix.append(('startup[warm_up]', 'startup_warm_up', 0, False))
+    return matrix
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARKS_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes, repeat, only=None):
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat
+        },
+        'cases': {}
+    }
+    for name, case, size, images in case_matrix(sizes):
+        if only and not any(pattern in name for pattern in only):
+            continue
+        command = [sys.executable, __file__, '--run-case', case, '--size', str(size), '--repeat', str(repeat)]
+        completed = subprocess.run(command + (['--images'] if images else []), capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"{name:<48} FAILED\n{completed.stderr.strip()}")
+            results['cases'][name] = {'error': completed.stderr.strip().splitlines()[-1:]}
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results['cases'][name] = result
+        print(f"{name:<48} {result['seconds']:9.4f}s  "
+              f"peak +{result['peak_memory_bytes'] / 2**20:7.1f} MiB  "
+              f"traced {result['peak_traced_bytes'] / 2**20:7.1f} MiB  "
+              f"out {result['output_bytes']:>11,}")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print changes against a baseline results file and return the names of regressed cases"""
+    regressions = []
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'} "
+          f"({baseline['meta'].get('timestamp')}), threshold {threshold:.0%}:")
+    for name, result in results['cases'].items():
+        before = baseline['cases'].get(name)
+        if not before or 'error' in before or 'error' in result:
+            continue
+        flagged = []
+        for metric in ('seconds', 'peak_memory_bytes', 'output_bytes'):
+            old, new = before[metric], result[metric]
+            # Ignore noise on tiny values: a few ms or under 1 MiB of memory
+            floor = 0.005 if metric == 'seconds' else 2**20 if metric == 'peak_memory_bytes' else 0
+            if new > old * (1 + threshold) and new - old > floor:
+                fmt = (lambda v: f"{v:.4f}s") if metric == 'seconds' else (lambda v: f"{int(v):,}")
+                flagged.append(f"{metric} {fmt(old)} -> {fmt(new)}")
+        change = (result['seconds'] - before['seconds']) / before['seconds'] if before['seconds'] else 0.0
+        print(f"{name:<48} {change:+8.1%}  {'REGRESSION: ' + '; '.join(flagged) if flagged else 'ok'}")
+        if flagged:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case; the best is reported')
+    parser.add_argument('--only', nargs='+', help='run only cases whose name contains one of these strings')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='previous results file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.15, help='allowed relative slowdown/growth')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--images', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.size, args.images, args.repeat)))
+        return 0
+
+    results = run_suite(args.sizes, args.repeat, args.only)
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) flagged")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,32 @@
+"""Gunicorn settings for running the app in production.
+
+    gunicorn 'app:create_app()'
+
+Gunicorn reads this file from the working directory. The master loads the
+app and warms it up once, before forking, so workers start with openai and
+python-pptx already imported instead of each importing them on their
+first request. Job workers are started in each worker after the fork, not
+in the master.
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+# Threaded workers: routes spend most of their time waiting on OpenAI
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+# Long generation runs should go through /jobs; this only bounds synchronous requests
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '300'))
+preload_app = True
+
+
+def on_starting(server):
+    """Runs once in the master before any worker is forked"""
+    import app
+    app.warm_up()
+
+
+def post_fork(server, worker):
+    """Runs in each worker right after it is forked"""
+    import app
+    app.job_queue.start()
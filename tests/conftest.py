@@ -0,0 +1,19 @@
+"""Import the app against temporary directories, with no network."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+os.environ['APP_DATA_DIR'] = tempfile.mkdtemp(prefix='pptx-tests-')
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app
+    app.IMAGES_DIR = app.image_store.images_dir = app.image_cache.images_dir = tempfile.mkdtemp(
+        prefix='pptx-tests-images-')
+    return app
@@ -0,0 +1,70 @@
+"""Layouts and sample decks shared by the tests and the benchmarks."""
+import io
+import zipfile
+
+TITLE_LAYOUT = {
+    'slide_type': 'title',
+    'elements': [
+        {'type': 'title', 'left': 1.0, 'top': 2.5, 'width': 11.333, 'height': 1.5,
+         'font_size': 44, 'font_name': 'Calibri', 'list_type': 'none'},
+        {'type': 'textbox', 'left': 1.0, 'top': 4.2, 'width': 11.333, 'height': 1.3,
+         'font_size': 20, 'font_name': 'Calibri', 'list_type': 'none'}
+    ]
+}
+
+CONTENT_LAYOUT = {
+    'slide_type': 'content',
+    'elements': [
+        {'type': 'title', 'left': 0, 'top': 0, 'width': 13.333, 'height': 1.2167,
+         'font_size': 40, 'font_name': 'Calibri', 'list_type': 'none'},
+        {'type': 'textbox', 'left': 0, 'top': 0.7667, 'width': 7.2998, 'height': 6.7333,
+         'font_size': 28, 'font_name': 'Calibri', 'list_type': 'bullet'},
+        {'type': 'image', 'left': 7.3498, 'top': 0.8, 'width': 5.9832, 'height': 6.7,
+         'font_size': 18, 'font_name': 'Calibri', 'list_type': 'none'}
+    ]
+}
+
+PLAIN_CONTENT_LAYOUT = {
+    'slide_type': 'content',
+    'elements': [dict(element, list_type='none') for element in CONTENT_LAYOUT['elements']]
+}
+
+
+def synthetic_slides(count):
+    """A title slide followed by count - 1 content slides with four bullets each"""
+    slides = [{'id': 0, 'title': 'Benchmark Deck', 'type': 'title', 'content': 'Synthetic slides'}]
+    for i in range(1, count):
+        slides.append({
+            'id': i,
+            'title': f'Slide {i}: Topic overview',
+            'type': 'content',
+            'content': '\n'.join(f'Point {j} about topic {i} with some supporting detail' for j in range(1, 5))
+        })
+    return slides
+
+
+def edge_case_slides(image_url):
+    """Slides covering empty, multi-line, control-character and image fallback cases"""
+    contents = [
+        '',
+        'Slide 3 overview',
+        '- First point\n* Second point\n\nThird point with a trailing space ',
+        'Line one\vline two\n\nline four\x07',
+        '• Only bullet',
+        '\n'.join(f"- A long generated bullet point number {i} that wraps across the text box" for i in range(12)),
+    ]
+    images = [image_url, '/static/generated_images/missing.png', 'https://example.com/x.png', '', image_url, '']
+    slides = [{'id': 0, 'title': '', 'type': 'title', 'content': None},
+              {'id': 1, 'title': 'Deck\ntitle', 'type': 'title', 'content': 'Sub\ntitle'}]
+    for i, (content, image) in enumerate(zip(contents, images), start=2):
+        slides.append({'id': i, 'title': f'Title {i}' if i % 2 else '', 'type': 'content',
+                       'content': content, 'generated_image': image})
+    return slides
+
+
+def saved_parts(pres):
+    """Every part of a saved presentation, keyed by part name"""
+    buffer = io.BytesIO()
+    pres.save(buffer)
+    with zipfile.ZipFile(buffer) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
@@ -0,0 +1,28 @@
+"""The SQLite chat cache drops expired rows and keeps only its newest rows as it is written."""
+import sqlite3
+import time
+
+
+def rows(path):
+    with sqlite3.connect(path) as db:
+        return [key for key, in db.execute("SELECT key FROM chat_cache ORDER BY created")]
+
+
+def test_table_is_capped_to_the_newest_rows(app_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module.ChatCache, 'PURGE_INTERVAL', 5)
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = app_module.ChatCache(max_entries=2, ttl=3600, db_path=path, db_max_entries=3)
+    for i in range(10):
+        cache.put(f'k{i}', {'content': str(i)})
+    assert rows(path) == ['k7', 'k8', 'k9']
+    assert app_module.ChatCache(2, 3600, path, 3).get('k9') == {'content': '9'}
+
+
+def test_expired_rows_are_purged_while_running(app_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module.ChatCache, 'PURGE_INTERVAL', 2)
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = app_module.ChatCache(max_entries=10, ttl=0.1, db_path=path, db_max_entries=100)
+    cache.put('old', {'content': 'old'})
+    time.sleep(0.15)
+    cache.put('new', {'content': 'new'})
+    assert rows(path) == ['new']
@@ -0,0 +1,43 @@
+"""Per-slide content generation: CONTENT_SLIDE_TIMEOUT limits a slide's whole run, retries included."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+
+class APIStatusError(Exception):
+    status_code = 503
+    response = SimpleNamespace(headers={})
+
+
+@pytest.fixture
+def unavailable(app_module, monkeypatch):
+    """Every chat request fails with a retryable 503 after a short delay"""
+    async def create(**params):
+        await asyncio.sleep(0.02)
+        raise APIStatusError('Error code: 503')
+
+    engine = app_module.OpenAIEngine(max_concurrency=4, initial_concurrency=4, max_retries=100, retry_burst=100,
+                                     backoff_base=0.02, backoff_max=0.02, breaker_threshold=1000)
+    monkeypatch.setattr(app_module, 'openai_engine', engine)
+    monkeypatch.setattr(app_module, 'openai_client',
+                        SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    return engine
+
+
+def test_retries_stop_at_the_slide_timeout(app_module, unavailable):
+    start = time.monotonic()
+    with pytest.raises(TimeoutError, match='timed out after 0.3s'):
+        unavailable.run(app_module.agenerate_slide_content, 'Slide', 'Topic', 0.3, False)
+    assert time.monotonic() - start < 1.0
+    assert unavailable.stats()['retries'] > 0
+    assert unavailable.stats()['in_flight'] == 0
+
+
+def test_timed_out_slide_reports_a_content_error(app_module, unavailable, monkeypatch):
+    monkeypatch.setattr(app_module, 'CONTENT_SLIDE_TIMEOUT', 0.2)
+    slides = [{'title': 'Slide', 'type': 'content'}]
+    [(index, result)] = app_module.iter_content_results(slides, 'Topic', use_cache=False, mode='per-slide')
+    assert index == 0
+    assert app_module._content_result_patch(result) == {'content_error': 'Slide content timed out after 0.2s'}
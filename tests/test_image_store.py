@@ -0,0 +1,53 @@
+"""ImageStore sweeps see the whole images directory, not just this process's view of it."""
+import os
+
+import pytest
+
+
+class NoCache:
+    def referenced_filenames(self, since):
+        return set()
+
+    def discard_filenames(self, filenames):
+        pass
+
+
+def write(directory, name, size=10, mtime=1_000_000):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def store(app_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, 'IMAGE_STORE_MAX_FILES', 2)
+    monkeypatch.setattr(app_module, 'IMAGE_STORE_MIN_AGE', 0)
+    write(tmp_path, 'a.png', mtime=1_000_000)
+    store = app_module.ImageStore(str(tmp_path), NoCache())
+    assert store.stats()['files'] == 1
+    return store
+
+
+def test_sweep_counts_images_written_by_other_processes(store, tmp_path):
+    write(tmp_path, 'b.png', mtime=2_000_000)
+    write(tmp_path, 'c.png', mtime=3_000_000)
+    assert store.sweep() == 1
+    assert sorted(os.listdir(tmp_path)) == ['b.png', 'c.png']
+    assert store.stats()['files'] == 2
+
+
+def test_sweep_forgets_images_evicted_by_other_processes(store, tmp_path):
+    os.remove(tmp_path / 'a.png')
+    assert store.sweep() == 0
+    assert store.stats()['files'] == 0
+
+
+def test_sweep_keeps_this_process_access_times(store, tmp_path):
+    write(tmp_path, 'b.png', mtime=2_000_000)
+    write(tmp_path, 'c.png', mtime=3_000_000)
+    store.sweep()
+    store.touch(['b.png'])
+    write(tmp_path, 'd.png', mtime=4_000_000)
+    assert store.sweep() == 1
+    assert sorted(os.listdir(tmp_path)) == ['b.png', 'd.png']
@@ -0,0 +1,35 @@
+"""Request metrics: each failed request is one error, whether it raised or returned a 500."""
+import pytest
+
+
+def error_count(client, route):
+    body = client.get('/metrics').get_data(as_text=True)
+    prefix = f'app_http_request_errors_total{{route="{route}"}} '
+    return next((int(line[len(prefix):]) for line in body.splitlines() if line.startswith(prefix)), 0)
+
+
+@pytest.mark.parametrize('propagate', [False, True])
+def test_unhandled_exception_is_one_error(app_module, propagate):
+    flask_app = app_module.create_app({'PROPAGATE_EXCEPTIONS': propagate})
+
+    def boom():
+        raise ValueError('boom')
+
+    flask_app.add_url_rule('/boom', 'boom', boom)
+    client = flask_app.test_client()
+    before = error_count(client, '/boom')
+    if propagate:
+        with pytest.raises(ValueError):
+            client.get('/boom')
+    else:
+        assert client.get('/boom').status_code == 500
+    assert error_count(client, '/boom') == before + 1
+
+
+def test_500_response_is_one_error(app_module):
+    flask_app = app_module.create_app()
+    flask_app.add_url_rule('/fail', 'fail', lambda: ('failed', 500))
+    client = flask_app.test_client()
+    before = error_count(client, '/fail')
+    client.get('/fail')
+    assert error_count(client, '/fail') == before + 1
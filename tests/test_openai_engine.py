@@ -0,0 +1,170 @@
+"""OpenAIEngine.call(): the AIMD limit, retries within the budget and the circuit breaker."""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+
+class APIStatusError(Exception):
+    """Carries a status code and headers the way openai's status errors do"""
+
+    def __init__(self, status_code, code=None, retry_after=None):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        self.code = code
+        self.response = SimpleNamespace(headers={'retry-after': retry_after} if retry_after else {})
+
+
+class APITimeoutError(Exception):
+    """Recognised by class name, like openai.APITimeoutError"""
+
+
+def flaky(*errors, result='ok', delay=0.0):
+    """A request that raises each error in turn, then returns result; calls counts its attempts"""
+    remaining = list(errors)
+
+    async def request():
+        request.calls += 1
+        await asyncio.sleep(delay)
+        if remaining:
+            raise remaining.pop(0)
+        return result
+
+    request.calls = 0
+    return request
+
+
+@pytest.fixture
+def make_engine(app_module):
+    def make(**options):
+        options = dict(dict(max_concurrency=8, initial_concurrency=8, backoff_base=0.001, backoff_max=0.01),
+                       **options)
+        return app_module.OpenAIEngine(**options)
+    return make
+
+
+def call(engine, request, kind='chat'):
+    return engine.run(engine.call, request, kind)
+
+
+def test_429_is_retried_and_halves_the_limit(make_engine):
+    engine = make_engine()
+    request = flaky(APIStatusError(429))
+    assert call(engine, request) == 'ok'
+    stats = engine.stats()
+    assert request.calls == 2
+    assert (stats['throttled'], stats['retries'], stats['limit']) == (1, 1, 4.0)
+
+
+def test_retry_waits_for_retry_after(make_engine):
+    engine = make_engine(backoff_max=1.0)
+    start = time.monotonic()
+    assert call(engine, flaky(APIStatusError(429, retry_after='0.2'))) == 'ok'
+    assert time.monotonic() - start >= 0.2
+    assert make_engine(backoff_max=30)._backoff(0, APIStatusError(429, retry_after='5')) >= 5
+
+
+def test_exhausted_quota_is_not_retried(make_engine):
+    engine = make_engine()
+    request = flaky(APIStatusError(429, code='insufficient_quota'))
+    with pytest.raises(APIStatusError):
+        call(engine, request)
+    stats = engine.stats()
+    assert request.calls == 1
+    assert (stats['throttled'], stats['retries'], stats['limit']) == (0, 0, 8.0)
+
+
+def test_timeout_is_retried_and_halves_the_limit(make_engine):
+    engine = make_engine()
+    assert call(engine, flaky(APITimeoutError('Request timed out.'))) == 'ok'
+    stats = engine.stats()
+    assert (stats['timeouts'], stats['retries'], stats['limit']) == (1, 1, 4.0)
+
+
+def test_a_round_of_429s_cuts_the_limit_once(make_engine):
+    engine = make_engine()
+    started = []
+
+    async def request():
+        started.append(None)
+        if len(started) <= 4:
+            # All four first attempts are in flight before any of them fails
+            while len(started) < 4:
+                await asyncio.sleep(0.001)
+            raise APIStatusError(429)
+        return 'ok'
+
+    async def round_of_four():
+        return await asyncio.gather(*(engine.call(request) for _ in range(4)))
+
+    assert engine.run(round_of_four) == ['ok'] * 4
+    stats = engine.stats()
+    assert stats['throttled'] == 4
+    assert 4.0 <= stats['limit'] < 5.0
+
+
+def test_fast_successes_raise_a_busy_limit(make_engine):
+    engine = make_engine(initial_concurrency=2)
+
+    async def burst():
+        return await asyncio.gather(*(engine.call(flaky(delay=0.001)) for _ in range(8)))
+
+    engine.run(burst)
+    assert 2.0 < engine.stats()['limit'] <= 8.0
+
+
+def test_slow_calls_trim_the_limit(make_engine):
+    engine = make_engine(latency_targets={'chat': 0.01})
+    assert call(engine, flaky(delay=0.03)) == 'ok'
+    stats = engine.stats()
+    assert stats['slow'] == 1
+    assert stats['limit'] == pytest.approx(8 * engine.SLOW_DECREASE_FACTOR)
+
+
+def test_retry_budget_limits_retries(make_engine):
+    engine = make_engine(retry_budget=0.0, retry_burst=1, breaker_threshold=100)
+    with pytest.raises(APIStatusError):
+        call(engine, flaky(*[APIStatusError(503)] * 5))
+    stats = engine.stats()
+    assert (stats['retries'], stats['retries_denied'], stats['server_errors']) == (1, 1, 2)
+
+
+def test_breaker_opens_rejects_and_closes_after_a_good_probe(make_engine, app_module):
+    engine = make_engine(max_retries=0, breaker_threshold=3, breaker_cooldown=0.1)
+    for _ in range(3):
+        with pytest.raises(APIStatusError):
+            call(engine, flaky(APIStatusError(500)))
+    assert engine.stats()['breaker']['state'] == 'open'
+
+    request = flaky()
+    with pytest.raises(app_module.OpenAIUnavailableError):
+        call(engine, request)
+    assert request.calls == 0
+    assert engine.stats()['rejected'] == 1
+
+    time.sleep(0.15)
+    assert call(engine, request) == 'ok'
+    breaker = engine.stats()['breaker']
+    assert (breaker['state'], breaker['consecutive_failures'], breaker['opened']) == ('closed', 0, 1)
+
+
+def test_failed_probe_reopens_the_breaker(make_engine, app_module):
+    engine = make_engine(max_retries=0, breaker_threshold=1, breaker_cooldown=0.1)
+    with pytest.raises(APIStatusError):
+        call(engine, flaky(APIStatusError(502)))
+    time.sleep(0.15)
+    with pytest.raises(APIStatusError):
+        call(engine, flaky(APIStatusError(502)))
+    assert engine.stats()['breaker'] == {'state': 'open', 'consecutive_failures': 2, 'opened': 2}
+    with pytest.raises(app_module.OpenAIUnavailableError):
+        call(engine, flaky())
+
+
+def test_client_errors_are_not_retried(make_engine):
+    engine = make_engine()
+    request = flaky(APIStatusError(400))
+    with pytest.raises(APIStatusError):
+        call(engine, request)
+    assert request.calls == 1
+    assert engine.stats()['retries'] == 0
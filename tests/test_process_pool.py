@@ -0,0 +1,28 @@
+"""A dead export worker breaks the process pool; the app must replace it and rerun the jobs it lost."""
+import os
+import time
+
+
+def die():
+    os._exit(1)
+
+
+def worker_pid(delay=0.0):
+    time.sleep(delay)
+    return os.getpid()
+
+
+def test_broken_pool_is_replaced_on_submit(app_module):
+    broken = app_module.get_process_pool()
+    broken.submit(die).exception()
+    assert app_module.submit_to_process_pool(worker_pid).result() > 0
+    assert app_module.get_process_pool() is not broken
+
+
+def test_jobs_lost_to_a_broken_pool_run_again(app_module):
+    app_module.submit_to_process_pool(die)
+    jobs = {i: (worker_pid, 0.05) for i in range(3)}
+    futures = {app_module.submit_to_process_pool(*job): i for i, job in jobs.items()}
+    results = dict(app_module.iter_process_pool_results(futures, jobs))
+    assert sorted(results) == [0, 1, 2]
+    assert all(future.result() > 0 for future in results.values())
@@ -0,0 +1,60 @@
+"""The clone engine and the render cache must write the same package as the python-pptx engine."""
+import io
+import itertools
+import os
+
+import pytest
+
+from decks import CONTENT_LAYOUT, PLAIN_CONTENT_LAYOUT, TITLE_LAYOUT, edge_case_slides, saved_parts
+
+
+@pytest.fixture(scope='module')
+def slides(app_module):
+    from PIL import Image
+    filename = 'test_render_engines.png'
+    Image.new('RGB', (64, 48), (200, 30, 30)).save(os.path.join(app_module.IMAGES_DIR, filename))
+    return edge_case_slides(f"/static/generated_images/{filename}")
+
+
+@pytest.fixture(scope='module')
+def title_only(app_module):
+    """A base template without the Blank layout, so slides are added on Title Only and keep its placeholder"""
+    pres = app_module.Presentation()
+    layouts = pres.slide_layouts
+    layouts.remove(layouts.get_by_name('Blank'))
+    buffer = io.BytesIO()
+    pres.save(buffer)
+    app_module.base_templates.register('test_title_only', buffer.getvalue())
+    return 'test_title_only'
+
+
+def build(app_module, slides, content_layout, **options):
+    return saved_parts(app_module.build_presentation(slides, TITLE_LAYOUT, content_layout, **options))
+
+
+def differing_parts(reference, built):
+    return sorted(name for name in set(reference) | set(built) if reference.get(name) != built.get(name))
+
+
+# Default comes first, so the custom base's cold builds would pick up default slides if the cache mixed them
+@pytest.mark.parametrize('base', ['default', 'title_only'])
+@pytest.mark.parametrize('content_layout, text_fit', list(itertools.product(
+    (CONTENT_LAYOUT, PLAIN_CONTENT_LAYOUT), ('off', 'shrink'))))
+def test_engines_and_render_cache_identical(app_module, slides, title_only, base, content_layout, text_fit):
+    base_template = title_only if base == 'title_only' else base
+    reference = build(app_module, slides, content_layout, render_engine='python-pptx', render_cache=False,
+                      text_fit=text_fit, base_template=base_template)
+    for engine in ('python-pptx', 'clone'):
+        # The first build fills the render cache and the second is served from it
+        for attempt in ('cold', 'cached'):
+            built = build(app_module, slides, content_layout, render_engine=engine, text_fit=text_fit,
+                          base_template=base_template)
+            assert differing_parts(reference, built) == [], f"{engine}, {attempt}"
+
+
+def test_clone_numbers_shapes_after_base_placeholders(app_module, slides, title_only):
+    pres = app_module.build_presentation(slides, TITLE_LAYOUT, CONTENT_LAYOUT, render_engine='clone',
+                                         render_cache=False, base_template=title_only)
+    shapes = [(shape.shape_id, shape.name) for shape in pres.slides[2].shapes]
+    assert shapes[:3] == [(2, 'Title 1'), (3, 'TextBox 2'), (4, 'TextBox 3')]
+    assert len({shape_id for shape_id, _ in shapes}) == len(shapes)